@@ -1,35 +1,56 @@
-from django.contrib import admin
+from django.contrib import admin, messages
+from kelaasor_final.admin_mixins import LargeTableAdminMixin, AutocompleteFilter
 from .models import Course , Enrollment, Section, Lesson, Order, OrderItem
+from . import search
 
 @admin.register(Course)
-class CourseAdmin(admin.ModelAdmin):
-    list_display = ("title", "course_type", "price", "is_active", "created_at")
+class CourseAdmin(LargeTableAdminMixin, admin.ModelAdmin):
+    list_display = ("title", "course_type", "price", "is_active", "enrollment_count", "lesson_count", "created_at")
     list_filter = ("course_type", "is_active")
     search_fields = ("title", "instructor_name")
     ordering = ("-created_at",)
 
+    search_limit = 1000  # best matches shown; keeps the id__in list bounded
+
+    def get_search_results(self, request, queryset, search_term):
+        # Use the search index instead of LIKE '%...%' scans; admins see inactive courses too
+        if not search_term.strip():
+            return queryset, False
+        ids = [cid for cid, _ in search.search_ids(search_term, limit=self.search_limit + 1, active_only=False)]
+        if len(ids) > self.search_limit:
+            ids = ids[:self.search_limit]
+            messages.warning(
+                request, f"Showing the {self.search_limit} best matches only; refine the search to see the rest."
+            )
+        return queryset.filter(id__in=ids), False
+
 
 @admin.register(Enrollment)
-class EnrollmentAdmin(admin.ModelAdmin):
-    list_display = ("user", "course", "status", "created_at")
-    list_filter = ("status", "course")
+class EnrollmentAdmin(LargeTableAdminMixin, admin.ModelAdmin):
+    list_display = ("user", "course", "status", "access_expires_at", "created_at")
+    list_filter = ("status", ("course", AutocompleteFilter))
     search_fields = ("user__mobile", "course__title")
-    ordering = ("-created_at",)
+    ordering = ("-id",)  # insertion order, read off the primary key
+    raw_id_fields = ("user",)
+    autocomplete_fields = ("course",)
     
 @admin.register(Section)
-class SectionAdmin(admin.ModelAdmin):
+class SectionAdmin(LargeTableAdminMixin, admin.ModelAdmin):
     list_display = ("course", "title", "order")
-    list_filter = ("course",)
+    list_filter = (("course", AutocompleteFilter),)
     search_fields = ("title", "course__title")
     ordering = ("course", "order")
+    autocomplete_fields = ("course",)
 
 
 @admin.register(Lesson)
-class LessonAdmin(admin.ModelAdmin):
+class LessonAdmin(LargeTableAdminMixin, admin.ModelAdmin):
     list_display = ("section", "title", "order", "is_free_preview")
-    list_filter = ("section__course", "is_free_preview")
+    list_select_related = ("section__course",)  # Section.__str__ shows the course
+    list_filter = (("section__course", AutocompleteFilter), "is_free_preview")
     search_fields = ("title", "section__title", "section__course__title")
     ordering = ("section", "order")
+    autocomplete_fields = ("section",)
     
 
 class OrderItemInline(admin.TabularInline):
@@ -37,10 +58,14 @@ class OrderItemInline(admin.TabularInline):
     extra = 0
     readonly_fields = ("course", "price_snapshot")
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related("course")
+
 @admin.register(Order)
-class OrderAdmin(admin.ModelAdmin):
+class OrderAdmin(LargeTableAdminMixin, admin.ModelAdmin):
     list_display = ("id", "user", "status", "total_price", "created_at", "paid_at")
     list_filter = ("status",)
     search_fields = ("user__mobile",)
-    ordering = ("-created_at",)
-    inlines = [OrderItemInline]
\ No newline at end of file
+    ordering = ("-id",)  # insertion order, read off the primary key
+    raw_id_fields = ("user",)
+    inlines = [OrderItemInline]
@@ -1,28 +1,36 @@
 from django.urls import path
+from kelaasor_final.async_api import select_view
 from .views import (
-    CourseListView, CourseDetailView,
-    CourseCreateView, CourseUpdateView, CourseDeleteView,
+    CourseListView, CourseDetailView, CourseSearchView,
+    CourseCreateView, CourseUpdateView, CourseDeleteView, CatalogExportView, CatalogImportView,
      MyEnrollmentListView, EnrollmentCreateView,
      CourseSectionsView, CourseLessonsListView, LessonDetailView,
      MyOrdersListView, OrderDetailView, OrderCreateView, OrderPayView,
-     CartListView , AddToCartView , RemoveFromCartView,
+     FinanceOrdersExportView, FinanceEnrollmentsExportView, DailyAnalyticsView,
+     CartListView , AddToCartView , RemoveFromCartView, CartCheckoutView, CartSummaryView,
      )
+from .async_views import (
+    AsyncCourseListView, AsyncCourseDetailView, AsyncCourseSectionsView, AsyncCourseLessonsListView,
+)
 
 urlpatterns = [
     # courses
-    path("courses/", CourseListView.as_view(), name="course-list"),
-    path("courses/<int:id>/", CourseDetailView.as_view(), name="course-detail"),
+    path("courses/", select_view(CourseListView, AsyncCourseListView), name="course-list"),
+    path("courses/search/", CourseSearchView.as_view(), name="course-search"),
+    path("courses/<int:id>/", select_view(CourseDetailView, AsyncCourseDetailView), name="course-detail"),
     path("courses/create/", CourseCreateView.as_view(), name="course-create"),
     path("courses/<int:id>/update/", CourseUpdateView.as_view(), name="course-update"),
     path("courses/<int:id>/delete/", CourseDeleteView.as_view(), name="course-delete"),
+    path("catalog/export/", CatalogExportView.as_view(), name="catalog-export"),
+    path("catalog/import/", CatalogImportView.as_view(), name="catalog-import"),
     
     # enrollments
     path("enrollments/mine/", MyEnrollmentListView.as_view(), name="my-enrollments"),
     path("enrollments/create/", EnrollmentCreateView.as_view(), name="enrollment-create"),
     
     # content
-    path("courses/<int:id>/sections/", CourseSectionsView.as_view(), name="course-sections"),
-    path("courses/<int:id>/lessons/", CourseLessonsListView.as_view(), name="course-lessons"),
+    path("courses/<int:id>/sections/", select_view(CourseSectionsView, AsyncCourseSectionsView), name="course-sections"),
+    path("courses/<int:id>/lessons/", select_view(CourseLessonsListView, AsyncCourseLessonsListView), name="course-lessons"),
     path("lessons/<int:pk>/", LessonDetailView.as_view(), name="lesson-detail"),
     
     # orders
@@ -30,11 +38,24 @@ urlpatterns = [
     path("orders/create/", OrderCreateView.as_view(), name="order-create"),
     path("orders/<int:pk>/", OrderDetailView.as_view(), name="order-detail"),
     path("orders/<int:id>/pay/", OrderPayView.as_view(), name="order-pay"),  # fake payment
+
+    # finance (admin, streamed CSV)
+    path("finance/orders/export/", FinanceOrdersExportView.as_view(), name="finance-orders-export"),
+    path("finance/enrollments/export/", FinanceEnrollmentsExportView.as_view(), name="finance-enrollments-export"),
+    path("analytics/daily/", DailyAnalyticsView.as_view(), name="analytics-daily"),
     
     #cart
     path("cart/", CartListView.as_view(), name="cart-list"),
+    path("cart/summary/", CartSummaryView.as_view(), name="cart-summary"),
     path("cart/add/", AddToCartView.as_view(), name="cart-add"),
     path("cart/remove/<int:pk>/", RemoveFromCartView.as_view(), name="cart-remove"),
+    path("cart/checkout/", CartCheckoutView.as_view(), name="cart-checkout"),
+
+    # async twins of the read endpoints (see courses/async_views.py)
+    path("async/courses/", AsyncCourseListView.as_view(), name="async-course-list"),
+    path("async/courses/<int:id>/", AsyncCourseDetailView.as_view(), name="async-course-detail"),
+    path("async/courses/<int:id>/sections/", AsyncCourseSectionsView.as_view(), name="async-course-sections"),
+    path("async/courses/<int:id>/lessons/", AsyncCourseLessonsListView.as_view(), name="async-course-lessons"),
     
     
 ]
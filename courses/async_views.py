@@ -0,0 +1,83 @@
+"""
+Async twins of the read-heavy course endpoints, built on the async ORM.
+Served under api/async/... and, with settings.ASYNC_VIEWS, on the primary URLs.
+"""
+from django.core.cache import cache
+from django.http import HttpResponse
+from rest_framework.exceptions import NotFound
+from rest_framework.request import Request
+from kelaasor_final.async_api import AsyncJSONView, json_response
+from . import catalog_cache, entitlements, outlines
+from .fast_serializers import compile_serializer
+from .models import Course, Lesson
+from .pagination import KeysetPagination
+from .serializers import CourseSerializer, LessonDetailSerializer, LessonPublicSerializer
+from .views import CourseListView, CourseDetailView
+
+
+class AsyncCatalogView(AsyncJSONView):
+    """
+    Same versioned response cache as CatalogCacheMixin; entries are shared
+    with the sync views since the keys and bodies are identical.
+    """
+    catalog_scope = None
+
+    async def get(self, request, *args, **kwargs):
+        request = Request(request)
+        request.accepted_media_type = "application/json"
+
+        key = await catalog_cache.aresponse_key(request, self.catalog_scope, kwargs)
+        entry = await cache.aget(key)
+        if entry is None:
+            response = await self.build(request, *args, **kwargs)
+            entry = catalog_cache.make_entry(response)
+            await cache.aset(key, entry, catalog_cache.CACHE_TIMEOUT)
+        return catalog_cache.make_response(request, entry)
+
+
+class AsyncCourseListView(AsyncCatalogView):
+    catalog_scope = CourseListView.catalog_scope
+    filter_backends = CourseListView.filter_backends
+    ordering_fields = CourseListView.ordering_fields
+    ordering = CourseListView.ordering
+
+    async def build(self, request):
+        compiled = compile_serializer(CourseSerializer, required=True)
+        queryset = Course.objects.filter(is_active=True).order_by("-created_at")
+        for backend in self.filter_backends:
+            queryset = backend().filter_queryset(request, queryset, self)
+
+        paginator = KeysetPagination()
+        columns = compiled.columns + [f.lstrip("-") for f in paginator.get_ordering(request, queryset, self)]
+        rows = await paginator.apaginate_queryset(queryset.values(*dict.fromkeys(columns)), request, self)
+        return json_response(paginator.get_paginated_response(compiled.render(rows)).data)
+
+
+class AsyncCourseDetailView(AsyncCatalogView):
+    catalog_scope = CourseDetailView.catalog_scope
+
+    async def build(self, request, id):
+        compiled = compile_serializer(CourseSerializer, required=True)
+        row = await Course.objects.filter(is_active=True, id=id).values(*compiled.columns).afirst()
+        if row is None:
+            raise NotFound("No Course matches the given query.")  # as get_object_or_404
+        return json_response(compiled.render([row])[0])
+
+
+class AsyncCourseSectionsView(AsyncJSONView):
+    async def get(self, request, id):
+        return HttpResponse(await outlines.aget_body(id), content_type="application/json")
+
+
+class AsyncCourseLessonsListView(AsyncJSONView):
+    async def get(self, request, id):
+        full_access = await entitlements.aget_access(request, id) == entitlements.ACTIVE
+        compiled = compile_serializer(
+            LessonDetailSerializer if full_access else LessonPublicSerializer, required=True
+        )
+
+        queryset = Lesson.objects.filter(section__course_id=id)
+        if not full_access:
+            queryset = queryset.filter(is_free_preview=True)
+        rows = [row async for row in queryset.values(*compiled.columns)]
+        return json_response(compiled.render(rows))
@@ -0,0 +1,84 @@
+import uuid
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+from .models import CartItem, Enrollment
+from . import catalog_cache
+
+CACHE_TIMEOUT = 60 * 30
+
+
+def _version_key(user_id):
+    return f"cart:version:{user_id}"
+
+
+def get_version(user_id):
+    key = _version_key(user_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, uuid.uuid4().hex, None)
+        version = cache.get(key)
+    return version
+
+
+def bump_version(user_id):
+    """
+    Invalidate the user's cached cart summary (cart items or enrollments changed).
+    """
+    key = _version_key(user_id)
+    transaction.on_commit(lambda: cache.set(key, uuid.uuid4().hex, None))
+
+
+def _stale_reason(row, today):
+    # Same rules as CartCheckoutSerializer, so "payable" means checkout will accept it
+    if not row["course__is_active"]:
+        return "inactive"
+    if row["course__course_type"] == "online" and row["course__start_date"] and today > row["course__start_date"]:
+        return "closed"
+    if row["enrolled"]:
+        return "enrolled"
+    return None
+
+
+def compute_summary(user_id, today):
+    """
+    One query: every cart item joined with its course, plus an EXISTS for enrollment.
+    """
+    rows = (
+        CartItem.objects.filter(cart__user_id=user_id)
+        .annotate(enrolled=Exists(Enrollment.objects.filter(
+            user_id=user_id, course_id=OuterRef("course_id"), status__in=Enrollment.ENROLLED_STATUSES
+        )))
+        .order_by("id")
+        .values("id", "course_id", "course__price", "course__is_active",
+                "course__course_type", "course__start_date", "enrolled")
+    )
+
+    summary = {"item_count": 0, "total_price": 0, "payable_count": 0, "payable_total": 0, "stale_items": []}
+    for row in rows:
+        summary["item_count"] += 1
+        summary["total_price"] += row["course__price"]
+        reason = _stale_reason(row, today)
+        if reason:
+            summary["stale_items"].append({"id": row["id"], "course": row["course_id"], "reason": reason})
+        else:
+            summary["payable_count"] += 1
+            summary["payable_total"] += row["course__price"]
+    return summary
+
+
+def get_summary(user_id):
+    """
+    Cart totals for a user, cached until the cart, their enrollments or the
+    catalog change (or the day rolls over, since "closed" depends on the date).
+    """
+    today = timezone.now().date()
+    version = get_version(user_id)
+    key = f"cart:summary:{user_id}:{version}:{catalog_cache.get_version()}:{today.isoformat()}"
+
+    summary = cache.get(key)
+    if summary is None:
+        summary = compute_summary(user_id, today)
+        cache.set(key, summary, CACHE_TIMEOUT)
+    return {"version": version, **summary}
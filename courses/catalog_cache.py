@@ -0,0 +1,127 @@
+import hashlib
+import uuid
+from django.core.cache import cache
+from django.db import transaction
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.http import parse_etags
+
+VERSION_KEY = "catalog:version"
+CACHE_TIMEOUT = 60 * 10
+
+# Query parameters that change the catalog response; everything else is ignored
+KEY_PARAMS = ("course_type", "min_price", "max_price", "ordering", "cursor", "page", "page_size")
+
+
+def get_version():
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, uuid.uuid4().hex, None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+async def aget_version():
+    version = await cache.aget(VERSION_KEY)
+    if version is None:
+        await cache.aadd(VERSION_KEY, uuid.uuid4().hex, None)
+        version = await cache.aget(VERSION_KEY)
+    return version
+
+
+def bump_version():
+    """
+    Invalidate every cached catalog response at once.
+    A fresh random token (not a counter) so a lost key can never resurrect old entries.
+    """
+    transaction.on_commit(lambda: cache.set(VERSION_KEY, uuid.uuid4().hex, None))
+
+
+def _digest(request, scope, kwargs):
+    params = []
+    for name in KEY_PARAMS:
+        value = request.query_params.get(name, "").strip()
+        if name == "course_type":
+            value = value.lower()  # CourseFilter matches it with iexact
+        if value:
+            params.append(f"{name}={value}")
+
+    raw = "|".join([
+        scope,
+        request.scheme,
+        request.get_host(),
+        request.accepted_media_type,
+        ",".join(f"{k}={v}" for k, v in sorted(kwargs.items())),
+        "&".join(params),
+    ])
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+def response_key(request, scope, kwargs):
+    return f"catalog:{get_version()}:{_digest(request, scope, kwargs)}"
+
+
+async def aresponse_key(request, scope, kwargs):
+    return f"catalog:{await aget_version()}:{_digest(request, scope, kwargs)}"
+
+
+def make_entry(response):
+    """
+    (strong ETag, body, content type) of a rendered response, as stored in the cache.
+    """
+    etag = f'"{hashlib.sha256(response.content).hexdigest()}"'
+    return (etag, response.content, response["Content-Type"])
+
+
+def _not_modified(request, etag):
+    header = request.META.get("HTTP_IF_NONE_MATCH")
+    if not header:
+        return False
+    etags = parse_etags(header)
+    # If-None-Match uses the weak comparison: W/"x" matches "x"
+    return "*" in etags or etag in etags or f"W/{etag}" in etags
+
+
+def make_response(request, entry):
+    etag, body, content_type = entry
+    if _not_modified(request, etag):
+        response = HttpResponseNotModified()
+    else:
+        response = HttpResponse(body, content_type=content_type)
+    response["ETag"] = etag
+    return response
+
+
+class CatalogCacheMixin:
+    """
+    Serve GETs of a public catalog view from the versioned response cache.
+    A hit returns the stored bytes without touching the ORM; a miss renders
+    normally and stores the body with a strong ETag.
+    """
+    catalog_scope = None
+
+    def get(self, request, *args, **kwargs):
+        if request.accepted_renderer.format != "json":
+            return super().get(request, *args, **kwargs)
+
+        key = response_key(request, self.catalog_scope or type(self).__name__, kwargs)
+        entry = cache.get(key)
+        if entry is not None:
+            return make_response(request, entry)
+
+        self._catalog_cache_key = key
+        return super().get(request, *args, **kwargs)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        key = getattr(self, "_catalog_cache_key", None)
+        if key is None or response.status_code != 200:
+            return response
+
+        response.render()
+        entry = make_entry(response)
+        cache.set(key, entry, CACHE_TIMEOUT)
+
+        if _not_modified(request, entry[0]):
+            return make_response(request, entry)
+        response["ETag"] = entry[0]
+        return response
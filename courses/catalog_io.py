@@ -0,0 +1,282 @@
+"""
+Bulk catalog import/export (courses → sections → lessons) as JSONL or CSV.
+
+Both formats are flat: one record per object with a "type", its own
+"external_id" and its parent's external id in "parent". Exports list every
+course, then every section, then every lesson, so parents always come first.
+Imports create or update by external_id in chunks, touching only the fields
+a record mentions; memory stays flat whatever the catalog size.
+"""
+import csv
+import json
+from datetime import date
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models import CharField, Value
+from django.db.models.functions import Cast, Concat
+from .models import Course, Section, Lesson
+from . import catalog_cache, counters, expiry, outlines, search
+
+FORMATS = ("jsonl", "csv")
+CONTENT_TYPES = {"jsonl": "application/x-ndjson", "csv": "text/csv"}
+
+# Imported/exported fields per record type, with how to read them back
+FIELDS = {
+    "course": {
+        "title": str, "course_type": str, "price": int, "start_date": date.fromisoformat,
+        "end_date": date.fromisoformat, "instructor_name": str, "is_active": "bool",
+    },
+    "section": {"title": str, "order": int},
+    "lesson": {"title": str, "order": int, "content_url": str, "is_free_preview": "bool"},
+}
+MODELS = {"course": Course, "section": Section, "lesson": Lesson}
+PARENT_FIELDS = {"section": "course", "lesson": "section"}
+COLUMNS = ["type", "external_id", "parent"] + list(dict.fromkeys(f for fields in FIELDS.values() for f in fields))
+
+
+class CatalogImportError(Exception):
+    def __init__(self, line, message):
+        self.line = line
+        super().__init__(f"line {line}: {message}")
+
+
+################################ export
+
+def stamp_external_ids():
+    """
+    Give rows without an external_id a stable one ("course:12"), so that an
+    exported file re-imports as updates rather than duplicates. New rows are
+    stamped on save (signals); this covers bulk_create paths like seed_load.
+    """
+    for kind, model in MODELS.items():
+        model.objects.filter(external_id__isnull=True).update(
+            external_id=Concat(Value(f"{kind}:"), Cast("id", CharField()), output_field=CharField())
+        )
+
+
+def export_records(chunk_size=2000):
+    for row in Course.objects.order_by("id").values("external_id", *FIELDS["course"]).iterator(chunk_size):
+        yield {"type": "course", "parent": None, **row}
+    sections = Section.objects.order_by("course_id", "order", "id").values(
+        "external_id", "course__external_id", *FIELDS["section"]
+    )
+    for row in sections.iterator(chunk_size):
+        yield {"type": "section", "parent": row.pop("course__external_id"), **row}
+    lessons = Lesson.objects.order_by("section_id", "order", "id").values(
+        "external_id", "section__external_id", *FIELDS["lesson"]
+    )
+    for row in lessons.iterator(chunk_size):
+        yield {"type": "lesson", "parent": row.pop("section__external_id"), **row}
+
+
+class Echo:
+    # csv.writer target that hands each line back instead of buffering it
+    def write(self, value):
+        return value
+
+
+def write_jsonl(records):
+    for record in records:
+        yield json.dumps(record, cls=DjangoJSONEncoder, ensure_ascii=False) + "\n"
+
+
+def write_csv(records):
+    writer = csv.DictWriter(Echo(), fieldnames=COLUMNS, extrasaction="ignore")
+    yield writer.writeheader()
+    for record in records:
+        yield writer.writerow(record)
+
+
+def write(records, fmt):
+    return write_csv(records) if fmt == "csv" else write_jsonl(records)
+
+
+################################ import
+
+def read(lines, fmt):
+    """
+    (line number, record dict) from an iterable of text lines.
+    """
+    if fmt == "csv":
+        reader = csv.DictReader(lines)
+        for record in reader:
+            yield reader.line_num, record
+        return
+    for number, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        try:
+            yield number, json.loads(line)
+        except ValueError as e:
+            raise CatalogImportError(number, f"invalid JSON ({e})")
+
+
+def _to_bool(value):
+    if isinstance(value, bool):
+        return value
+    return str(value).strip().lower() in ("1", "true", "yes")
+
+
+def _parse(number, record):
+    """
+    Validated values of the fields present in the record. Absent fields are
+    left out, so an update only touches what the file mentions; new rows get
+    model defaults for them.
+    """
+    kind = record.get("type")
+    if kind not in FIELDS:
+        raise CatalogImportError(number, f"unknown type {kind!r}")
+    external_id = str(record.get("external_id") or "").strip()
+    if not external_id:
+        raise CatalogImportError(number, "external_id is required")
+    parent = str(record.get("parent") or "").strip()
+    if kind in PARENT_FIELDS and not parent:
+        raise CatalogImportError(number, f"a {kind} needs a parent")
+
+    model = MODELS[kind]
+    values = {}
+    for name, convert in FIELDS[kind].items():
+        if name not in record:
+            continue
+        field = model._meta.get_field(name)
+        raw = record[name]
+        if raw is None or raw == "":
+            if field.null:
+                values[name] = None
+            elif field.blank:
+                values[name] = ""
+            continue  # e.g. an empty price cell: keep what is there
+        try:
+            value = _to_bool(raw) if convert == "bool" else convert(raw)
+            # Same checks as a model form: choices, max_length, URL, >= 0 ...
+            values[name] = field.clean(value, None)
+        except (TypeError, ValueError):
+            raise CatalogImportError(number, f"invalid {name}: {raw!r}")
+        except ValidationError as e:
+            raise CatalogImportError(number, f"invalid {name}: {' '.join(e.messages)}")
+    return kind, external_id, parent, values
+
+
+class CatalogImporter:
+    """
+    Buffers parsed records per type and upserts them chunk by chunk,
+    parents before children. Use import_records() rather than this directly.
+    """
+
+    def __init__(self, chunk_size):
+        self.chunk_size = chunk_size
+        self.buffers = {kind: {} for kind in FIELDS}  # external_id -> (line, parent, values)
+        self.stats = {f"{kind}s_{op}": 0 for kind in FIELDS for op in ("created", "updated")}
+        self.touched_courses = set()
+        self.expiry_changed = set()
+
+    def add(self, number, record):
+        kind, external_id, parent, values = _parse(number, record)
+        buffer = self.buffers[kind]
+        if external_id in buffer:
+            # Repeated within a chunk: later fields win, earlier ones are kept
+            values = {**buffer[external_id][2], **values}
+        buffer[external_id] = (number, parent, values)
+        if len(buffer) >= self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        for kind in FIELDS:
+            if self.buffers[kind]:
+                getattr(self, f"_flush_{kind}")(self.buffers[kind])
+                self.buffers[kind] = {}
+
+    def _write(self, kind, buffer, existing, parent_field=None, parents=None):
+        """
+        Create the rows that are new and bulk_update the existing ones, each
+        group of rows with the same fields present in one statement per batch.
+        existing maps external_id -> pk.
+        """
+        model = MODELS[kind]
+        new, updates = [], {}
+        for ext, (number, parent, values) in buffer.items():
+            if parent_field:
+                values = {f"{parent_field}_id": parents[parent][0], **values}
+            if ext in existing:
+                updates.setdefault(tuple(values), []).append(model(pk=existing[ext], external_id=ext, **values))
+            elif not values.get("title"):
+                raise CatalogImportError(number, f"title is required for a new {kind}")
+            else:
+                new.append(model(external_id=ext, **values))
+
+        model.objects.bulk_create(new, batch_size=self.chunk_size)
+        for fields, objs in updates.items():
+            model.objects.bulk_update(objs, [f.removesuffix("_id") for f in fields], batch_size=self.chunk_size)
+        self.stats[f"{kind}s_updated"] += len(buffer) - len(new)
+        self.stats[f"{kind}s_created"] += len(new)
+
+    def _parents(self, model, buffer, *fields):
+        wanted = {parent for _, parent, _ in buffer.values()}
+        found = {row[0]: row[1:] for row in model.objects.filter(external_id__in=wanted).values_list("external_id", *fields)}
+        for number, parent, _ in buffer.values():
+            if parent not in found:
+                raise CatalogImportError(number, f"unknown parent {parent!r}")
+        return found
+
+    def _existing(self, model, buffer, *fields):
+        return {
+            row[0]: row[1:]
+            for row in model.objects.filter(external_id__in=list(buffer)).values_list("external_id", "id", *fields)
+        }
+
+    def _flush_course(self, buffer):
+        existing = self._existing(Course, buffer, "course_type", "end_date")
+        self._write("course", buffer, {ext: row[0] for ext, row in existing.items()})
+        for ext, (pk, course_type, end_date) in existing.items():
+            values = buffer[ext][2]
+            self.touched_courses.add(pk)
+            if (values.get("course_type", course_type), values.get("end_date", end_date)) != (course_type, end_date):
+                self.expiry_changed.add(pk)
+        new = [ext for ext in buffer if ext not in existing]
+        self.touched_courses.update(Course.objects.filter(external_id__in=new).values_list("id", flat=True))
+
+    def _flush_section(self, buffer):
+        parents = self._parents(Course, buffer, "id")
+        existing = self._existing(Section, buffer, "course_id")
+        self._write("section", buffer, {ext: row[0] for ext, row in existing.items()}, "course", parents)
+        # A section moved to another course changes the old one too
+        self.touched_courses.update(course_id for _, course_id in existing.values())
+        self.touched_courses.update(course_id for course_id, in parents.values())
+
+    def _flush_lesson(self, buffer):
+        parents = self._parents(Section, buffer, "id", "course_id")
+        existing = self._existing(Lesson, buffer, "section__course_id")
+        self._write("lesson", buffer, {ext: row[0] for ext, row in existing.items()}, "section", parents)
+        self.touched_courses.update(course_id for _, course_id in existing.values())
+        self.touched_courses.update(course_id for _, course_id in parents.values())
+
+
+def import_records(records, chunk_size=1000):
+    """
+    Upsert (line number, record) pairs in one transaction; any bad record
+    rolls the whole import back with a CatalogImportError.
+    Returns created/updated counts per type.
+    """
+    importer = CatalogImporter(chunk_size)
+    with transaction.atomic():
+        for number, record in records:
+            importer.add(number, record)
+        importer.flush()
+
+        # Bulk writes skip the signals that keep derived data fresh
+        for course_id in importer.expiry_changed:
+            expiry.sync_course(course_id)
+        touched = sorted(importer.touched_courses)
+        counters.recount(touched)
+        catalog_cache.bump_version()
+        transaction.on_commit(lambda: _refresh_derived(touched))
+
+    return importer.stats
+
+
+def _refresh_derived(course_ids, chunk_size=500):
+    outlines.rebuild_many(course_ids, chunk_size)
+    backend = search.get_backend()
+    for i in range(0, len(course_ids), chunk_size):
+        backend.reindex(course_ids[i:i + chunk_size])
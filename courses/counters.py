@@ -0,0 +1,100 @@
+"""
+Denormalized counters on Course: enrollment_count (enrollments that are not
+cancelled), section_count, lesson_count and free_preview_count.
+
+Write paths adjust them with UPDATE ... SET n = n + delta (F() expressions),
+so concurrent writers never lose increments. Bulk writes that skip signals
+(catalog import, seeding) call recount() instead, and the recount_courses
+command repairs any drift.
+
+Content changes bump the catalog cache version (see signals._content_changed).
+Enrollments don't: cached catalog pages may show an enrollment_count up to
+catalog_cache.CACHE_TIMEOUT old rather than be flushed on every purchase.
+"""
+from django.db.models import Count, F, IntegerField, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce
+from .models import Course, Enrollment, Lesson, Section
+
+COUNTER_FIELDS = ("enrollment_count", "section_count", "lesson_count", "free_preview_count")
+
+
+def adjust(course_id, **deltas):
+    """
+    adjust(course_id, lesson_count=1, free_preview_count=-1); zero deltas are dropped.
+    """
+    updates = {field: F(field) + delta for field, delta in deltas.items() if delta}
+    if course_id is not None and updates:
+        Course.objects.filter(id=course_id).update(**updates)
+
+
+def adjust_many(field, deltas):
+    """
+    One UPDATE per distinct delta: deltas is {course_id: delta}.
+    """
+    by_delta = {}
+    for course_id, delta in deltas.items():
+        if delta:
+            by_delta.setdefault(delta, []).append(course_id)
+    for delta, course_ids in by_delta.items():
+        Course.objects.filter(id__in=course_ids).update(**{field: F(field) + delta})
+
+
+def counts_enrollment(status):
+    return status != "cancelled"
+
+
+def lesson_deltas(lesson_delta, is_free_preview):
+    return {"lesson_count": lesson_delta, "free_preview_count": lesson_delta if is_free_preview else 0}
+
+
+def _count(queryset, course_field):
+    # Correlated COUNT(*) per course; Coalesce turns "no rows" into 0
+    return Coalesce(
+        Subquery(
+            queryset.filter(**{course_field: OuterRef("pk")})
+            .order_by().values(course_field).annotate(n=Count("pk")).values("n")
+        ),
+        Value(0),
+        output_field=IntegerField(),
+    )
+
+
+def _fresh_counts():
+    return {
+        "enrollment_count": _count(Enrollment.objects.exclude(status="cancelled"), "course"),
+        "section_count": _count(Section.objects.all(), "course"),
+        "lesson_count": _count(Lesson.objects.all(), "section__course"),
+        "free_preview_count": _count(Lesson.objects.filter(is_free_preview=True), "section__course"),
+    }
+
+
+def drifted():
+    """
+    Courses whose stored counters differ from a fresh count.
+    """
+    fresh = _fresh_counts()
+    differs = Q()
+    for field in COUNTER_FIELDS:
+        differs |= ~Q(**{field: F(f"fresh_{field}")})
+    return Course.objects.annotate(**{f"fresh_{f}": expr for f, expr in fresh.items()}).filter(differs)
+
+
+def recount(course_ids=None, chunk_size=1000):
+    """
+    Recompute every counter from the source tables, one UPDATE per chunk of
+    courses (all courses when course_ids is None). Returns the courses updated.
+    """
+    if course_ids is not None:
+        course_ids = sorted(course_ids)
+        return sum(
+            Course.objects.filter(id__in=course_ids[i:i + chunk_size]).update(**_fresh_counts())
+            for i in range(0, len(course_ids), chunk_size)
+        )
+
+    total, last_id = 0, 0
+    while True:
+        chunk = list(Course.objects.filter(id__gt=last_id).order_by("id").values_list("id", flat=True)[:chunk_size])
+        if not chunk:
+            return total
+        total += Course.objects.filter(id__in=chunk).update(**_fresh_counts())
+        last_id = chunk[-1]
@@ -0,0 +1,32 @@
+import threading
+from django.db import transaction
+
+
+class OnCommitBatch:
+    """
+    Collects ids during a transaction and calls func(sorted ids) once after
+    it commits, however many rows asked for them:
+
+        rebuilds = OnCommitBatch(rebuild_many)
+        rebuilds.add(course_id)
+
+    Every add() registers the flush, but only the first to run finds ids to
+    hand over. Ids added inside a rolled-back block ride along with the next
+    flush, which only costs a redundant rebuild.
+    """
+
+    def __init__(self, func):
+        self.func = func
+        self.local = threading.local()   # on_commit callbacks run in the writing thread
+
+    def add(self, id):
+        if not hasattr(self.local, "ids"):
+            self.local.ids = set()
+        self.local.ids.add(id)
+        transaction.on_commit(self.flush)
+
+    def flush(self):
+        ids = getattr(self.local, "ids", None)
+        if ids:
+            self.local.ids = set()
+            self.func(sorted(ids))
@@ -0,0 +1,124 @@
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+from .models import Enrollment
+
+# Access states returned by get_access()
+ACTIVE = "active"      # enrolled and (for offline courses) not expired
+EXPIRED = "expired"    # enrolled, but the offline course has ended
+NONE = "none"          # not enrolled / anonymous
+
+CACHE_TIMEOUT = 60 * 15
+
+# Enrollments that still say something about access; "expired" rows were flipped by the sweeper
+_ENROLLED_STATUSES = Enrollment.ENROLLED_STATUSES
+
+
+def _enrollment_key(user_id, course_id):
+    return f"entitlement:enrollment:{user_id}:{course_id}"
+
+
+def _query(user_id, course_id):
+    # One lookup on the (user, course) unique index
+    return Enrollment.objects.filter(
+        user_id=user_id, course_id=course_id, status__in=_ENROLLED_STATUSES
+    ).values_list("access_expires_at", flat=True)
+
+
+def _load(user_id, course_id):
+    """
+    Cached entry for (user, course): False if not enrolled, else (access_expires_at,).
+    At most one query on a miss.
+    """
+    key = _enrollment_key(user_id, course_id)
+    entry = cache.get(key)
+    if entry is None:
+        rows = list(_query(user_id, course_id))
+        entry = (rows[0],) if rows else False
+        cache.set(key, entry, CACHE_TIMEOUT)
+    return entry
+
+
+async def _aload(user_id, course_id):
+    """
+    _load() on the async cache and ORM APIs.
+    """
+    key = _enrollment_key(user_id, course_id)
+    entry = await cache.aget(key)
+    if entry is None:
+        rows = [row async for row in _query(user_id, course_id)]
+        entry = (rows[0],) if rows else False
+        await cache.aset(key, entry, CACHE_TIMEOUT)
+    return entry
+
+
+def _state(entry):
+    if not entry:
+        return NONE
+    # Expiry is evaluated on every call so cached entries never outlive it
+    expires_at = entry[0]
+    if expires_at is not None and timezone.now() >= expires_at:
+        return EXPIRED
+    return ACTIVE
+
+
+def _memo(request, course_id):
+    user = getattr(request, "user", None)
+    if not (user and user.is_authenticated):
+        return None, None
+
+    memo = getattr(request, "_entitlements", None)
+    if memo is None:
+        memo = request._entitlements = {}
+    return memo, (user.pk, int(course_id))
+
+
+def get_access(request, course_id):
+    """
+    Access state of request.user for the given course.
+    Memoized on the request, so repeated checks in one request are free.
+    """
+    memo, key = _memo(request, course_id)
+    if memo is None:
+        return NONE
+    if key not in memo:
+        memo[key] = _state(_load(*key))
+    return memo[key]
+
+
+async def aget_access(request, course_id):
+    """
+    get_access() for async views.
+    """
+    memo, key = _memo(request, course_id)
+    if memo is None:
+        return NONE
+    if key not in memo:
+        memo[key] = _state(await _aload(*key))
+    return memo[key]
+
+
+def has_full_access(request, course_id):
+    """
+    True if user is enrolled and (for offline courses) access is not expired.
+    """
+    return get_access(request, course_id) == ACTIVE
+
+
+def invalidate_enrollments(user_id, course_ids):
+    keys = [_enrollment_key(user_id, cid) for cid in course_ids]
+    # Run after commit so a concurrent reader cannot re-cache pre-commit data
+    transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def invalidate_course_enrollments(course_id, user_ids, chunk_size=1000):
+    """
+    Drop every user's entry for one course (its expiry changed).
+    """
+    keys = [_enrollment_key(uid, course_id) for uid in user_ids]
+
+    def delete():
+        for i in range(0, len(keys), chunk_size):
+            cache.delete_many(keys[i:i + chunk_size])
+
+    transaction.on_commit(delete)
@@ -0,0 +1,71 @@
+"""
+Access expiry of enrollments, denormalized onto Enrollment.access_expires_at.
+
+Offline courses grant access until the end of their end_date; online courses
+and offline courses without an end_date never expire. The column is set when
+an enrollment is created, re-synced when a course's type or end_date changes,
+and expire_due() (the expire_enrollments command) flips overdue rows to
+"expired". Access checks compare against the column directly, so they stay
+correct between sweeps.
+"""
+from datetime import datetime, time, timedelta
+from django.db import transaction
+from django.utils import timezone
+from .models import Course, Enrollment
+from . import carts, entitlements
+
+
+def expires_at(course_type, end_date):
+    """
+    First instant without access: midnight after end_date, so that
+    "now >= expires_at" is exactly "today > end_date".
+    """
+    if course_type != "offline" or end_date is None:
+        return None
+    return timezone.make_aware(datetime.combine(end_date + timedelta(days=1), time.min))
+
+
+def course_expires_at(course_id):
+    terms = Course.objects.filter(id=course_id).values_list("course_type", "end_date").first()
+    return expires_at(*terms) if terms else None
+
+
+def sync_course(course_id):
+    """
+    Re-stamp every enrollment of a course after its type or end_date changed.
+    Rows the new date makes current again are reactivated.
+    """
+    with transaction.atomic():
+        expires = course_expires_at(course_id)
+        now = timezone.now()
+        Enrollment.objects.filter(course_id=course_id).update(access_expires_at=expires)
+        if expires is None or expires > now:
+            Enrollment.objects.filter(course_id=course_id, status="expired").update(status="active")
+
+        # Cached access entries carry the old expiry
+        user_ids = list(Enrollment.objects.filter(course_id=course_id).values_list("user_id", flat=True))
+        entitlements.invalidate_course_enrollments(course_id, user_ids)
+
+
+def expire_due(chunk_size=1000, now=None):
+    """
+    Flip active enrollments whose access has ended to "expired", one chunk per
+    statement so locks stay short. Returns the number of rows flipped.
+    """
+    now = now or timezone.now()
+    total = 0
+    while True:
+        rows = list(
+            Enrollment.objects.filter(status="active", access_expires_at__lte=now)
+            .order_by("access_expires_at", "id")
+            .values_list("id", "user_id")[:chunk_size]
+        )
+        if not rows:
+            return total
+
+        total += Enrollment.objects.filter(
+            id__in=[pk for pk, _ in rows], status="active"
+        ).update(status="expired")
+        # update() skips signals; the cart summary flags enrolled courses
+        for user_id in {uid for _, uid in rows}:
+            carts.bump_version(user_id)
@@ -0,0 +1,136 @@
+from django.conf import settings
+from rest_framework import serializers
+from rest_framework.response import Response
+
+# Fields whose to_representation() returns the value unchanged
+_IDENTITY_FIELDS = (serializers.ReadOnlyField, serializers.PrimaryKeyRelatedField)
+
+
+class Unsupported(Exception):
+    pass
+
+
+class CompiledSerializer:
+    """
+    Read-only rendering plan for a ModelSerializer: which columns to fetch with
+    .values() and how to turn each row into exactly what the serializer would emit.
+    """
+
+    def __init__(self, serializer_class):
+        serializer = serializer_class()
+        self.model = serializer.Meta.model
+        self.columns = []   # .values() lookups
+        self.plan = []      # (output name, column, converter or None)
+        self.nested = []    # (output name, CompiledSerializer, fk column on child)
+
+        for name, field in serializer.fields.items():
+            if field.write_only:
+                continue
+            if isinstance(field, serializers.ListSerializer):
+                self.nested.append((name, *self._compile_nested(field)))
+                continue
+            if isinstance(field, (serializers.BaseSerializer, serializers.SerializerMethodField)):
+                raise Unsupported(f"{serializer_class.__name__}.{name}")
+            if isinstance(field, serializers.PrimaryKeyRelatedField) and field.pk_field is not None:
+                raise Unsupported(f"{serializer_class.__name__}.{name}")
+            if field.source == "*":
+                raise Unsupported(f"{serializer_class.__name__}.{name}")
+
+            column = "__".join(field.source_attrs)
+            self.columns.append(column)
+            converter = None if isinstance(field, _IDENTITY_FIELDS) else field.to_representation
+            self.plan.append((name, column, converter))
+
+        if self.nested and "pk" not in self.columns:
+            self.columns.append("pk")
+
+    def _compile_nested(self, field):
+        """
+        Reverse FK lists such as OrderSerializer.items.
+        """
+        if len(field.source_attrs) != 1 or not isinstance(field.child, serializers.ModelSerializer):
+            raise Unsupported(field.field_name)
+        relation = self.model._meta.get_field(field.source_attrs[0])
+        if not relation.one_to_many:
+            raise Unsupported(field.field_name)
+        return compile_serializer(type(field.child), required=True), relation.field.name
+
+    def render(self, rows):
+        rows = list(rows)
+        children = {name: self._children(compiled, fk, rows) for name, compiled, fk in self.nested}
+
+        plan = self.plan
+        out = []
+        for row in rows:
+            item = {}
+            for name, column, convert in plan:
+                value = row[column]
+                item[name] = value if value is None or convert is None else convert(value)
+            for name, _, _ in self.nested:
+                item[name] = children[name].get(row["pk"], [])
+            out.append(item)
+        return out
+
+    def _children(self, compiled, fk, parents):
+        if not parents:
+            return {}
+        # One query per nested list, like prefetch_related; per-parent order by pk
+        rows = list(
+            compiled.model._default_manager
+            .filter(**{f"{fk}__in": [p["pk"] for p in parents]})
+            .order_by(*(compiled.model._meta.ordering or ["pk"]))
+            .values(*dict.fromkeys(compiled.columns + [fk]))
+        )
+        grouped = {}
+        for row, item in zip(rows, compiled.render(rows)):
+            grouped.setdefault(row[fk], []).append(item)
+        return grouped
+
+
+_compiled = {}
+
+
+def compile_serializer(serializer_class, required=False):
+    """
+    Cached CompiledSerializer for a class, or None if it uses fields the fast
+    path cannot reproduce (method fields, custom nesting, ...).
+    """
+    if serializer_class not in _compiled:
+        try:
+            _compiled[serializer_class] = CompiledSerializer(serializer_class)
+        except Unsupported:
+            _compiled[serializer_class] = None
+    compiled = _compiled[serializer_class]
+    if compiled is None and required:
+        raise Unsupported(serializer_class.__name__)
+    return compiled
+
+
+class FastListMixin:
+    """
+    Opt-in fast path for read-only list views: fetch the serializer's declared
+    fields with .values() and render them with a precompiled plan instead of
+    building model instances and running the serializer per row.
+    Output is identical to the regular path; it falls back to it when the
+    serializer cannot be compiled, for non-JSON renderers, or unless
+    settings.FAST_SERIALIZATION is on.
+    """
+
+    def list(self, request, *args, **kwargs):
+        compiled = None
+        if getattr(settings, "FAST_SERIALIZATION", False) and request.accepted_renderer.format == "json":
+            compiled = compile_serializer(self.get_serializer_class())
+        if compiled is None:
+            return super().list(request, *args, **kwargs)
+
+        queryset = self.filter_queryset(self.get_queryset())
+        columns = list(compiled.columns)
+        if hasattr(self.paginator, "get_ordering"):
+            # Keyset pagination reads the ordering columns from each row
+            columns += [f.lstrip("-") for f in self.paginator.get_ordering(request, queryset, self)]
+        queryset = queryset.prefetch_related(None).values(*dict.fromkeys(columns))
+
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(compiled.render(page))
+        return Response(compiled.render(queryset))
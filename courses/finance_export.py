@@ -0,0 +1,109 @@
+"""
+CSV exports of orders (one row per order item) and enrollments for finance.
+
+Rows come straight off a server-side cursor (.values_list().iterator()) and
+are written in small batches, so memory stays flat and the header goes out
+before the query has even run.
+"""
+import csv
+from datetime import datetime, time, timedelta
+from django.utils import timezone
+from .catalog_io import Echo
+from .models import Enrollment, OrderItem
+
+CHUNK_SIZE = 2000
+ROWS_PER_WRITE = 500
+
+ORDER_COLUMNS = [
+    ("order_id", "order_id"),
+    ("order_created_at", "order__created_at"),
+    ("order_paid_at", "order__paid_at"),
+    ("order_status", "order__status"),
+    ("user_id", "order__user_id"),
+    ("user_mobile", "order__user__mobile"),
+    ("order_total", "order__total_price"),
+    ("item_id", "id"),
+    ("course_id", "course_id"),
+    ("course_title", "course__title"),
+    ("price_snapshot", "price_snapshot"),
+]
+
+ENROLLMENT_COLUMNS = [
+    ("enrollment_id", "id"),
+    ("created_at", "created_at"),
+    ("status", "status"),
+    ("user_id", "user_id"),
+    ("user_mobile", "user__mobile"),
+    ("course_id", "course_id"),
+    ("course_title", "course__title"),
+    ("access_expires_at", "access_expires_at"),
+]
+
+
+def date_range_lookups(field, date_from, date_to):
+    """
+    Inclusive local dates → half-open datetime range on field, so its index is used.
+    """
+    lookups = {}
+    if date_from:
+        lookups[f"{field}__gte"] = timezone.make_aware(datetime.combine(date_from, time.min))
+    if date_to:
+        lookups[f"{field}__lt"] = timezone.make_aware(datetime.combine(date_to + timedelta(days=1), time.min))
+    return lookups
+
+
+def order_rows(date_from=None, date_to=None, status=None, by="created"):
+    """
+    Order items flattened with their order, ordered by order date.
+    by="paid" filters and orders on paid_at instead of created_at.
+    """
+    field = "order__paid_at" if by == "paid" else "order__created_at"
+    queryset = OrderItem.objects.filter(**date_range_lookups(field, date_from, date_to))
+    if status:
+        queryset = queryset.filter(order__status=status)
+    queryset = queryset.order_by(field, "order_id", "id")
+    return queryset.values_list(*[source for _, source in ORDER_COLUMNS]).iterator(chunk_size=CHUNK_SIZE)
+
+
+def enrollment_rows(date_from=None, date_to=None, status=None):
+    queryset = Enrollment.objects.filter(**date_range_lookups("created_at", date_from, date_to))
+    if status:
+        queryset = queryset.filter(status=status)
+    queryset = queryset.order_by("created_at", "id")
+    return queryset.values_list(*[source for _, source in ENROLLMENT_COLUMNS]).iterator(chunk_size=CHUNK_SIZE)
+
+
+# Spreadsheets run a cell starting with one of these as a formula
+FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+
+def _cell(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        # Course titles and the like are user input: a leading quote keeps them text
+        return "'" + value
+    return value
+
+
+def write_csv(columns, rows):
+    """
+    The header first, then ROWS_PER_WRITE rows per chunk. rows is only
+    iterated (and its query only run) after the header has been yielded.
+    """
+    writer = csv.writer(Echo())
+    yield writer.writerow([name for name, _ in columns])
+    batch = []
+    for row in rows:
+        batch.append(writer.writerow([_cell(value) for value in row]))
+        if len(batch) >= ROWS_PER_WRITE:
+            yield "".join(batch)
+            batch = []
+    if batch:
+        yield "".join(batch)
+
+
+def export(dataset, **filters):
+    if dataset == "orders":
+        return write_csv(ORDER_COLUMNS, order_rows(**filters))
+    return write_csv(ENROLLMENT_COLUMNS, enrollment_rows(**filters))
@@ -0,0 +1,67 @@
+from django.db import transaction
+from django.utils import timezone
+from .models import Order, OrderItem, Enrollment
+from . import carts, counters, entitlements, expiry, rollups
+
+
+class OrderNotPayable(Exception):
+    """
+    Raised when an order cannot be claimed for payment.
+    status is the order's current status, or None if it does not exist for this user.
+    """
+
+    def __init__(self, status=None):
+        self.status = status
+        super().__init__(status)
+
+
+def fulfill_order(order_id, user):
+    """
+    Mark a pending order as paid and grant its enrollments.
+
+    The claim is a conditional UPDATE ... WHERE status='pending', so of any
+    number of concurrent pay requests exactly one wins. Enrollments are granted
+    set-based, so the query count does not grow with the number of items.
+    Returns the ids of the granted courses.
+    """
+    with transaction.atomic():
+        paid_at = timezone.now()
+        claimed = Order.objects.filter(id=order_id, user=user, status="pending").update(
+            status="paid", paid_at=paid_at
+        )
+        if not claimed:
+            raise OrderNotPayable(
+                Order.objects.filter(id=order_id, user=user).values_list("status", flat=True).first()
+            )
+
+        items = list(
+            OrderItem.objects.filter(order_id=order_id)
+            .values_list("course_id", "price_snapshot", "course__course_type", "course__end_date")
+        )
+        course_ids = [cid for cid, _, _, _ in items]
+        # Rows that exist already (e.g. cancelled) are not new enrollments for the rollup
+        existing = dict(
+            Enrollment.objects.filter(user=user, course_id__in=course_ids).values_list("course_id", "status")
+        )
+        new_course_ids = [cid for cid in course_ids if cid not in existing]
+
+        # bulk_create skips the pre_save signal that stamps access_expires_at
+        Enrollment.objects.bulk_create(
+            [
+                Enrollment(user=user, course_id=cid, status="active",
+                           access_expires_at=expiry.expires_at(ctype, end_date))
+                for cid, _, ctype, end_date in items
+            ],
+            ignore_conflicts=True,
+        )
+        # Rows that already existed keep their status; reactivate cancelled ones
+        Enrollment.objects.filter(user=user, course_id__in=course_ids, status="cancelled").update(status="active")
+
+        # bulk_create/update skip signals, so invalidate explicitly (runs on commit)
+        entitlements.invalidate_enrollments(user.pk, course_ids)
+        carts.bump_version(user.pk)
+        rollups.record_payment(paid_at, {cid: price for cid, price, _, _ in items}, new_course_ids)
+        reactivated = [cid for cid, status in existing.items() if status == "cancelled"]
+        counters.adjust_many("enrollment_count", {cid: 1 for cid in new_course_ids + reactivated})
+
+    return course_ids
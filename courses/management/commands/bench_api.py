@@ -0,0 +1,190 @@
+import json
+import math
+import time
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import URLPattern
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+from courses import api_urls as course_urls
+from courses.models import Course, Enrollment, Lesson, Order, CartItem
+from users import api_urls as user_urls
+
+
+class _Rollback(Exception):
+    pass
+
+
+def body_size(response):
+    if response.streaming:
+        return sum(len(chunk) for chunk in response.streaming_content)
+    return len(response.content)
+
+
+def percentile(values, p):
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(p / 100 * len(ordered)) - 1)]
+
+
+class Command(BaseCommand):
+    help = (
+        "Drive every API route through the test client and print p50/p95/p99 latency, "
+        "SQL query count and response bytes per route as JSON. "
+        "Writes are rolled back; run it against a seeded database (see seed_load)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=50)
+        parser.add_argument("--output", help="Write the JSON report to this file instead of stdout.")
+
+    def handle(self, *args, **options):
+        self.iterations = options["iterations"]
+        report = {}
+        try:
+            with override_settings(ALLOWED_HOSTS=["testserver"]), transaction.atomic():
+                self.setup_actors()
+                for module in (course_urls, user_urls):
+                    for pattern in module.urlpatterns:
+                        if isinstance(pattern, URLPattern):
+                            report[pattern.name] = self.bench(pattern)
+                raise _Rollback
+        except _Rollback:
+            pass
+
+        output = json.dumps(report, indent=2)
+        if options["output"]:
+            with open(options["output"], "w") as f:
+                f.write(output)
+        else:
+            self.stdout.write(output)
+
+    def setup_actors(self):
+        """
+        Pick a student with real data and an admin; everything here is rolled back.
+        """
+        User = get_user_model()
+        enrollment = Enrollment.objects.filter(status="active").select_related("user").order_by("-id").first()
+        if enrollment is None:
+            raise CommandError("No enrollments found; seed the database first (seed_load).")
+
+        self.student = enrollment.user
+        self.student.first_name = self.student.first_name or "Bench"
+        self.student.last_name = self.student.last_name or "User"
+        self.student.save(update_fields=["first_name", "last_name"])
+        self.admin = User.objects.create_superuser(mobile="bench-admin")
+
+        self.course_id = enrollment.course_id
+        self.lesson_id = Lesson.objects.filter(section__course_id=self.course_id).values_list("id", flat=True).first()
+        self.free_course_id = (
+            Course.objects.filter(is_active=True, course_type="offline")
+            .exclude(enrollments__user=self.student)
+            .values_list("id", flat=True).first()
+        )
+        self.deletable_course_id = Course.objects.filter(order_items__isnull=True).values_list("id", flat=True).first()
+        self.order_id = Order.objects.filter(user=self.student).values_list("id", flat=True).first()
+        self.pending_order_id = Order.objects.filter(user=self.student, status="pending").values_list("id", flat=True).first()
+        self.cart_item_id = CartItem.objects.filter(cart__user=self.student).values_list("id", flat=True).first()
+        self.search_term = (Course.objects.filter(id=self.course_id).values_list("title", flat=True).first() or "a").split()[0]
+
+        self.clients = {"anon": APIClient()}
+        for role, user in (("student", self.student), ("admin", self.admin)):
+            token, _ = Token.objects.get_or_create(user=user)
+            client = APIClient()
+            client.credentials(HTTP_AUTHORIZATION=f"Token {token.key}")
+            self.clients[role] = client
+
+    def spec(self, name):
+        """
+        (role, method, kwargs, data, query, mutates) for a route name, or None to skip.
+        """
+        c, student_course = self.free_course_id, self.course_id
+        specs = {
+            "course-list": ("anon", "get", {}, None, {}, False),
+            "course-search": ("anon", "get", {}, None, {"q": self.search_term}, False),
+            "course-detail": ("anon", "get", {"id": student_course}, None, {}, False),
+            "course-create": ("admin", "post", {}, {"title": "Bench", "price": 1000}, {}, True),
+            "course-update": ("admin", "patch", {"id": student_course}, {"price": 2000}, {}, True),
+            "course-delete": ("admin", "delete", {"id": self.deletable_course_id}, None, {}, True),
+            "catalog-export": ("admin", "get", {}, None, {"fmt": "jsonl"}, False),
+            "my-enrollments": ("student", "get", {}, None, {}, False),
+            "enrollment-create": ("student", "post", {}, {"course": c}, {}, True),
+            "course-sections": ("anon", "get", {"id": student_course}, None, {}, False),
+            "course-lessons": ("student", "get", {"id": student_course}, None, {}, False),
+            "lesson-detail": ("student", "get", {"pk": self.lesson_id}, None, {}, False),
+            "my-orders": ("student", "get", {}, None, {}, False),
+            "order-create": ("student", "post", {}, {"course_ids": [c]}, {}, True),
+            "order-detail": ("student", "get", {"pk": self.order_id}, None, {}, False),
+            "order-pay": ("student", "post", {"id": self.pending_order_id}, None, {}, True),
+            "finance-orders-export": ("admin", "get", {}, None, {"status": "paid"}, False),
+            "finance-enrollments-export": ("admin", "get", {}, None, {}, False),
+            "analytics-daily": ("admin", "get", {}, None, {}, False),
+            "cart-list": ("student", "get", {}, None, {}, False),
+            "cart-summary": ("student", "get", {}, None, {}, False),
+            "cart-add": ("student", "post", {}, {"course_id": c}, {}, True),
+            "cart-remove": ("student", "delete", {"pk": self.cart_item_id}, None, {}, True),
+            "cart-checkout": ("student", "post", {}, {}, {}, True),
+            "me": ("student", "get", {}, None, {}, False),
+            "async-course-list": ("anon", "get", {}, None, {}, False),
+            "async-course-detail": ("anon", "get", {"id": student_course}, None, {}, False),
+            "async-course-sections": ("anon", "get", {"id": student_course}, None, {}, False),
+            "async-course-lessons": ("student", "get", {"id": student_course}, None, {}, False),
+            "async-me": ("student", "get", {}, None, {}, False),
+            "otp-request": ("anon", "post", {}, {"mobile": "09129999999"}, {}, True),
+            "otp-verify": ("anon", "post", {}, {"mobile": "09129999999", "code": "000000"}, {}, True),
+        }
+        spec = specs.get(name)
+        if spec is None or any(v is None for v in spec[2].values()):
+            return None
+        return spec
+
+    def bench(self, pattern):
+        spec = self.spec(pattern.name)
+        if spec is None:
+            return {"skipped": "no spec or no sample data for this route"}
+
+        role, method, kwargs, data, query, mutates = spec
+        path = "/api/" + str(pattern.pattern)
+        for key, value in kwargs.items():
+            path = path.replace(f"<int:{key}>", str(value))
+        client = self.clients[role]
+
+        timings, queries, sizes, statuses = [], [], [], set()
+        for _ in range(self.iterations):
+            with CaptureQueriesContext(connection) as ctx:
+                start = time.perf_counter()
+                response = self.call(client, method, path, data, query, mutates)
+                size = body_size(response)  # streamed bodies are produced here
+                timings.append((time.perf_counter() - start) * 1000)
+            queries.append(len(ctx.captured_queries))
+            sizes.append(size)
+            statuses.add(response.status_code)
+
+        return {
+            "path": path,
+            "method": method.upper(),
+            "status": sorted(statuses),
+            "p50_ms": round(percentile(timings, 50), 3),
+            "p95_ms": round(percentile(timings, 95), 3),
+            "p99_ms": round(percentile(timings, 99), 3),
+            "queries": max(queries),
+            "bytes": max(sizes),
+        }
+
+    def call(self, client, method, path, data, query, mutates):
+        request = getattr(client, method)
+        if method == "get":
+            return request(path, query)
+        if not mutates:
+            return request(path, data, format="json")
+
+        # Each write is undone so every iteration sees the same state
+        try:
+            with transaction.atomic():
+                response = request(path, data, format="json")
+                if not response.streaming:
+                    response.content  # render before rolling back
+                raise _Rollback
+        except _Rollback:
+            return response
@@ -0,0 +1,131 @@
+import asyncio
+import time
+from collections import Counter
+from urllib.parse import urlsplit
+from django.core.management.base import BaseCommand, CommandError
+from courses.management.commands.bench_api import percentile
+
+
+class Stats:
+    def __init__(self):
+        self.latencies = []
+        self.statuses = Counter()
+        self.errors = 0
+
+
+async def read_response(reader):
+    """
+    Read one HTTP/1.1 response; returns (status, server wants to close).
+    """
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionError("connection closed")
+    status = int(status_line.split()[1])
+
+    length, chunked, close = 0, False, False
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        name, value = name.strip().lower(), value.strip().lower()
+        if name == "content-length":
+            length = int(value)
+        elif name == "transfer-encoding":
+            chunked = "chunked" in value
+        elif name == "connection":
+            close = value == "close"
+
+    if chunked:
+        while True:
+            size = int((await reader.readline()).split(b";")[0], 16)
+            await reader.readexactly(size + 2)
+            if size == 0:
+                break
+    elif length:
+        await reader.readexactly(length)
+    return status, close
+
+
+class Command(BaseCommand):
+    help = (
+        "Load-test the sync DRF views against their async twins on a running ASGI server, "
+        "e.g. `uvicorn kelaasor_final.asgi:application`, and print requests/second per "
+        "concurrency level. One keep-alive connection per simulated client. "
+        "Raise the open-files limit (ulimit -n) for high concurrency."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--url", default="http://127.0.0.1:8000")
+        parser.add_argument("--concurrency", type=int, nargs="+", default=[100, 250, 500, 1000])
+        parser.add_argument("--duration", type=float, default=10.0, help="Seconds per run.")
+        parser.add_argument("--course-id", type=int, required=True)
+        parser.add_argument("--token", help="Auth token for the lessons and me endpoints.")
+
+    def handle(self, *args, **options):
+        url = urlsplit(options["url"])
+        if url.scheme != "http":
+            raise CommandError("Only plain http:// is supported.")
+        self.host, self.port = url.hostname, url.port or 80
+        self.token = options["token"]
+
+        c = options["course_id"]
+        routes = [
+            ("course-list", "/api/courses/", "/api/async/courses/"),
+            ("course-detail", f"/api/courses/{c}/", f"/api/async/courses/{c}/"),
+            ("course-sections", f"/api/courses/{c}/sections/", f"/api/async/courses/{c}/sections/"),
+            ("course-lessons", f"/api/courses/{c}/lessons/", f"/api/async/courses/{c}/lessons/"),
+        ]
+        if self.token:
+            routes.append(("me", "/api/me/", "/api/async/me/"))
+
+        self.stdout.write(f"{'route':16} {'mode':6} {'conns':>6} {'req/s':>10} {'p50 ms':>9} {'p99 ms':>9} {'errors':>7}")
+        for name, sync_path, async_path in routes:
+            for concurrency in options["concurrency"]:
+                for mode, path in (("sync", sync_path), ("async", async_path)):
+                    stats = asyncio.run(self.run(path, concurrency, options["duration"]))
+                    self.report(name, mode, concurrency, options["duration"], stats)
+
+    def report(self, name, mode, concurrency, duration, stats):
+        done = len(stats.latencies)
+        p50 = percentile(stats.latencies, 50) * 1000 if done else 0
+        p99 = percentile(stats.latencies, 99) * 1000 if done else 0
+        non_2xx = sum(n for status, n in stats.statuses.items() if not 200 <= status < 400)
+        self.stdout.write(
+            f"{name:16} {mode:6} {concurrency:6} {done / duration:10,.0f} {p50:9.1f} {p99:9.1f} "
+            f"{stats.errors + non_2xx:7}"
+        )
+
+    async def run(self, path, concurrency, duration):
+        headers = [f"GET {path} HTTP/1.1", f"Host: {self.host}:{self.port}", "Accept: application/json"]
+        if self.token:
+            headers.append(f"Authorization: Token {self.token}")
+        request = ("\r\n".join(headers) + "\r\n\r\n").encode("latin-1")
+
+        stats = Stats()
+        deadline = time.perf_counter() + duration
+        await asyncio.gather(*(self.client(request, deadline, stats) for _ in range(concurrency)))
+        return stats
+
+    async def client(self, request, deadline, stats):
+        conn = None
+        while time.perf_counter() < deadline:
+            try:
+                if conn is None:
+                    conn = await asyncio.open_connection(self.host, self.port)
+                reader, writer = conn
+                start = time.perf_counter()
+                writer.write(request)
+                await writer.drain()
+                status, close = await read_response(reader)
+                stats.latencies.append(time.perf_counter() - start)
+                stats.statuses[status] += 1
+            except (OSError, ConnectionError, asyncio.IncompleteReadError, ValueError, IndexError):
+                stats.errors += 1
+                close = True
+                await asyncio.sleep(0.01)  # do not spin on a refused connection
+            if close and conn is not None:
+                conn[1].close()
+                conn = None
+        if conn is not None:
+            conn[1].close()
@@ -0,0 +1,43 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIRequestFactory, force_authenticate
+from courses.models import Course, Cart, CartItem
+from courses.views import CartCheckoutView
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = "Show that cart checkout runs a fixed number of queries whatever the cart size. Nothing is persisted."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", type=int, nargs="+", default=[1, 10, 50, 200])
+
+    def handle(self, *args, **options):
+        view = CartCheckoutView.as_view()
+        factory = APIRequestFactory()
+        User = get_user_model()
+
+        for size in options["sizes"]:
+            try:
+                with transaction.atomic():
+                    user = User.objects.create_user(mobile=f"bench-checkout-{size}", first_name="Bench", last_name="User")
+                    courses = Course.objects.bulk_create([
+                        Course(title=f"Bench course {i}", price=1000 + i) for i in range(size)
+                    ])
+                    cart = Cart.objects.create(user=user)
+                    CartItem.objects.bulk_create([CartItem(cart=cart, course=c) for c in courses])
+
+                    request = factory.post("/api/cart/checkout/", {}, format="json")
+                    force_authenticate(request, user=user)
+                    with CaptureQueriesContext(connection) as ctx:
+                        response = view(request)
+
+                    self.stdout.write(f"items={size:<5} status={response.status_code} queries={len(ctx.captured_queries)}")
+                    raise _Rollback
+            except _Rollback:
+                pass
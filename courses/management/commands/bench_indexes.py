@@ -0,0 +1,135 @@
+import json
+import statistics
+import time
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+from courses import counters, entitlements
+from courses.models import Course, Enrollment, Order, Lesson, Section
+
+# Hot-path queries, as the app builds them, and the indexes meant to serve them
+HOT_QUERIES = [
+    (
+        # Served by the (user, course) unique index, which is never dropped
+        "entitlement_lookup",
+        [],
+        lambda s: entitlements._query(s["user_id"], s["course_id"]),
+    ),
+    (
+        "course_enrollment_recount",
+        ["enroll_counted_course_idx"],
+        lambda s: Course.objects.filter(id=s["course_id"]).values(n=counters._fresh_counts()["enrollment_count"]),
+    ),
+    (
+        "expire_due_scan",
+        ["enroll_active_expiry_idx"],
+        lambda s: Enrollment.objects.filter(status="active", access_expires_at__lte=timezone.now())
+        .order_by("access_expires_at", "id").values_list("id", "user_id")[:1000],
+    ),
+    (
+        "catalog_active_recent",
+        ["course_active_created_idx"],
+        lambda s: Course.objects.filter(is_active=True).order_by("-created_at", "-id")[:20],
+    ),
+    (
+        "orders_of_user",
+        ["order_user_created_id_idx"],
+        lambda s: Order.objects.filter(user_id=s["user_id"]).order_by("-created_at", "-id")[:20],
+    ),
+    (
+        "lessons_free_preview",
+        ["lesson_section_preview_idx", "section_course_order_idx"],
+        lambda s: Lesson.objects.filter(section__course_id=s["course_id"], is_free_preview=True),
+    ),
+]
+
+
+class _Rollback(Exception):
+    pass
+
+
+def _model_indexes(names):
+    """
+    (model, Index) for each index name, read off the models' Meta.
+    """
+    for model in (Course, Enrollment, Order, Section, Lesson):
+        for index in model._meta.indexes:
+            if index.name in names:
+                yield model, index
+
+
+class Command(BaseCommand):
+    help = (
+        "Time the hot-path queries with and without their indexes and print the "
+        "plans as JSON. Where DDL is transactional (PostgreSQL, SQLite) indexes are "
+        "dropped inside a transaction that is rolled back; elsewhere (MySQL) they are "
+        "dropped for real and recreated afterwards, even if the run fails. "
+        "Run it against a seeded database (see seed_load)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--repeat", type=int, default=50)
+
+    def handle(self, *args, **options):
+        sample = Enrollment.objects.values("user_id", "course_id").order_by("-id").first()
+        if sample is None:
+            raise CommandError("No enrollments found; seed the database first.")
+
+        self.repeat = options["repeat"]
+        report = {name: {"indexes": indexes, "after": self.measure(build(sample))}
+                  for name, indexes, build in HOT_QUERIES}
+
+        # Render the DDL up front (collect_sql runs nothing), in each vendor's syntax
+        with connection.schema_editor(collect_sql=True) as editor:
+            ddl = [
+                (str(index.remove_sql(model, editor)), str(index.create_sql(model, editor)))
+                for model, index in _model_indexes({i for _, names, _ in HOT_QUERIES for i in names})
+            ]
+
+        if connection.features.can_rollback_ddl:
+            try:
+                with transaction.atomic():
+                    with connection.cursor() as cursor:
+                        for drop, _ in ddl:
+                            cursor.execute(drop)
+                    self.measure_before(report, sample)
+                    raise _Rollback
+            except _Rollback:
+                pass
+        else:
+            # DROP INDEX commits on its own here: put back whatever was dropped
+            self.stderr.write("DDL is not transactional: the indexes are missing while this runs.")
+            dropped = []
+            try:
+                with connection.cursor() as cursor:
+                    for drop, create in ddl:
+                        cursor.execute(drop)
+                        dropped.append(create)
+                self.measure_before(report, sample)
+            finally:
+                with connection.cursor() as cursor:
+                    for create in dropped:
+                        cursor.execute(create)
+
+        report["_dataset"] = {
+            "enrollments": Enrollment.objects.count(),
+            "courses": Course.objects.count(),
+            "orders": Order.objects.count(),
+            "lessons": Lesson.objects.count(),
+        }
+        self.stdout.write(json.dumps(report, indent=2, ensure_ascii=False))
+
+    def measure_before(self, report, sample):
+        for name, _, build in HOT_QUERIES:
+            report[name]["before"] = self.measure(build(sample))
+
+    def measure(self, queryset):
+        timings = []
+        for _ in range(self.repeat):
+            start = time.perf_counter()
+            list(queryset.all())  # .all() clones, so nothing is served from the result cache
+            timings.append((time.perf_counter() - start) * 1000)
+        return {
+            "median_ms": round(statistics.median(timings), 3),
+            "plan": queryset.explain(),
+        }
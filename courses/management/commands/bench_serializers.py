@@ -0,0 +1,56 @@
+import time
+from django.core.management.base import BaseCommand, CommandError
+from courses.fast_serializers import compile_serializer
+from courses.models import Course, Enrollment, Order, CartItem
+from courses.serializers import CourseSerializer, EnrollmentSerializer, OrderSerializer, CartItemSerializer
+
+# (serializer, queryset as the list view builds it)
+CASES = {
+    "courses": (CourseSerializer, lambda: Course.objects.filter(is_active=True).order_by("-created_at")),
+    "enrollments": (EnrollmentSerializer, lambda: Enrollment.objects.select_related("course").order_by("-id")),
+    "orders": (OrderSerializer, lambda: Order.objects.prefetch_related("items", "items__course").order_by("-id")),
+    "cart": (CartItemSerializer, lambda: CartItem.objects.select_related("course").order_by("-id")),
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare rows/second of ModelSerializer vs the compiled .values() path "
+        "(fetch + serialize, no HTTP). Run it against a seeded database (see seed_load)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=1000, help="Rows per page.")
+        parser.add_argument("--repeat", type=int, default=5)
+
+    def handle(self, *args, **options):
+        rows, repeat = options["rows"], options["repeat"]
+        for name, (serializer_class, queryset) in CASES.items():
+            compiled = compile_serializer(serializer_class)
+            if compiled is None:
+                raise CommandError(f"{serializer_class.__name__} cannot be compiled.")
+
+            def slow():
+                return serializer_class(list(queryset()[:rows]), many=True).data
+
+            def fast():
+                return compiled.render(queryset().prefetch_related(None).values(*compiled.columns)[:rows])
+
+            count = len(fast())
+            if not count:
+                self.stdout.write(f"{name:12} no rows, skipped")
+                continue
+            slow_rate = count / self.best(slow, repeat)
+            fast_rate = count / self.best(fast, repeat)
+            self.stdout.write(
+                f"{name:12} {count:6} rows  serializer {slow_rate:10,.0f} rows/s  "
+                f"fast {fast_rate:10,.0f} rows/s  x{fast_rate / slow_rate:.1f}"
+            )
+
+    def best(self, fn, repeat):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            fn()
+            timings.append(time.perf_counter() - start)
+        return min(timings)
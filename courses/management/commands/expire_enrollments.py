@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from courses.expiry import expire_due
+
+
+class Command(BaseCommand):
+    help = (
+        "Flip active enrollments whose access_expires_at has passed to 'expired'. "
+        "Run it periodically (e.g. hourly from cron); access checks do not depend on it."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        count = expire_due(chunk_size=options["chunk_size"])
+        self.stdout.write(self.style.SUCCESS(f"Expired {count} enrollments."))
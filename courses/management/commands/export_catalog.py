@@ -0,0 +1,24 @@
+import sys
+from django.core.management.base import BaseCommand
+from courses import catalog_io
+
+
+class Command(BaseCommand):
+    help = "Stream every course, section and lesson to JSONL or CSV (see courses/catalog_io.py)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--format", choices=catalog_io.FORMATS, default="jsonl")
+        parser.add_argument("--output", help="Write to this file instead of stdout.")
+        parser.add_argument("--chunk-size", type=int, default=2000)
+
+    def handle(self, *args, **options):
+        catalog_io.stamp_external_ids()
+        chunks = catalog_io.write(catalog_io.export_records(options["chunk_size"]), options["format"])
+
+        out = open(options["output"], "w", encoding="utf-8", newline="") if options["output"] else sys.stdout
+        try:
+            for chunk in chunks:
+                out.write(chunk)
+        finally:
+            if out is not sys.stdout:
+                out.close()
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DataError, IntegrityError
+from courses import catalog_io
+
+
+class Command(BaseCommand):
+    help = (
+        "Upsert courses, sections and lessons from a JSONL or CSV file keyed by external_id. "
+        "The import runs in one transaction: a bad record leaves the catalog untouched."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path")
+        parser.add_argument("--format", choices=catalog_io.FORMATS, help="Defaults to the file extension.")
+        parser.add_argument("--chunk-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        fmt = options["format"] or ("csv" if path.lower().endswith(".csv") else "jsonl")
+        try:
+            with open(path, encoding="utf-8-sig", newline="") as f:
+                stats = catalog_io.import_records(catalog_io.read(f, fmt), chunk_size=options["chunk_size"])
+        except (OSError, catalog_io.CatalogImportError, IntegrityError, DataError) as e:
+            raise CommandError(str(e))
+
+        summary = ", ".join(f"{count} {name.replace('_', ' ')}" for name, count in stats.items())
+        self.stdout.write(self.style.SUCCESS(f"Imported catalog: {summary}."))
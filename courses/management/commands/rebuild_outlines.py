@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from courses import outlines
+
+
+class Command(BaseCommand):
+    help = "Rebuild the stored section → lesson outline of every course."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        total = outlines.rebuild_all(chunk_size=options["chunk_size"])
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {total} course outlines."))
@@ -0,0 +1,19 @@
+from datetime import date
+from django.core.management.base import BaseCommand
+from courses import rollups
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the daily course rollups (revenue, paid orders, new enrollments) "
+        "from orders and enrollments. Without dates every day is rebuilt."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--from", dest="date_from", type=date.fromisoformat, help="YYYY-MM-DD, inclusive.")
+        parser.add_argument("--to", dest="date_to", type=date.fromisoformat, help="YYYY-MM-DD, inclusive.")
+        parser.add_argument("--chunk-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        count = rollups.rebuild(options["date_from"], options["date_to"], chunk_size=options["chunk_size"])
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {count} daily rollup rows."))
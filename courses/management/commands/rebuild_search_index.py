@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+from courses import search
+
+
+class Command(BaseCommand):
+    help = "Rebuild the course search index from scratch."
+
+    def handle(self, *args, **options):
+        backend = search.get_backend()
+        backend.rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt search index ({type(backend).__name__})."))
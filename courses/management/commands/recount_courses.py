@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+from courses import counters
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the denormalized counters on Course (enrollments, sections, lessons, "
+        "free previews) from the source tables."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=1000)
+        parser.add_argument(
+            "--only-drifted", action="store_true",
+            help="Find courses whose counters are off first and recount just those.",
+        )
+
+    def handle(self, *args, **options):
+        course_ids = None
+        if options["only_drifted"]:
+            course_ids = list(counters.drifted().values_list("id", flat=True))
+            self.stdout.write(f"{len(course_ids)} courses have drifted counters.")
+        count = counters.recount(course_ids, chunk_size=options["chunk_size"])
+        self.stdout.write(self.style.SUCCESS(f"Recounted {count} courses."))
@@ -0,0 +1,194 @@
+import random
+from datetime import timedelta
+from itertools import accumulate
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db.models import Max
+from django.utils import timezone
+from courses import catalog_io, counters, expiry, outlines, rollups, search
+from courses.models import Course, Section, Lesson, Enrollment, Order, OrderItem, Cart, CartItem
+
+WORDS = [
+    "Python", "Django", "Data", "Design", "Marketing", "English", "Math", "Physics",
+    "Excel", "React", "SQL", "Photography", "Music", "Finance", "برنامه‌نویسی", "طراحی",
+    "زبان", "ریاضی", "مدیریت", "Advanced", "Intro", "Practical", "Mastering", "Bootcamp",
+]
+INSTRUCTORS = ["Sara Ahmadi", "Reza Karimi", "Mina Rahimi", "Ali Moradi", "Neda Hosseini", "John Smith"]
+
+
+class Command(BaseCommand):
+    help = "Bulk-generate a production-shaped dataset (users, catalog, enrollments, carts, orders)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=10000)
+        parser.add_argument("--courses", type=int, default=1000)
+        parser.add_argument("--sections", type=int, default=6, help="Average sections per course.")
+        parser.add_argument("--lessons", type=int, default=5, help="Average lessons per section.")
+        parser.add_argument("--enrollments", type=int, default=100000)
+        parser.add_argument("--carts", type=int, default=2000)
+        parser.add_argument("--orders", type=int, default=20000)
+        parser.add_argument("--chunk-size", type=int, default=5000)
+        parser.add_argument("--seed", type=int, default=1)
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options["seed"])
+        self.chunk = options["chunk_size"]
+        self.now = timezone.now()
+
+        user_ids = self.seed_users(options["users"])
+        course_ids, prices, expiries = self.seed_courses(options["courses"])
+        self.seed_content(course_ids, options["sections"], options["lessons"])
+
+        # Popularity is heavy-tailed: a few courses take most of the enrollments
+        cum_weights = list(accumulate(1 / (rank + 1) ** 1.1 for rank in range(len(course_ids))))
+
+        def popular(k):
+            return self.rng.choices(course_ids, cum_weights=cum_weights, k=k)
+
+        self.seed_enrollments(user_ids, popular, expiries, options["enrollments"])
+        self.seed_carts(user_ids, popular, options["carts"])
+        self.seed_orders(user_ids, popular, prices, options["orders"])
+
+        # bulk_create skips signals, so derived data is rebuilt in bulk here
+        expiry.expire_due()
+        counters.recount()
+        catalog_io.stamp_external_ids()
+        rollups.rebuild()
+        outlines.rebuild_all()
+        search.rebuild()
+        self.stdout.write(self.style.SUCCESS("Seeding done."))
+
+    def bulk(self, model, objs, **kwargs):
+        """
+        bulk_create in chunks; returns the created primary keys
+        (None entries with ignore_conflicts, which cannot report them).
+        """
+        ids, batch = [], []
+        for obj in objs:
+            batch.append(obj)
+            if len(batch) >= self.chunk:
+                ids.extend(o.pk for o in model.objects.bulk_create(batch, **kwargs))
+                batch = []
+        if batch:
+            ids.extend(o.pk for o in model.objects.bulk_create(batch, **kwargs))
+        self.stdout.write(f"  {model.__name__}: {len(ids)}")
+        return ids
+
+    def ago(self, days):
+        # A random instant within the last `days` days
+        return self.now - timedelta(minutes=self.rng.randint(0, days * 24 * 60))
+
+    def seed_users(self, n):
+        User = get_user_model()
+        base = User.objects.count()
+        password = make_password(None)
+        return self.bulk(User, (
+            User(
+                mobile=f"09{base + i:09d}",
+                first_name=self.rng.choice(["Ali", "Sara", "Reza", "Mina", "Neda", ""]),
+                last_name=self.rng.choice(["Ahmadi", "Karimi", "Moradi", ""]),
+                password=password,
+            )
+            for i in range(n)
+        ))
+
+    def seed_courses(self, n):
+        courses = []
+        for i in range(n):
+            online = self.rng.random() < 0.3
+            start = (self.now + timedelta(days=self.rng.randint(-120, 120))).date()
+            courses.append(Course(
+                title=f"{self.rng.choice(WORDS)} {self.rng.choice(WORDS)} {i}",
+                course_type="online" if online else "offline",
+                # Log-normal prices, rounded to 10,000
+                price=int(self.rng.lognormvariate(14, 0.8) // 10000 * 10000),
+                start_date=start if online or self.rng.random() < 0.5 else None,
+                end_date=None if online else start + timedelta(days=self.rng.randint(30, 365)),
+                instructor_name=self.rng.choice(INSTRUCTORS),
+                is_active=self.rng.random() < 0.9,
+            ))
+        ids = self.bulk(Course, courses)
+
+        # auto_now_add stamps every row with now; spread them over two years
+        for course in courses:
+            course.created_at = self.ago(2 * 365)
+        Course.objects.bulk_update(courses, ["created_at"], batch_size=self.chunk)
+        expiries = {c.pk: expiry.expires_at(c.course_type, c.end_date) for c in courses}
+        return ids, {c.pk: c.price for c in courses}, expiries
+
+    def seed_content(self, course_ids, sections, lessons):
+        section_objs = [
+            Section(course_id=cid, title=f"Section {s + 1}", order=s + 1)
+            for cid in course_ids
+            for s in range(max(1, int(self.rng.expovariate(1 / sections))))
+        ]
+        section_ids = self.bulk(Section, section_objs)
+        self.bulk(Lesson, (
+            Lesson(
+                section_id=sid,
+                title=f"{self.rng.choice(WORDS)} lesson {l + 1}",
+                order=l + 1,
+                content_url=f"https://cdn.example.com/v/{sid}/{l + 1}",
+                is_free_preview=l == 0 and self.rng.random() < 0.5,
+            )
+            for sid in section_ids
+            for l in range(max(1, int(self.rng.expovariate(1 / lessons))))
+        ))
+
+    def seed_enrollments(self, user_ids, popular, expiries, n):
+        courses = popular(n)
+        last_id = Enrollment.objects.aggregate(last=Max("id"))["last"] or 0
+        self.bulk(Enrollment, (
+            Enrollment(
+                user_id=self.rng.choice(user_ids),
+                course_id=cid,
+                status="cancelled" if self.rng.random() < 0.05 else "active",
+                access_expires_at=expiries[cid],
+            )
+            for cid in courses
+        ), ignore_conflicts=True)
+
+        # ignore_conflicts returns no pks: backdate the new rows by id, over a year
+        ids = list(Enrollment.objects.filter(id__gt=last_id).order_by("id").values_list("id", flat=True))
+        for i in range(0, len(ids), self.chunk):
+            Enrollment.objects.bulk_update(
+                [Enrollment(id=pk, created_at=self.ago(365)) for pk in ids[i:i + self.chunk]], ["created_at"],
+            )
+
+    def seed_carts(self, user_ids, popular, n):
+        owners = self.rng.sample(user_ids, min(n, len(user_ids)))
+        self.bulk(Cart, (Cart(user_id=uid) for uid in owners), ignore_conflicts=True)
+        cart_ids = list(Cart.objects.filter(user_id__in=owners).values_list("id", flat=True))
+        self.bulk(CartItem, (
+            CartItem(cart_id=cart_id, course_id=cid)
+            for cart_id in cart_ids
+            for cid in popular(self.rng.randint(1, 4))
+        ), ignore_conflicts=True)
+
+    def seed_orders(self, user_ids, popular, prices, n):
+        baskets = [list(dict.fromkeys(popular(self.rng.choice([1, 1, 1, 2, 3])))) for _ in range(n)]
+        statuses = [self.rng.choices(["paid", "pending", "cancelled"], [80, 15, 5])[0] for _ in range(n)]
+        orders = [
+            Order(
+                user_id=self.rng.choice(user_ids),
+                status=status,
+                total_price=sum(prices[c] for c in basket),
+                paid_at=self.ago(365) if status == "paid" else None,
+            )
+            for basket, status in zip(baskets, statuses)
+        ]
+        order_ids = self.bulk(Order, orders)
+
+        # Created over the past year too; paid orders up to two days before payment
+        for order in orders:
+            if order.paid_at:
+                order.created_at = order.paid_at - timedelta(minutes=self.rng.randint(0, 2 * 24 * 60))
+            else:
+                order.created_at = self.ago(365)
+        Order.objects.bulk_update(orders, ["created_at"], batch_size=self.chunk)
+        self.bulk(OrderItem, (
+            OrderItem(order_id=oid, course_id=cid, price_snapshot=prices[cid])
+            for oid, basket in zip(order_ids, baskets)
+            for cid in basket
+        ))
@@ -0,0 +1,28 @@
+import sqlite3
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from kelaasor_final.db_router import REPLICA_DB_ALIAS
+
+
+class Command(BaseCommand):
+    help = (
+        "Copy the primary SQLite database into the replica file (local stand-in for "
+        "replication). Run it after migrate and whenever the replica should catch up."
+    )
+
+    def handle(self, *args, **options):
+        if REPLICA_DB_ALIAS not in connections.settings:
+            raise CommandError("No replica configured; set DB_REPLICA_NAME.")
+        primary, replica = connections["default"].settings_dict, connections[REPLICA_DB_ALIAS].settings_dict
+        if not (primary["ENGINE"] == replica["ENGINE"] == "django.db.backends.sqlite3"):
+            raise CommandError("sync_replica only handles SQLite; use the server's replication otherwise.")
+
+        connections[REPLICA_DB_ALIAS].close()
+        source = sqlite3.connect(primary["NAME"])
+        target = sqlite3.connect(replica["NAME"])
+        try:
+            source.backup(target)  # consistent snapshot, even while the primary is in use
+        finally:
+            target.close()
+            source.close()
+        self.stdout.write(self.style.SUCCESS(f"Copied {primary['NAME']} -> {replica['NAME']}"))
@@ -0,0 +1,80 @@
+# Generated by Django 5.2.7 on 2026-10-18 11:00
+
+import re
+
+from django.db import migrations
+from django.db.utils import OperationalError
+
+FTS_TABLE = "courses_search"
+
+# Frozen copy of courses.search.normalize as of this migration, so later
+# changes to the live function do not change what this migration writes.
+_TRANSLATE = str.maketrans({
+    "\u064a": "\u06cc", "\u0649": "\u06cc",
+    "\u0643": "\u06a9",
+    "\u0629": "\u0647", "\u06c0": "\u0647",
+    "\u0623": "\u0627", "\u0625": "\u0627", "\u0622": "\u0627",
+    "\u0624": "\u0648",
+    "\u200c": " ", "\u200f": " ",
+    "\u0640": None,
+    **{ord(d): str(i) for i, d in enumerate("\u06f0\u06f1\u06f2\u06f3\u06f4\u06f5\u06f6\u06f7\u06f8\u06f9")},
+    **{ord(d): str(i) for i, d in enumerate("\u0660\u0661\u0662\u0663\u0664\u0665\u0666\u0667\u0668\u0669")},
+})
+_DIACRITICS = re.compile("[\u064b-\u065f\u0670]")
+
+
+def normalize(text):
+    return _DIACRITICS.sub("", (text or "").translate(_TRANSLATE)).lower()
+
+
+def create_fts_table(apps, schema_editor):
+    # Only SQLite gets the FTS5 table; elsewhere courses.search uses its Python index
+    connection = schema_editor.connection
+    if connection.vendor != "sqlite":
+        return
+    try:
+        schema_editor.execute(
+            f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5("
+            "title, instructor, sections, lessons, "
+            "tokenize = 'unicode61 remove_diacritics 2')"
+        )
+    except OperationalError:
+        # SQLite built without FTS5
+        return
+
+    Course = apps.get_model("courses", "Course")
+    Section = apps.get_model("courses", "Section")
+    Lesson = apps.get_model("courses", "Lesson")
+
+    sections, lessons = {}, {}
+    for cid, title in Section.objects.values_list("course_id", "title").iterator():
+        sections.setdefault(cid, []).append(title)
+    for cid, title in Lesson.objects.values_list("section__course_id", "title").iterator():
+        lessons.setdefault(cid, []).append(title)
+
+    rows = [
+        (cid, normalize(title), normalize(instructor),
+         normalize(" ".join(sections.get(cid, ()))), normalize(" ".join(lessons.get(cid, ()))))
+        for cid, title, instructor in Course.objects.values_list("id", "title", "instructor_name").iterator()
+    ]
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f"INSERT INTO {FTS_TABLE} (rowid, title, instructor, sections, lessons) VALUES (%s, %s, %s, %s, %s)",
+            rows,
+        )
+
+
+def drop_fts_table(apps, schema_editor):
+    if schema_editor.connection.vendor == "sqlite":
+        schema_editor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0007_courseoutline'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_fts_table, drop_fts_table),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.2.7 on 2026-10-18 14:05
+
+from datetime import datetime, time, timedelta
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def backfill(apps, schema_editor):
+    # Only offline courses with an end_date ever expire; everything else stays NULL
+    Course = apps.get_model('courses', 'Course')
+    Enrollment = apps.get_model('courses', 'Enrollment')
+    db = schema_editor.connection.alias
+    now = timezone.now()
+    courses = Course.objects.using(db).filter(course_type='offline', end_date__isnull=False)
+    for course_id, end_date in courses.values_list('id', 'end_date').iterator():
+        expires = timezone.make_aware(datetime.combine(end_date + timedelta(days=1), time.min))
+        enrollments = Enrollment.objects.using(db).filter(course_id=course_id)
+        enrollments.update(access_expires_at=expires)
+        if expires <= now:
+            enrollments.filter(status='active').update(status='expired')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0009_hot_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='enrollment',
+            name='access_expires_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='enrollment',
+            name='status',
+            field=models.CharField(choices=[('active', 'Active'), ('cancelled', 'Cancelled'), ('expired', 'Expired')], default='active', max_length=10),
+        ),
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='enrollment',
+            index=models.Index(condition=models.Q(('status', 'active')), fields=['access_expires_at', 'id'], name='enroll_active_expiry_idx'),
+        ),
+    ]
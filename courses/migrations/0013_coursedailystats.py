@@ -0,0 +1,29 @@
+# Generated by Django 5.2.7 on 2026-10-18 16:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0012_finance_export_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CourseDailyStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('revenue', models.PositiveBigIntegerField(default=0)),
+                ('paid_orders', models.PositiveIntegerField(default=0)),
+                ('new_enrollments', models.PositiveIntegerField(default=0)),
+                ('course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_stats', to='courses.course')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['day'], name='daily_stats_day_idx')],
+                'unique_together': {('course', 'day')},
+            },
+        ),
+    ]
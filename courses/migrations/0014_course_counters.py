@@ -0,0 +1,66 @@
+# Generated by Django 5.2.7 on 2026-10-18 17:25
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill(apps, schema_editor):
+    Course = apps.get_model('courses', 'Course')
+    Enrollment = apps.get_model('courses', 'Enrollment')
+    Section = apps.get_model('courses', 'Section')
+    Lesson = apps.get_model('courses', 'Lesson')
+    db = schema_editor.connection.alias
+
+    def count(queryset, course_field):
+        rows = (
+            queryset.using(db).filter(**{course_field: OuterRef('pk')})
+            .order_by().values(course_field).annotate(n=Count('pk')).values('n')
+        )
+        return Coalesce(Subquery(rows), Value(0), output_field=IntegerField())
+
+    Course.objects.using(db).update(
+        enrollment_count=count(Enrollment.objects.exclude(status='cancelled'), 'course'),
+        section_count=count(Section.objects.all(), 'course'),
+        lesson_count=count(Lesson.objects.all(), 'section__course'),
+        free_preview_count=count(Lesson.objects.filter(is_free_preview=True), 'section__course'),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0013_coursedailystats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='course',
+            name='enrollment_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='course',
+            name='free_preview_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='course',
+            name='lesson_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='course',
+            name='section_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='course',
+            index=models.Index(fields=['enrollment_count', 'created_at', 'id'], name='course_enroll_created_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='course',
+            index=models.Index(fields=['lesson_count', 'created_at', 'id'], name='course_lessons_created_id_idx'),
+        ),
+    ]
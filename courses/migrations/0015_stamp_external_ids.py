@@ -0,0 +1,26 @@
+# Generated by Django 5.2.7 on 2026-10-18 19:10
+
+from django.db import migrations
+from django.db.models import CharField, Value
+from django.db.models.functions import Cast, Concat
+
+
+def stamp(apps, schema_editor):
+    # Same "<kind>:<id>" keys catalog_io.stamp_external_ids() and the save signals use
+    db = schema_editor.connection.alias
+    for kind in ('course', 'section', 'lesson'):
+        model = apps.get_model('courses', kind)
+        model.objects.using(db).filter(external_id__isnull=True).update(
+            external_id=Concat(Value(f'{kind}:'), Cast('id', CharField()), output_field=CharField())
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0014_course_counters'),
+    ]
+
+    operations = [
+        migrations.RunPython(stamp, migrations.RunPython.noop),
+    ]
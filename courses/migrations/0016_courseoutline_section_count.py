@@ -0,0 +1,35 @@
+# Generated by Django 5.2.7 on 2026-10-18 08:42
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def count_sections(apps, schema_editor):
+    # Stored outlines predate the field; their section count is the course's
+    db = schema_editor.connection.alias
+    Section = apps.get_model('courses', 'Section')
+    CourseOutline = apps.get_model('courses', 'CourseOutline')
+    counts = (
+        Section.objects.using(db).filter(course_id=OuterRef('course_id'))
+        .order_by().values('course_id').annotate(n=Count('id')).values('n')
+    )
+    CourseOutline.objects.using(db).update(
+        section_count=Coalesce(Subquery(counts), Value(0), output_field=IntegerField())
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0015_stamp_external_ids'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='courseoutline',
+            name='section_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(count_sections, migrations.RunPython.noop),
+    ]
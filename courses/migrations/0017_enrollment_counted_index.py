@@ -0,0 +1,27 @@
+# Generated by Django 5.2.7 on 2026-10-18 08:57
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0016_courseoutline_section_count'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='enrollment',
+            name='enroll_active_user_course_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='enrollment',
+            name='enroll_active_course_idx',
+        ),
+        migrations.AddIndex(
+            model_name='enrollment',
+            index=models.Index(condition=models.Q(('status', 'cancelled'), _negated=True), fields=['course', 'status'], name='enroll_counted_course_idx'),
+        ),
+    ]
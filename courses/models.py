@@ -16,6 +16,28 @@ class Course(models.Model):
     instructor_name = models.CharField(max_length=120, blank=True)  
     is_active = models.BooleanField(default=True)        
     created_at = models.DateTimeField(auto_now_add=True) 
+    # Stable key for catalog import/export (courses/catalog_io.py)
+    external_id = models.CharField(max_length=64, unique=True, null=True, blank=True)
+    # Denormalized counters, kept up to date by courses/counters.py
+    enrollment_count = models.PositiveIntegerField(default=0)
+    section_count = models.PositiveIntegerField(default=0)
+    lesson_count = models.PositiveIntegerField(default=0)
+    free_preview_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        # Keyset pagination: one index per ordering option, (field, created_at, id)
+        indexes = [
+            models.Index(fields=["created_at", "id"], name="course_created_id_idx"),
+            models.Index(fields=["price", "created_at", "id"], name="course_price_created_id_idx"),
+            models.Index(fields=["title", "created_at", "id"], name="course_title_created_id_idx"),
+            models.Index(fields=["enrollment_count", "created_at", "id"], name="course_enroll_created_id_idx"),
+            models.Index(fields=["lesson_count", "created_at", "id"], name="course_lessons_created_id_idx"),
+            # Public catalog: is_active=True ordered by -created_at
+            models.Index(
+                fields=["-created_at", "-id"], condition=models.Q(is_active=True),
+                name="course_active_created_idx",
+            ),
+        ]
 
     def __str__(self):
         return self.title
@@ -26,16 +48,38 @@ class Enrollment(models.Model):
     STATUS_CHOICES = [
         ("active", "Active"),
         ("cancelled", "Cancelled"),
+        ("expired", "Expired"),
     ]
+    # Rows that count as "already enrolled": an expired enrollment cannot be bought again
+    ENROLLED_STATUSES = ("active", "expired")
 
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="enrollments")
     course = models.ForeignKey("courses.Course", on_delete=models.CASCADE, related_name="enrollments")
     status = models.CharField(max_length=10, choices=STATUS_CHOICES, default="active")
+    # Denormalized from the course (see courses/expiry.py); null = never expires
+    access_expires_at = models.DateTimeField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
         unique_together = ("user", "course")  
         ordering = ("-created_at",)
+        indexes = [
+            models.Index(fields=["user", "created_at", "id"], name="enroll_user_created_id_idx"),
+            models.Index(fields=["created_at", "id"], name="enroll_created_id_idx"),  # finance export
+            # counters.recount: per-course COUNT of the rows that are not cancelled.
+            # status is in the key so the count never reads the table (SQLite can't
+            # prove the condition for a bound parameter). (user, course) lookups
+            # need nothing beyond the unique index.
+            models.Index(
+                fields=["course", "status"], condition=~models.Q(status="cancelled"),
+                name="enroll_counted_course_idx",
+            ),
+            # expire_enrollments: active rows whose access_expires_at has passed
+            models.Index(
+                fields=["access_expires_at", "id"], condition=models.Q(status="active"),
+                name="enroll_active_expiry_idx",
+            ),
+        ]
 
     def __str__(self):
         return f"{self.user} -> {self.course} ({self.status})"
@@ -48,9 +92,13 @@ class Section(models.Model):
     course = models.ForeignKey("courses.Course", on_delete=models.CASCADE, related_name="sections")
     title = models.CharField(max_length=150)
     order = models.PositiveIntegerField(default=1)  
+    external_id = models.CharField(max_length=64, unique=True, null=True, blank=True)
 
     class Meta:
         ordering = ("order", "id")
+        indexes = [
+            models.Index(fields=["course", "order", "id"], name="section_course_order_idx"),
+        ]
 
     def __str__(self):
         return f"{self.course.title} :: {self.title}"
@@ -63,9 +111,13 @@ class Lesson(models.Model):
     order = models.PositiveIntegerField(default=1)
     content_url = models.URLField(blank=True)  
     is_free_preview = models.BooleanField(default=False)
+    external_id = models.CharField(max_length=64, unique=True, null=True, blank=True)
 
     class Meta:
         ordering = ("order", "id")
+        indexes = [
+            models.Index(fields=["section", "is_free_preview"], name="lesson_section_preview_idx"),
+        ]
 
     def __str__(self):
         return f"{self.section.title} :: {self.title}"
@@ -87,6 +139,12 @@ class Order(models.Model):
 
     class Meta:
         ordering = ("-created_at",)
+        indexes = [
+            models.Index(fields=["user", "created_at", "id"], name="order_user_created_id_idx"),
+            # Finance exports: date-range scans in date order
+            models.Index(fields=["created_at", "id"], name="order_created_id_idx"),
+            models.Index(fields=["paid_at", "id"], name="order_paid_id_idx"),
+        ]
 
     def __str__(self):
         return f"Order #{self.pk} by {self.user} ({self.status})"
@@ -128,3 +186,37 @@ class CartItem(models.Model):
     def __str__(self):
         return f"{self.cart.user.mobile} -> {self.course.title}"
 
+############################################
+
+class CourseOutline(models.Model):
+    """
+    Pre-rendered section → lesson tree of a course, kept in sync by signals.
+    """
+    course = models.OneToOneField(Course, on_delete=models.CASCADE, primary_key=True, related_name="outline")
+    body = models.TextField(default="[]")  # JSON, the "results" of CourseSectionsView
+    section_count = models.PositiveIntegerField(default=0)  # its "count"
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Outline of course #{self.course_id}"
+
+############################################
+
+class CourseDailyStats(models.Model):
+    """
+    Daily rollup per course, maintained incrementally (see courses/rollups.py).
+    """
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name="daily_stats")
+    day = models.DateField()
+    revenue = models.PositiveBigIntegerField(default=0)  # sum of price_snapshot of paid items
+    paid_orders = models.PositiveIntegerField(default=0)
+    new_enrollments = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ("course", "day")
+        indexes = [
+            models.Index(fields=["day"], name="daily_stats_day_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.course_id} @ {self.day}"
@@ -0,0 +1,123 @@
+from asgiref.sync import sync_to_async
+from django.db.models import Prefetch
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from .models import Course, CourseOutline, Section
+from .deferred import OnCommitBatch
+from .serializers import SectionSerializer
+
+EMPTY_OUTLINE = "[]"
+
+
+def envelope(body, count):
+    """
+    The stored blob inside the page envelope CourseSectionsView has always
+    returned; the whole outline fits on one page.
+    """
+    return f'{{"count":{count},"next":null,"previous":null,"results":{body}}}'
+
+
+def _sections_prefetch():
+    return Prefetch("sections", queryset=Section.objects.prefetch_related("lessons"))
+
+
+def render_outline(sections):
+    return JSONRenderer().render(SectionSerializer(sections, many=True).data).decode("utf-8")
+
+
+def rebuild(course_id):
+    """
+    Re-render and store the outline of one course.
+    Returns (body, section count), or None if the course no longer exists.
+    """
+    course = Course.objects.filter(id=course_id).prefetch_related(_sections_prefetch()).first()
+    if course is None:
+        return None
+
+    sections = course.sections.all()
+    body = render_outline(sections)
+    CourseOutline.objects.update_or_create(
+        course_id=course_id, defaults={"body": body, "section_count": len(sections)}
+    )
+    return body, len(sections)
+
+
+def schedule_rebuild(course_id):
+    # After commit, so cascades and admin inlines are fully applied first;
+    # every course touched in the transaction is rebuilt once, in one batch
+    _rebuilds.add(course_id)
+
+
+def get_body(course_id):
+    """
+    Response body of CourseSectionsView: one primary-key read of the stored
+    outline, rebuilt lazily on a miss.
+    """
+    stored = CourseOutline.objects.filter(course_id=course_id).values_list("body", "section_count").first()
+    if stored is None:
+        stored = rebuild(course_id)
+    return envelope(*(stored or (EMPTY_OUTLINE, 0)))
+
+
+async def aget_body(course_id):
+    """
+    get_body() for async views; the rare rebuild on a miss runs in a worker thread.
+    """
+    stored = await CourseOutline.objects.filter(course_id=course_id).values_list("body", "section_count").afirst()
+    if stored is None:
+        stored = await sync_to_async(rebuild)(course_id)
+    return envelope(*(stored or (EMPTY_OUTLINE, 0)))
+
+
+def _store(courses):
+    """
+    Render and bulk-upsert the outlines of already prefetched courses.
+    """
+    now = timezone.now()
+    outlines = [
+        CourseOutline(
+            course_id=c.id, body=render_outline(c.sections.all()),
+            section_count=len(c.sections.all()), updated_at=now,
+        )
+        for c in courses
+    ]
+    CourseOutline.objects.bulk_create(
+        outlines,
+        update_conflicts=True,
+        unique_fields=["course"],
+        update_fields=["body", "section_count", "updated_at"],
+    )
+    return len(outlines)
+
+
+def rebuild_all(chunk_size=500):
+    """
+    Re-render every outline in chunks with a bulk upsert. Returns the number rebuilt.
+    """
+    total = 0
+    last_id = 0
+    while True:
+        courses = list(
+            Course.objects.filter(id__gt=last_id).order_by("id")
+            .prefetch_related(_sections_prefetch())[:chunk_size]
+        )
+        if not courses:
+            return total
+
+        total += _store(courses)
+        last_id = courses[-1].id
+
+
+def rebuild_many(course_ids, chunk_size=500):
+    """
+    rebuild_all() restricted to the given courses (e.g. after a bulk import).
+    """
+    course_ids = sorted(course_ids)
+    total = 0
+    for i in range(0, len(course_ids), chunk_size):
+        courses = Course.objects.filter(id__in=course_ids[i:i + chunk_size]).prefetch_related(_sections_prefetch())
+        total += _store(list(courses))
+    return total
+
+
+_rebuilds = OnCommitBatch(rebuild_many)
@@ -0,0 +1,161 @@
+import base64
+import json
+from datetime import date, datetime, time
+from decimal import Decimal
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination
+from rest_framework.utils.urls import replace_query_param, remove_query_param
+
+# Every ordering is made total by these tie-breakers, so a cursor always
+# points at exactly one row and the page can be fetched with a range seek.
+TIE_BREAKERS = ("created_at", "id")
+
+
+def _flip(field):
+    return field[1:] if field.startswith("-") else f"-{field}"
+
+
+def _attr(obj, path):
+    if isinstance(obj, dict):
+        return obj[path]  # .values() rows
+    for part in path.split("__"):
+        obj = getattr(obj, part)
+    return obj
+
+
+def _json_default(value):
+    # Full precision on purpose: DjangoJSONEncoder drops microseconds,
+    # which would make the keyset equality checks miss.
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    raise TypeError(f"Cannot encode {type(value).__name__} in a cursor")
+
+
+class KeysetPagination(CursorPagination):
+    """
+    Cursor pagination keyed on (<ordering field>, created_at, id).
+    No COUNT(*) and no OFFSET: every page is one indexed range scan, so
+    page cost stays flat no matter how deep the client scrolls.
+    """
+    page_size_query_param = "page_size"
+    max_page_size = 100
+
+    def get_ordering(self, request, queryset, view):
+        ordering = None
+        for backend in getattr(view, "filter_backends", ()):
+            if hasattr(backend, "get_ordering"):
+                ordering = backend().get_ordering(request, queryset, view)
+                break
+        if not ordering:
+            ordering = queryset.query.order_by or queryset.model._meta.ordering or ("-created_at",)
+
+        ordering = [f for f in ordering if isinstance(f, str)][:1] or ["-created_at"]
+        descending = ordering[0].startswith("-")
+        for field in TIE_BREAKERS:
+            if field not in (f.lstrip("-") for f in ordering):
+                ordering.append(f"-{field}" if descending else field)
+        return tuple(ordering)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        queryset = self._page_queryset(queryset, request, view)
+        if queryset is None:
+            return None
+        return self._set_page(list(queryset))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """
+        paginate_queryset() for async views: the page is fetched with async iteration.
+        """
+        queryset = self._page_queryset(queryset, request, view)
+        if queryset is None:
+            return None
+        return self._set_page([row async for row in queryset])
+
+    def _page_queryset(self, queryset, request, view):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.cursor = self.decode_cursor(request)
+
+        reverse = bool(self.cursor and self.cursor["r"])
+        order = [_flip(f) for f in self.ordering] if reverse else list(self.ordering)
+        queryset = queryset.order_by(*order)
+        if self.cursor:
+            try:
+                queryset = queryset.filter(self._seek(self.cursor["v"], reverse))
+            except (ValidationError, TypeError, ValueError):
+                # Well-formed, but its values don't fit the ordering fields
+                raise NotFound(self.invalid_cursor_message)
+        return queryset[:self.page_size + 1]
+
+    def _set_page(self, rows):
+        reverse = bool(self.cursor and self.cursor["r"])
+        has_extra = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if reverse:
+            rows.reverse()
+            self.has_next, self.has_previous = True, has_extra
+        else:
+            self.has_next, self.has_previous = has_extra, self.cursor is not None
+
+        self.page = rows
+        return rows
+
+    def _seek(self, values, reverse):
+        # (a, b, c) > (x, y, z) spelled out per column, honouring each direction
+        condition = Q()
+        for i, field in enumerate(self.ordering):
+            descending = field.startswith("-") != reverse
+            lookup = "lt" if descending else "gt"
+            clause = Q(**{f"{field.lstrip('-')}__{lookup}": values[i]})
+            for prev, value in zip(self.ordering[:i], values[:i]):
+                clause &= Q(**{prev.lstrip("-"): value})
+            condition |= clause
+        return condition
+
+    def _position(self, obj):
+        return [_attr(obj, f.lstrip("-")) for f in self.ordering]
+
+    def get_next_link(self):
+        if not (self.has_next and self.page):
+            return None
+        return self.encode_cursor({"v": self._position(self.page[-1]), "r": False})
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor({"v": self._position(self.page[0]), "r": True})
+
+    def encode_cursor(self, cursor):
+        payload = json.dumps({"o": self.ordering, **cursor}, default=_json_default, separators=(",", ":"))
+        encoded = base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii")
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+
+        try:
+            cursor = json.loads(base64.urlsafe_b64decode(encoded.encode("ascii")).decode("utf-8"))
+            valid = (
+                tuple(cursor["o"]) == self.ordering
+                and len(cursor["v"]) == len(self.ordering)
+                and isinstance(cursor["r"], bool)
+            )
+        except (TypeError, ValueError, KeyError):
+            valid = False
+
+        if not valid:
+            raise NotFound(self.invalid_cursor_message)
+        return cursor
@@ -1,5 +1,5 @@
 from rest_framework.permissions import BasePermission
-from .models import Enrollment, Course
+from . import entitlements
 
 class IsEnrolledOrPreview(BasePermission):
     """
@@ -10,10 +10,10 @@ class IsEnrolledOrPreview(BasePermission):
     message = "You must be enrolled in this course to access this content."
 
     def has_object_permission(self, request, view, obj):
-        # obj can be a Lesson; get its course via section.course
-        course = obj.section.course
+        # obj can be a Lesson; its course id comes from the section
         if obj.is_free_preview:
             return True
         if not request.user or not request.user.is_authenticated:
             return False
-        return Enrollment.objects.filter(user=request.user, course=course, status="active").exists()
+        # Expired enrollments still pass here; the view reports the expiry
+        return entitlements.get_access(request, obj.section.course_id) != entitlements.NONE
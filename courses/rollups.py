@@ -0,0 +1,119 @@
+"""
+Per-course, per-day revenue, paid orders and new enrollments (CourseDailyStats).
+
+Payments and new enrollments bump the day's row in place: an INSERT of a zero
+row that ignores conflicts, then one UPDATE with F() increments, so concurrent
+writers never lose counts. rebuild() recomputes any date range from the
+source tables (rebuild_rollups command) to backfill or repair drift.
+Days are local dates (settings.TIME_ZONE), like TruncDate.
+"""
+from django.db import transaction
+from django.db.models import Case, Count, F, IntegerField, Sum, Value, When
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+from .finance_export import date_range_lookups
+from .models import CourseDailyStats, Enrollment, OrderItem
+
+
+def _bump(day, course_ids, **increments):
+    """
+    increments: field -> {course_id: amount}. Missing courses add 0.
+    """
+    if not course_ids:
+        return
+    CourseDailyStats.objects.bulk_create(
+        [CourseDailyStats(course_id=cid, day=day) for cid in course_ids], ignore_conflicts=True,
+    )
+    updates = {}
+    for field, amounts in increments.items():
+        whens = [When(course_id=cid, then=Value(amount)) for cid, amount in amounts.items() if amount]
+        if whens:
+            updates[field] = F(field) + Case(*whens, default=Value(0), output_field=IntegerField())
+    if updates:
+        CourseDailyStats.objects.filter(day=day, course_id__in=course_ids).update(**updates)
+
+
+def record_payment(paid_at, prices, new_course_ids=()):
+    """
+    One paid order: prices is {course_id: price_snapshot}; new_course_ids are
+    the courses whose enrollment row the payment created.
+    """
+    _bump(
+        timezone.localdate(paid_at),
+        set(prices) | set(new_course_ids),
+        revenue=prices,
+        paid_orders={cid: 1 for cid in prices},
+        new_enrollments={cid: 1 for cid in new_course_ids},
+    )
+
+
+def record_enrollment(created_at, course_id):
+    _bump(timezone.localdate(created_at), {course_id}, new_enrollments={course_id: 1})
+
+
+def rebuild(date_from=None, date_to=None, chunk_size=1000):
+    """
+    Recompute the rows of [date_from, date_to] (inclusive; None = unbounded)
+    with two GROUP BY queries. Returns the number of rows written.
+    Increments landing on the range while it runs are overwritten, so
+    rebuild closed days or run it when payments are quiet.
+    """
+    rows = {}
+
+    def row(course_id, day):
+        key = (course_id, day)
+        if key not in rows:
+            rows[key] = CourseDailyStats(course_id=course_id, day=day)
+        return rows[key]
+
+    sales = (
+        OrderItem.objects.filter(order__status="paid", **date_range_lookups("order__paid_at", date_from, date_to))
+        .annotate(day=TruncDate("order__paid_at"))
+        .values("course_id", "day")
+        .annotate(revenue=Sum("price_snapshot"), paid_orders=Count("order_id", distinct=True))
+        .order_by()
+    )
+    for r in sales.iterator():
+        stats = row(r["course_id"], r["day"])
+        stats.revenue, stats.paid_orders = r["revenue"], r["paid_orders"]
+
+    enrollments = (
+        Enrollment.objects.filter(**date_range_lookups("created_at", date_from, date_to))
+        .annotate(day=TruncDate("created_at"))
+        .values("course_id", "day")
+        .annotate(n=Count("id"))
+        .order_by()
+    )
+    for r in enrollments.iterator():
+        row(r["course_id"], r["day"]).new_enrollments = r["n"]
+
+    stale = CourseDailyStats.objects.all()
+    if date_from:
+        stale = stale.filter(day__gte=date_from)
+    if date_to:
+        stale = stale.filter(day__lte=date_to)
+    with transaction.atomic():
+        stale.delete()
+        CourseDailyStats.objects.bulk_create(rows.values(), batch_size=chunk_size)
+    return len(rows)
+
+
+def daily_series(date_from=None, date_to=None, course_id=None):
+    """
+    Per-day sums across courses (or for one course) plus totals, read off the
+    rollup table only.
+    """
+    stats = CourseDailyStats.objects.all()
+    if date_from:
+        stats = stats.filter(day__gte=date_from)
+    if date_to:
+        stats = stats.filter(day__lte=date_to)
+    if course_id:
+        stats = stats.filter(course_id=course_id)
+
+    sums = {
+        "revenue": Sum("revenue"), "paid_orders": Sum("paid_orders"), "new_enrollments": Sum("new_enrollments"),
+    }
+    days = list(stats.values("day").annotate(**sums).order_by("day"))
+    totals = {name: value or 0 for name, value in stats.aggregate(**sums).items()}
+    return days, totals
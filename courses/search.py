@@ -0,0 +1,245 @@
+import bisect
+import re
+import threading
+import uuid
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from .deferred import OnCommitBatch
+from .models import Course, Section, Lesson
+
+# Column weights: a hit in the title counts more than one in a lesson title
+WEIGHTS = {"title": 10.0, "instructor": 5.0, "sections": 2.0, "lessons": 1.0}
+FTS_TABLE = "courses_search"
+VERSION_KEY = "search:version"
+
+_TRANSLATE = str.maketrans({
+    "\u064a": "\u06cc", "\u0649": "\u06cc",       # Arabic yeh / alef maksura → Persian yeh
+    "\u0643": "\u06a9",                             # Arabic kaf → Persian keheh
+    "\u0629": "\u0647", "\u06c0": "\u0647",       # teh marbuta / heh with yeh → heh
+    "\u0623": "\u0627", "\u0625": "\u0627", "\u0622": "\u0627",   # hamza/madda alef → alef
+    "\u0624": "\u0648",                             # waw with hamza → waw
+    "\u200c": " ", "\u200f": " ",                   # ZWNJ, RLM
+    "\u0640": None,                                  # tatweel
+    **{ord(d): str(i) for i, d in enumerate("\u06f0\u06f1\u06f2\u06f3\u06f4\u06f5\u06f6\u06f7\u06f8\u06f9")},
+    **{ord(d): str(i) for i, d in enumerate("\u0660\u0661\u0662\u0663\u0664\u0665\u0666\u0667\u0668\u0669")},
+})
+_DIACRITICS = re.compile("[\u064b-\u065f\u0670]")
+_TOKEN = re.compile(r"\w+")
+
+
+def normalize(text):
+    """
+    Fold Arabic/Persian letter variants, digits, ZWNJ and diacritics so that
+    Arabic and Persian spellings of the same word index and match the same way.
+    """
+    text = _DIACRITICS.sub("", (text or "").translate(_TRANSLATE))
+    return text.lower()
+
+
+def tokenize(text):
+    return _TOKEN.findall(normalize(text))
+
+
+def _documents(course_ids=None):
+    """
+    Yields (course_id, {column: normalized text}) using three flat queries.
+    """
+    courses = Course.objects.all()
+    sections = Section.objects.all()
+    lessons = Lesson.objects.all()
+    if course_ids is not None:
+        courses = courses.filter(id__in=course_ids)
+        sections = sections.filter(course_id__in=course_ids)
+        lessons = lessons.filter(section__course_id__in=course_ids)
+
+    section_titles, lesson_titles = {}, {}
+    for cid, title in sections.values_list("course_id", "title").iterator():
+        section_titles.setdefault(cid, []).append(title)
+    for cid, title in lessons.values_list("section__course_id", "title").iterator():
+        lesson_titles.setdefault(cid, []).append(title)
+
+    for cid, title, instructor in courses.values_list("id", "title", "instructor_name").iterator():
+        yield cid, {
+            "title": normalize(title),
+            "instructor": normalize(instructor),
+            "sections": normalize(" ".join(section_titles.get(cid, ()))),
+            "lessons": normalize(" ".join(lesson_titles.get(cid, ()))),
+        }
+
+
+####################################
+
+class FTS5Backend:
+    """
+    SQLite FTS5 virtual table keyed by rowid = course id (see migration 0008).
+    """
+
+    def reindex(self, course_ids):
+        docs = list(_documents(course_ids))
+        with connection.cursor() as cursor:
+            cursor.executemany(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [(cid,) for cid in course_ids])
+            cursor.executemany(
+                f"INSERT INTO {FTS_TABLE} (rowid, title, instructor, sections, lessons) VALUES (%s, %s, %s, %s, %s)",
+                [(cid, d["title"], d["instructor"], d["sections"], d["lessons"]) for cid, d in docs],
+            )
+
+    def rebuild(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {FTS_TABLE}")
+            batch = []
+            for cid, d in _documents():
+                batch.append((cid, d["title"], d["instructor"], d["sections"], d["lessons"]))
+                if len(batch) >= 1000:
+                    self._insert(cursor, batch)
+                    batch = []
+            self._insert(cursor, batch)
+
+    def _insert(self, cursor, rows):
+        if rows:
+            cursor.executemany(
+                f"INSERT INTO {FTS_TABLE} (rowid, title, instructor, sections, lessons) VALUES (%s, %s, %s, %s, %s)",
+                rows,
+            )
+
+    def search(self, terms, limit, active_only=True):
+        # Every term is a quoted prefix query: "برنامه"* AND "pyth"*
+        match = " ".join(f'"{t}"*' for t in terms)
+        weights = ", ".join(str(w) for w in WEIGHTS.values())
+        # Inactive courses are dropped in the join, before LIMIT
+        active = f"JOIN {Course._meta.db_table} c ON c.id = {FTS_TABLE}.rowid AND c.is_active " if active_only else ""
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT {FTS_TABLE}.rowid, bm25({FTS_TABLE}, {weights}) AS score FROM {FTS_TABLE} {active}"
+                f"WHERE {FTS_TABLE} MATCH %s ORDER BY score LIMIT %s",
+                [match, -1 if limit is None else limit],
+            )
+            # bm25() is lower-is-better
+            return [(cid, -score) for cid, score in cursor.fetchall()]
+
+
+class PythonBackend:
+    """
+    In-process inverted index for databases without FTS5.
+    Rebuilt lazily whenever another process (or a signal) bumps the search version.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.version = None
+        self.postings = {}   # token -> {course_id: weight}
+        self.tokens = []     # sorted, for prefix lookups
+
+    def reindex(self, course_ids):
+        # Cheap to signal, rebuilt on the next query in every process
+        cache.set(VERSION_KEY, uuid.uuid4().hex, None)
+
+    def rebuild(self):
+        postings = {}
+        for cid, doc in _documents():
+            for column, weight in WEIGHTS.items():
+                for token in _TOKEN.findall(doc[column]):
+                    entry = postings.setdefault(token, {})
+                    entry[cid] = entry.get(cid, 0.0) + weight
+        self.postings, self.tokens = postings, sorted(postings)
+
+    def _ensure_fresh(self):
+        version = cache.get(VERSION_KEY)
+        if version is None:
+            cache.add(VERSION_KEY, uuid.uuid4().hex, None)
+            version = cache.get(VERSION_KEY)
+        if version != self.version:
+            with self.lock:
+                if version != self.version:
+                    self.rebuild()
+                    self.version = version
+
+    def _expand(self, prefix):
+        i = bisect.bisect_left(self.tokens, prefix)
+        while i < len(self.tokens) and self.tokens[i].startswith(prefix):
+            yield self.tokens[i]
+            i += 1
+
+    def search(self, terms, limit, active_only=True):
+        self._ensure_fresh()
+        scores = None
+        for term in terms:
+            matched = {}
+            for token in self._expand(term):
+                for cid, weight in self.postings[token].items():
+                    matched[cid] = max(matched.get(cid, 0.0), weight)
+            # AND semantics, like FTS5
+            if scores is None:
+                scores = matched
+            else:
+                scores = {cid: s + matched[cid] for cid, s in scores.items() if cid in matched}
+            if not scores:
+                return []
+        ranked = sorted(scores.items(), key=lambda kv: (-kv[1], kv[0]))
+        if not active_only:
+            return ranked[:limit]
+        return self._active(ranked, limit)
+
+    def _active(self, ranked, limit, chunk_size=500):
+        # The index does not know is_active: check in rank order until limit is filled
+        results = []
+        for i in range(0, len(ranked), chunk_size):
+            chunk = ranked[i:i + chunk_size]
+            active = set(Course.objects.filter(id__in=[cid for cid, _ in chunk], is_active=True).values_list("id", flat=True))
+            results.extend(hit for hit in chunk if hit[0] in active)
+            if limit is not None and len(results) >= limit:
+                break
+        return results[:limit]
+
+
+_python_backend = PythonBackend()
+
+
+_fts5_tables = {}
+
+
+def _fts5_available():
+    # The table only exists where migration 0008 could create it; checked once per process
+    if connection.alias not in _fts5_tables:
+        found = False
+        if connection.vendor == "sqlite":
+            with connection.cursor() as cursor:
+                found = FTS_TABLE in connection.introspection.table_names(cursor)
+        _fts5_tables[connection.alias] = found
+    return _fts5_tables[connection.alias]
+
+
+def get_backend():
+    choice = getattr(settings, "COURSE_SEARCH_BACKEND", "auto")
+    if choice == "python" or (choice == "auto" and not _fts5_available()):
+        return _python_backend
+    return FTS5Backend()
+
+
+####################################
+
+def search_ids(query, limit=20, active_only=True):
+    """
+    Ranked [(course_id, score)] for a free-text query, prefix-matching every term.
+    Only active courses unless active_only=False; limit=None for every match.
+    """
+    terms = tokenize(query)
+    if not terms:
+        return []
+    return get_backend().search(terms, limit, active_only)
+
+
+def _reindex(course_ids):
+    get_backend().reindex(course_ids)
+
+
+_reindexes = OnCommitBatch(_reindex)
+
+
+def schedule_reindex(course_id):
+    # Once per transaction for every course it touched
+    _reindexes.add(course_id)
+
+
+def rebuild():
+    get_backend().rebuild()
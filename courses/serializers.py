@@ -1,6 +1,7 @@
 from rest_framework import serializers
 from .models import Course, Enrollment , Section, Lesson, Order, OrderItem , Cart , CartItem
 from django.utils import timezone
+from . import carts
 
 class CourseSerializer(serializers.ModelSerializer):
     class Meta:
@@ -9,8 +10,12 @@ class CourseSerializer(serializers.ModelSerializer):
             "id", "title", "course_type", "price",
             "start_date", "end_date", "instructor_name",
             "is_active", "created_at",
+            "enrollment_count", "section_count", "lesson_count", "free_preview_count",
+        ]
+        read_only_fields = [
+            "id", "created_at",
+            "enrollment_count", "section_count", "lesson_count", "free_preview_count",
         ]
-        read_only_fields = ["id", "created_at"]
 
     def validate(self, attrs):
         ctype = attrs.get("course_type", getattr(self.instance, "course_type", None))
@@ -64,7 +69,9 @@ class CourseSerializer(serializers.ModelSerializer):
             "id", "title", "course_type", "price",
             "start_date", "end_date", "instructor_name",
             "is_active", "created_at",
+            "enrollment_count", "section_count", "lesson_count", "free_preview_count",
         ]
+        read_only_fields = ["enrollment_count", "section_count", "lesson_count", "free_preview_count"]
 
 class EnrollmentSerializer(serializers.ModelSerializer):
     course_title = serializers.ReadOnlyField(source="course.title")
@@ -98,15 +105,15 @@ class OrderCreateSerializer(serializers.Serializer):
         user = request.user
         ids = list(dict.fromkeys(attrs["course_ids"]))  
 
-        qs = Course.objects.filter(id__in=ids, is_active=True)
-        if qs.count() != len(ids):
+        courses = list(Course.objects.filter(id__in=ids, is_active=True))
+        if len(courses) != len(ids):
             raise serializers.ValidationError("One or more courses are invalid or inactive.")
 
-        already = Enrollment.objects.filter(user=user, course_id__in=ids, status="active").values_list("course_id", flat=True)
+        already = list(Enrollment.objects.filter(user=user, course_id__in=ids, status__in=Enrollment.ENROLLED_STATUSES).values_list("course_id", flat=True))
         if already:
-            raise serializers.ValidationError(f"You are already enrolled in courses: {list(already)}")
+            raise serializers.ValidationError(f"You are already enrolled in courses: {already}")
 
-        attrs["courses_qs"] = list(qs)
+        attrs["courses_qs"] = courses
         return attrs
 
     def create(self, validated_data):
@@ -133,7 +140,7 @@ class AddToCartSerializer(serializers.Serializer):
             raise serializers.ValidationError("The requested course does not exist or is not active.")
 
         #  Rule 1: user already enrolled
-        if Enrollment.objects.filter(user=user, course=course, status="active").exists():
+        if Enrollment.objects.filter(user=user, course=course, status__in=Enrollment.ENROLLED_STATUSES).exists():
             raise serializers.ValidationError("You are already enrolled in this course.")
 
         #  Rule 2: for ONLINE courses, check enrollment deadline
@@ -165,6 +172,81 @@ class AddToCartSerializer(serializers.Serializer):
 
         return item
 
+class BulkAddToCartSerializer(serializers.Serializer):
+    """
+    Add several courses at once: the rules of AddToCartSerializer, checked with
+    a fixed number of IN queries, and one bulk insert. Rejected IDs do not
+    block the others; every ID gets a result.
+    """
+    course_ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=100,
+    )
+
+    MESSAGES = {
+        "added": "Added to your cart.",
+        "unavailable": "The requested course does not exist or is not active.",
+        "enrolled": "You are already enrolled in this course.",
+        "closed": "Enrollment for this online course is closed (start date has passed).",
+        "in_cart": "This course is already in your cart.",
+    }
+
+    def validate(self, attrs):
+        user = self.context["request"].user
+        course_ids = list(dict.fromkeys(attrs["course_ids"]))
+
+        courses = {
+            cid: (ctype, start)
+            for cid, ctype, start in Course.objects.filter(id__in=course_ids, is_active=True)
+            .values_list("id", "course_type", "start_date")
+        }
+        enrolled = set(
+            Enrollment.objects.filter(user=user, course_id__in=course_ids, status__in=Enrollment.ENROLLED_STATUSES)
+            .values_list("course_id", flat=True)
+        )
+        in_cart = set(
+            CartItem.objects.filter(cart__user=user, course_id__in=course_ids)
+            .values_list("course_id", flat=True)
+        )
+
+        today = timezone.now().date()
+        results = []
+        for cid in course_ids:
+            if cid not in courses:
+                result = "unavailable"
+            elif cid in enrolled:
+                result = "enrolled"
+            elif courses[cid][0] == "online" and courses[cid][1] and today > courses[cid][1]:
+                result = "closed"
+            elif cid in in_cart:
+                result = "in_cart"
+            else:
+                result = "added"
+            results.append((cid, result))
+
+        attrs["results"] = results
+        return attrs
+
+    def create(self, validated_data):
+        user = self.context["request"].user
+        results = validated_data["results"]
+
+        to_add = [cid for cid, result in results if result == "added"]
+        if to_add:
+            cart, _ = Cart.objects.get_or_create(user=user)
+            # A concurrent request adding the same course is not an error: it is in the cart either way
+            CartItem.objects.bulk_create(
+                [CartItem(cart=cart, course_id=cid) for cid in to_add],
+                ignore_conflicts=True,
+            )
+            carts.bump_version(user.id)
+
+        return [
+            {"course_id": cid, "result": result, "detail": self.MESSAGES[result]}
+            for cid, result in results
+        ]
+
 class CartItemSerializer(serializers.ModelSerializer):
     course_title = serializers.ReadOnlyField(source="course.title")
     course_price = serializers.ReadOnlyField(source="course.price")
@@ -172,3 +254,110 @@ class CartItemSerializer(serializers.ModelSerializer):
     class Meta:
         model = CartItem
         fields = ["id", "course", "course_title", "course_price", "added_at"]
+
+
+class CartCheckoutSerializer(serializers.Serializer):
+    """
+    Turn the user's cart into a pending order.
+    Validation and creation cost a fixed number of queries whatever the cart size.
+    """
+
+    def validate(self, attrs):
+        user = self.context["request"].user
+
+        # One joined read for every cart item and the course fields the rules need
+        items = [
+            (item.id, item.course_id, item.course.price, item.course.is_active,
+             item.course.course_type, item.course.start_date)
+            for item in self.locked_items(user)
+        ]
+        if not items:
+            raise serializers.ValidationError("Your cart is empty.")
+
+        inactive = [cid for _, cid, _, active, _, _ in items if not active]
+        if inactive:
+            raise serializers.ValidationError(f"These courses are no longer available: {inactive}")
+
+        today = timezone.now().date()
+        closed = [
+            cid for _, cid, _, _, ctype, start in items
+            if ctype == "online" and start and today > start
+        ]
+        if closed:
+            raise serializers.ValidationError(
+                f"Enrollment for these online courses is closed (start date has passed): {closed}"
+            )
+
+        course_ids = [cid for _, cid, _, _, _, _ in items]
+        already = list(Enrollment.objects.filter(user=user, course_id__in=course_ids, status__in=Enrollment.ENROLLED_STATUSES).values_list("course_id", flat=True))
+        if already:
+            raise serializers.ValidationError(f"You are already enrolled in courses: {already}")
+
+        attrs["items"] = items
+        return attrs
+
+    @staticmethod
+    def locked_items(user):
+        # Lock the cart items only: a bare FOR UPDATE over the join would also
+        # lock the cart and every course row, stalling unrelated checkouts of
+        # the same courses. values_list() can't name the locked table, so
+        # this reads instances.
+        return (
+            CartItem.objects.filter(cart__user=user)
+            .select_related("course")
+            .only("course__price", "course__is_active", "course__course_type", "course__start_date")
+            .select_for_update(of=("self",))
+        )
+
+    def create(self, validated_data):
+        user = self.context["request"].user
+        items = validated_data["items"]
+
+        order = Order.objects.create(user=user, total_price=sum(price for _, _, price, _, _, _ in items), status="pending")
+        OrderItem.objects.bulk_create([
+            OrderItem(order=order, course_id=cid, price_snapshot=price)
+            for _, cid, price, _, _, _ in items
+        ])
+        # Only the validated items: anything added meanwhile stays in the cart
+        CartItem.objects.filter(id__in=[item_id for item_id, *_ in items]).delete()
+        carts.bump_version(user.id)
+        return order
+
+
+class DateRangeFilterSerializer(serializers.Serializer):
+    """
+    date_from/date_to query parameters (YYYY-MM-DD, inclusive, both optional).
+    """
+    date_from = serializers.DateField(required=False)
+    date_to = serializers.DateField(required=False)
+
+    def validate(self, attrs):
+        if attrs.get("date_from") and attrs.get("date_to") and attrs["date_from"] > attrs["date_to"]:
+            raise serializers.ValidationError("date_from must not be after date_to.")
+        return attrs
+
+
+class FinanceExportFilterSerializer(DateRangeFilterSerializer):
+    """
+    Query parameters of the finance CSV exports.
+    context["dataset"] is "orders" or "enrollments".
+    """
+    status = serializers.CharField(required=False)
+    by = serializers.ChoiceField(choices=["created", "paid"], required=False)  # orders only
+
+    def validate_status(self, value):
+        model = Order if self.context["dataset"] == "orders" else Enrollment
+        choices = dict(model.STATUS_CHOICES)
+        if value not in choices:
+            raise serializers.ValidationError(f"Must be one of: {', '.join(choices)}")
+        return value
+
+    def validate(self, attrs):
+        attrs = super().validate(attrs)
+        if self.context["dataset"] != "orders":
+            attrs.pop("by", None)
+        return attrs
+
+
+class AnalyticsFilterSerializer(DateRangeFilterSerializer):
+    course = serializers.IntegerField(required=False, min_value=1)
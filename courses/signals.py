@@ -0,0 +1,206 @@
+from django.db.models import Count, Q, QuerySet
+from django.db.models.signals import pre_save, post_save, pre_delete, post_delete
+from django.dispatch import receiver
+from .models import Course, Enrollment, Section, Lesson
+from . import entitlements, catalog_cache, carts, counters, expiry, outlines, rollups, search
+
+
+def _cascaded_from(origin, *models):
+    """
+    True when this delete is a cascade of deleting one of models (instance or
+    queryset). The parent's own handler then accounts for the whole subtree.
+    """
+    model = origin.model if isinstance(origin, QuerySet) else type(origin)
+    return issubclass(model, models)
+
+
+@receiver(pre_save, sender=Enrollment)
+def enrollment_expiry(sender, instance, raw=False, **kwargs):
+    if raw or not instance._state.adding or instance.access_expires_at is not None:
+        return
+    instance.access_expires_at = expiry.expires_at(instance.course.course_type, instance.course.end_date)
+
+
+@receiver(pre_save, sender=Enrollment)
+def enrollment_counted_before(sender, instance, raw=False, **kwargs):
+    # (course, counted) before this save, to move Course.enrollment_count on post_save
+    instance._counted_before = None
+    if raw or instance._state.adding:
+        return
+    old = Enrollment.objects.filter(pk=instance.pk).values_list("course_id", "status").first()
+    if old is not None:
+        instance._counted_before = (old[0], counters.counts_enrollment(old[1]))
+
+
+@receiver(post_save, sender=Enrollment)
+def enrollment_counter(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    before = getattr(instance, "_counted_before", None)
+    after = (instance.course_id, counters.counts_enrollment(instance.status))
+    if before == after:
+        return
+    if before and before[1]:
+        counters.adjust(before[0], enrollment_count=-1)
+    if after[1]:
+        counters.adjust(after[0], enrollment_count=1)
+
+
+@receiver(post_delete, sender=Enrollment)
+def enrollment_uncounted(sender, instance, origin=None, **kwargs):
+    if _cascaded_from(origin, Course):
+        return  # the course row is going too
+    if counters.counts_enrollment(instance.status):
+        counters.adjust(instance.course_id, enrollment_count=-1)
+
+
+@receiver([post_save, post_delete], sender=Enrollment)
+def enrollment_changed(sender, instance, **kwargs):
+    entitlements.invalidate_enrollments(instance.user_id, [instance.course_id])
+    carts.bump_version(instance.user_id)  # the cart summary flags enrolled items
+
+
+@receiver(post_save, sender=Enrollment)
+def enrollment_created(sender, instance, created, raw=False, **kwargs):
+    # Paid enrollments are bulk-created by fulfill_order, which records them itself
+    if created and not raw:
+        rollups.record_enrollment(instance.created_at, instance.course_id)
+
+
+@receiver(post_save, sender=Course)
+@receiver(post_save, sender=Section)
+@receiver(post_save, sender=Lesson)
+def stamp_external_id(sender, instance, created, raw=False, **kwargs):
+    # Stable catalog key (see catalog_io), so exports never need to write
+    if created and not raw and instance.external_id is None:
+        instance.external_id = f"{sender._meta.model_name}:{instance.pk}"
+        sender.objects.filter(pk=instance.pk).update(external_id=instance.external_id)
+
+
+@receiver(pre_save, sender=Course)
+def course_terms_changing(sender, instance, raw=False, **kwargs):
+    instance._expiry_changed = False
+    if raw or instance.pk is None:
+        return
+    old = Course.objects.filter(pk=instance.pk).values_list("course_type", "end_date").first()
+    instance._expiry_changed = old is not None and old != (instance.course_type, instance.end_date)
+
+
+@receiver([post_save, post_delete], sender=Course)
+def course_changed(sender, instance, **kwargs):
+    # Covers CourseCreate/Update/DeleteView and admin saves alike
+    catalog_cache.bump_version()
+    search.schedule_reindex(instance.pk)
+    if getattr(instance, "_expiry_changed", False) and kwargs["signal"] is post_save:
+        expiry.sync_course(instance.pk)
+
+
+def _content_changed(course_id):
+    # The course's section/lesson counters moved under the cached catalog pages
+    catalog_cache.bump_version()
+    outlines.schedule_rebuild(course_id)
+    search.schedule_reindex(course_id)
+
+
+def _section_course_id(section_id):
+    return Section.objects.filter(id=section_id).values_list("course_id", flat=True).first()
+
+
+@receiver(pre_save, sender=Section)
+def section_moving(sender, instance, raw=False, **kwargs):
+    # A section moved to another course leaves the old outline stale too
+    instance._moved_from = None
+    if raw or instance.pk is None:
+        return
+    old_course_id = _section_course_id(instance.pk)
+    if old_course_id is not None and old_course_id != instance.course_id:
+        instance._moved_from = old_course_id
+        _content_changed(old_course_id)
+
+
+@receiver([post_save, post_delete], sender=Section)
+def section_changed(sender, instance, **kwargs):
+    _content_changed(instance.course_id)
+
+
+@receiver(post_save, sender=Section)
+def section_counter(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    moved_from = getattr(instance, "_moved_from", None)
+    if created:
+        counters.adjust(instance.course_id, section_count=1)
+    elif moved_from is not None:
+        lessons = instance.lessons.count()
+        previews = instance.lessons.filter(is_free_preview=True).count()
+        counters.adjust(moved_from, section_count=-1, lesson_count=-lessons, free_preview_count=-previews)
+        counters.adjust(instance.course_id, section_count=1, lesson_count=lessons, free_preview_count=previews)
+
+
+@receiver(pre_delete, sender=Section)
+def section_lessons_counted(sender, instance, origin=None, **kwargs):
+    # Its lessons skip their own counter updates; count them once while they still exist
+    instance._lesson_counts = None
+    if not _cascaded_from(origin, Course):
+        instance._lesson_counts = instance.lessons.aggregate(
+            lessons=Count("id"), previews=Count("id", filter=Q(is_free_preview=True)),
+        )
+
+
+@receiver(post_delete, sender=Section)
+def section_uncounted(sender, instance, **kwargs):
+    counts = getattr(instance, "_lesson_counts", None)
+    if counts is not None:
+        counters.adjust(
+            instance.course_id, section_count=-1,
+            lesson_count=-counts["lessons"], free_preview_count=-counts["previews"],
+        )
+
+
+@receiver(pre_save, sender=Lesson)
+def lesson_moving(sender, instance, raw=False, **kwargs):
+    instance._counted_before = instance._course_id = None
+    if raw or instance.pk is None:
+        return
+    old = Lesson.objects.filter(pk=instance.pk).values_list("section__course_id", "section_id", "is_free_preview").first()
+    if old is None:
+        return
+    old_course_id, old_section_id, old_preview = old
+    instance._counted_before = (old_course_id, old_preview)
+    if old_section_id != instance.section_id and old_course_id is not None:
+        _content_changed(old_course_id)
+    elif old_section_id == instance.section_id:
+        instance._course_id = old_course_id  # saves lesson_changed a lookup
+
+
+def _lesson_course_id(lesson):
+    # Cheapest source first: pre_save's lookup, a loaded section, then one query
+    course_id = getattr(lesson, "_course_id", None)
+    if course_id is not None:
+        return course_id
+    if Lesson.section.is_cached(lesson):
+        return lesson.section.course_id
+    return _section_course_id(lesson.section_id)
+
+
+@receiver([post_save, post_delete], sender=Lesson)
+def lesson_changed(sender, instance, raw=False, origin=None, **kwargs):
+    if kwargs["signal"] is post_delete and _cascaded_from(origin, Course, Section):
+        return  # outline, search and counters are handled once for the parent
+    course_id = _lesson_course_id(instance)
+    if course_id is not None:
+        _content_changed(course_id)
+    if raw:
+        return
+
+    # Counters: move this lesson's contribution from where it was to where it is now
+    if kwargs["signal"] is post_save:
+        before, after = getattr(instance, "_counted_before", None), (course_id, instance.is_free_preview)
+    else:
+        before, after = (course_id, instance.is_free_preview), None
+    if before == after:
+        return
+    if before:
+        counters.adjust(before[0], **counters.lesson_deltas(-1, before[1]))
+    if after:
+        counters.adjust(after[0], **counters.lesson_deltas(1, after[1]))
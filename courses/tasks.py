@@ -0,0 +1,12 @@
+from jobs.queue import task
+from users import sms
+from .models import Order
+
+
+@task("courses.send_order_receipt")
+def send_order_receipt(order_id):
+    order = Order.objects.select_related("user").get(id=order_id)
+    sms.send_sms(
+        order.user.mobile,
+        f"Payment received for order #{order.id} ({order.total_price}). Your courses are now available.",
+    )
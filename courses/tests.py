@@ -1,3 +1,1232 @@
-from django.test import TestCase
+import base64
+import csv
+import json
+import threading
+from datetime import timedelta
+from io import StringIO
+from types import SimpleNamespace
+from unittest import mock, skipUnless
+from django.contrib import admin
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection, connections
+from django.db.models import Sum
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+from kelaasor_final import db_router
+from kelaasor_final.admin_mixins import LargeTableAdminMixin
+from . import catalog_cache, catalog_io, counters, entitlements, expiry, finance_export, outlines, rollups, search
+from .fulfillment import fulfill_order, OrderNotPayable
+from .models import Course, CourseDailyStats, CourseOutline, Enrollment, Order, OrderItem, Cart, CartItem, Section, Lesson
+from .serializers import CartCheckoutSerializer
 
-# Create your tests here.
+
+def make_order(user, size):
+    courses = Course.objects.bulk_create([Course(title=f"Course {i}", price=100 + i) for i in range(size)])
+    order = Order.objects.create(user=user, total_price=sum(c.price for c in courses))
+    OrderItem.objects.bulk_create([OrderItem(order=order, course=c, price_snapshot=c.price) for c in courses])
+    return order, courses
+
+
+class FulfillOrderTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(mobile="09120000001")
+
+    def test_grants_enrollments_and_reactivates_cancelled(self):
+        order, courses = make_order(self.user, 3)
+        Enrollment.objects.create(user=self.user, course=courses[0], status="cancelled")
+
+        fulfill_order(order.id, self.user)
+
+        order.refresh_from_db()
+        self.assertEqual(order.status, "paid")
+        self.assertIsNotNone(order.paid_at)
+        self.assertEqual(
+            Enrollment.objects.filter(user=self.user, status="active").count(), 3
+        )
+
+    def test_second_claim_loses(self):
+        order, _ = make_order(self.user, 2)
+        fulfill_order(order.id, self.user)
+
+        with self.assertRaises(OrderNotPayable) as ctx:
+            fulfill_order(order.id, self.user)
+        self.assertEqual(ctx.exception.status, "paid")
+
+    def test_foreign_order_is_not_found(self):
+        other = get_user_model().objects.create_user(mobile="09120000002")
+        order, _ = make_order(other, 1)
+
+        with self.assertRaises(OrderNotPayable) as ctx:
+            fulfill_order(order.id, self.user)
+        self.assertIsNone(ctx.exception.status)
+
+    def test_query_count_does_not_grow_with_items(self):
+        counts = []
+        for size in (1, 25):
+            order, _ = make_order(self.user, size)
+            with CaptureQueriesContext(connection) as ctx:
+                fulfill_order(order.id, self.user)
+            counts.append(len(ctx.captured_queries))
+        self.assertEqual(counts[0], counts[1])
+
+
+class EnrollmentExpiryTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(mobile="09120000008")
+        self.today = timezone.now().date()
+
+    def access(self, course):
+        return entitlements.get_access(SimpleNamespace(user=self.user), course.id)
+
+    def test_stamped_on_create(self):
+        ended = Course.objects.create(title="Ended", end_date=self.today - timedelta(days=1))
+        running = Course.objects.create(title="Running", end_date=self.today)
+        online = Course.objects.create(title="Live", course_type="online", start_date=self.today, end_date=self.today)
+        for course in (ended, running, online):
+            Enrollment.objects.create(user=self.user, course=course)
+
+        self.assertEqual(self.access(ended), entitlements.EXPIRED)
+        self.assertEqual(self.access(running), entitlements.ACTIVE)
+        self.assertEqual(self.access(online), entitlements.ACTIVE)
+        self.assertIsNone(Enrollment.objects.get(course=online).access_expires_at)
+
+    def test_course_end_date_change_resyncs(self):
+        course = Course.objects.create(title="Course", end_date=self.today - timedelta(days=1))
+        enrollment = Enrollment.objects.create(user=self.user, course=course)
+        self.assertEqual(expiry.expire_due(), 1)
+
+        course.end_date = self.today + timedelta(days=30)
+        course.save()
+
+        enrollment.refresh_from_db()
+        self.assertEqual(enrollment.status, "active")
+        self.assertEqual(enrollment.access_expires_at, expiry.expires_at("offline", course.end_date))
+        self.assertEqual(self.access(course), entitlements.ACTIVE)
+
+    def test_sweeper_flips_only_overdue_rows(self):
+        ended = Course.objects.create(title="Ended", end_date=self.today - timedelta(days=1))
+        running = Course.objects.create(title="Running", end_date=self.today + timedelta(days=1))
+        Enrollment.objects.create(user=self.user, course=ended)
+        Enrollment.objects.create(user=self.user, course=running)
+
+        self.assertEqual(expiry.expire_due(chunk_size=1), 1)
+        self.assertEqual(
+            dict(Enrollment.objects.values_list("course_id", "status")),
+            {ended.id: "expired", running.id: "active"},
+        )
+        # Still reported as expired (not "not enrolled") after the flip
+        self.assertEqual(self.access(ended), entitlements.EXPIRED)
+
+    def test_fulfillment_stamps_bulk_created_rows(self):
+        order, courses = make_order(self.user, 2)
+        Course.objects.filter(id=courses[0].id).update(end_date=self.today)
+        fulfill_order(order.id, self.user)
+        self.assertEqual(
+            Enrollment.objects.get(course=courses[0]).access_expires_at,
+            expiry.expires_at("offline", self.today),
+        )
+        self.assertIsNone(Enrollment.objects.get(course=courses[1]).access_expires_at)
+
+    def test_expired_enrollment_cannot_be_bought_again(self):
+        course = Course.objects.create(title="Ended", price=10, end_date=self.today - timedelta(days=1))
+        Enrollment.objects.create(user=self.user, course=course)
+        self.assertEqual(expiry.expire_due(), 1)
+
+        client = APIClient()
+        client.force_authenticate(self.user)
+        self.assertEqual(client.post("/api/cart/add/", {"course_id": course.id}, format="json").status_code, 400)
+        self.assertEqual(
+            client.post("/api/cart/add/", {"course_ids": [course.id]}, format="json").status_code, 400
+        )
+        self.assertEqual(client.post("/api/orders/create/", {"course_ids": [course.id]}, format="json").status_code, 400)
+        CartItem.objects.create(cart=Cart.objects.create(user=self.user), course=course)
+        self.assertEqual(client.post("/api/cart/checkout/", {}, format="json").status_code, 400)
+        self.assertFalse(Order.objects.filter(user=self.user).exists())
+
+
+class EntitlementCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(mobile="09120000017")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.today = timezone.now().date()
+        self.course = Course.objects.create(title="Gated", price=100, end_date=self.today + timedelta(days=30))
+        section = Section.objects.create(course=self.course, title="S")
+        self.preview = Lesson.objects.create(section=section, title="Free", order=1, is_free_preview=True)
+        self.paid = Lesson.objects.create(section=section, title="Paid", order=2)
+
+    def lessons(self):
+        return [lesson["title"] for lesson in self.client.get(f"/api/courses/{self.course.id}/lessons/").json()]
+
+    def lesson_status(self):
+        return self.client.get(f"/api/lessons/{self.paid.id}/").status_code
+
+    def order(self):
+        order = Order.objects.create(user=self.user, total_price=self.course.price)
+        OrderItem.objects.create(order=order, course=self.course, price_snapshot=self.course.price)
+        return order
+
+    def test_paying_an_order_drops_the_cached_denial(self):
+        self.assertEqual((self.lessons(), self.lesson_status()), (["Free"], 403))
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(f"/api/orders/{self.order().id}/pay/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((self.lessons(), self.lesson_status()), (["Free", "Paid"], 200))
+
+    def test_fulfill_order_drops_the_cached_denial(self):
+        request = SimpleNamespace(user=self.user)
+        self.assertEqual(entitlements.get_access(request, self.course.id), entitlements.NONE)
+        with self.captureOnCommitCallbacks(execute=True):
+            fulfill_order(self.order().id, self.user)
+        self.assertEqual(entitlements.get_access(SimpleNamespace(user=self.user), self.course.id), entitlements.ACTIVE)
+
+    def test_course_term_change_drops_the_cached_expiry(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Enrollment.objects.create(user=self.user, course=self.course)
+        self.assertEqual(self.lesson_status(), 200)  # cached with the old end date
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.course.end_date = self.today - timedelta(days=1)
+            self.course.save()
+        self.assertEqual(self.lesson_status(), 403)
+        self.assertEqual(self.lessons(), ["Free"])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.course.course_type = "online"  # online access never expires
+            self.course.save()
+        self.assertEqual((self.lessons(), self.lesson_status()), (["Free", "Paid"], 200))
+
+    def test_cached_access_costs_no_queries(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Enrollment.objects.create(user=self.user, course=self.course)
+        # Cold: the enrollment lookup, then the lessons
+        with self.assertNumQueries(2):
+            self.assertEqual(self.lessons(), ["Free", "Paid"])
+        with self.assertNumQueries(1):
+            self.assertEqual(self.lessons(), ["Free", "Paid"])
+        # The lesson with its section and course, in one query
+        with self.assertNumQueries(1):
+            self.assertEqual(self.lesson_status(), 200)
+
+
+class FastSerializationTests(TestCase):
+    """
+    The .values() path must emit exactly the bytes the serializers do.
+    """
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(mobile="09120000004")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+        for size in (1, 3, 2):
+            make_order(self.user, size)
+        courses = list(Course.objects.all())
+        courses[0].end_date = courses[0].created_at.date()
+        courses[0].save()
+        Enrollment.objects.bulk_create([Enrollment(user=self.user, course=c) for c in courses[:4]])
+        cart = Cart.objects.create(user=self.user)
+        CartItem.objects.bulk_create([CartItem(cart=cart, course=c) for c in courses[4:]])
+
+    def get(self, path, fast):
+        cache.clear()  # the catalog response cache would hide the second call
+        with override_settings(FAST_SERIALIZATION=fast):
+            response = self.client.get(path, HTTP_ACCEPT="application/json")
+        self.assertEqual(response.status_code, 200)
+        return response.content
+
+    def test_list_endpoints_are_byte_identical(self):
+        for path in (
+            "/api/courses/",
+            "/api/courses/?ordering=price&page_size=2",
+            "/api/enrollments/mine/",
+            "/api/orders/mine/",
+            "/api/orders/mine/?page_size=1",
+            "/api/cart/",
+        ):
+            with self.subTest(path=path):
+                self.assertEqual(self.get(path, fast=True), self.get(path, fast=False))
+
+    def test_next_page_is_byte_identical(self):
+        first = self.client.get("/api/orders/mine/?page_size=1").json()
+        path = first["next"].split("testserver", 1)[1]
+        self.assertEqual(self.get(path, fast=True), self.get(path, fast=False))
+
+    def test_nested_items_need_fewer_queries(self):
+        counts = {}
+        for fast in (True, False):
+            with override_settings(FAST_SERIALIZATION=fast), CaptureQueriesContext(connection) as ctx:
+                self.client.get("/api/orders/mine/")
+            counts[fast] = len(ctx.captured_queries)
+        # items and their course titles come back in one joined query
+        self.assertEqual(counts[True], counts[False] - 1)
+
+
+class KeysetPaginationTests(TestCase):
+    orderings = ("-created_at", "created_at", "price", "-price", "title", "-title", "-enrollment_count", "lesson_count")
+
+    def setUp(self):
+        now = timezone.now()
+        # Few distinct values per column, so every ordering leans on its tie-breakers
+        self.courses = Course.objects.bulk_create([
+            Course(title=title, price=price, enrollment_count=price // 100, lesson_count=i % 2)
+            for i, (title, price) in enumerate([
+                ("b", 300), ("a", 100), ("c", 200), ("a", 100), ("b", 300), ("d", 100), ("c", 200),
+            ])
+        ])
+        for course, offset in zip(self.courses, (0, 0, 1, 1, 1, 2, 2)):
+            Course.objects.filter(id=course.id).update(created_at=now - timedelta(hours=offset))
+        Course.objects.create(title="hidden", is_active=False)
+
+    def expected(self, ordering):
+        field = ordering.lstrip("-")
+        courses = Course.objects.filter(is_active=True)
+        return [c.id for c in sorted(courses, key=lambda c: (getattr(c, field), c.created_at, c.id),
+                                     reverse=ordering.startswith("-"))]
+
+    def get(self, url, fast=False):
+        cache.clear()
+        with override_settings(FAST_SERIALIZATION=fast):
+            return self.client.get(url, HTTP_ACCEPT="application/json")
+
+    def walk(self, ordering, fast, page_size=2):
+        """
+        Every page forwards along the next links, then back along the previous links.
+        """
+        forward, url = [], f"/api/courses/?ordering={ordering}&page_size={page_size}"
+        while url:
+            page = self.get(url, fast).json()
+            self.assertLessEqual(len(page["results"]), page_size)
+            forward.append([c["id"] for c in page["results"]])
+            url, previous = page["next"], page["previous"]
+        backward = [forward[-1]]
+        while previous:
+            page = self.get(previous, fast).json()
+            backward.insert(0, [c["id"] for c in page["results"]])
+            previous = page["previous"]
+        return forward, backward
+
+    def test_forward_and_backward_in_every_ordering(self):
+        for ordering in self.orderings:
+            for fast in (False, True):
+                with self.subTest(ordering=ordering, fast=fast):
+                    forward, backward = self.walk(ordering, fast)
+                    self.assertEqual(sum(forward, []), self.expected(ordering))
+                    self.assertEqual(backward, forward)
+
+    def test_fast_and_slow_pages_match(self):
+        for ordering in ("price", "-title"):
+            with self.subTest(ordering=ordering):
+                url = f"/api/courses/?ordering={ordering}&page_size=3"
+                while url:
+                    slow = self.get(url, fast=False)
+                    self.assertEqual(self.get(url, fast=True).content, slow.content)
+                    url = slow.json()["next"]
+
+    def test_rows_tied_on_every_ordering_column(self):
+        Course.objects.update(created_at=timezone.now(), price=500)
+        for fast in (False, True):
+            with self.subTest(fast=fast):
+                forward, backward = self.walk("price", fast, page_size=1)
+                self.assertEqual(sum(forward, []), sorted(c.id for c in self.courses))
+                self.assertEqual(backward, forward)
+
+    def cursor(self, **payload):
+        return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+
+    def test_invalid_or_tampered_cursor_is_not_found(self):
+        second_page = self.get("/api/courses/?ordering=price&page_size=2").json()["next"]
+        valid = second_page.split("cursor=")[1].split("&")[0]
+        good = json.loads(base64.urlsafe_b64decode(valid))
+        cursors = {
+            "garbage": "not-a-cursor",
+            "other ordering": valid,  # issued for ordering=price, replayed below with ordering=title
+            "short values": self.cursor(**{**good, "v": good["v"][:1]}),
+            "bad direction": self.cursor(**{**good, "r": "yes"}),
+            "bad value": self.cursor(**{**good, "v": ["cheap", *good["v"][1:]]}),
+            "null value": self.cursor(**{**good, "v": [None] * len(good["v"])}),
+        }
+        for name, cursor in cursors.items():
+            ordering = "title" if name == "other ordering" else "price"
+            for prefix, fast in (("", False), ("", True), ("async/", True)):
+                with self.subTest(cursor=name, path=f"{prefix}courses", fast=fast):
+                    response = self.get(f"/api/{prefix}courses/?ordering={ordering}&cursor={cursor}", fast)
+                    self.assertEqual(response.status_code, 404)
+        self.assertEqual(self.get(second_page).status_code, 200)
+
+
+class CatalogCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.admin = get_user_model().objects.create_superuser(mobile="09120000018")
+        self.api = APIClient()
+        self.api.force_authenticate(self.admin)
+        self.client.force_login(self.admin)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.course = Course.objects.create(title="Cached", price=100)
+
+    def etags(self):
+        list_ = self.api.get("/api/courses/", HTTP_ACCEPT="application/json")
+        detail = self.api.get(f"/api/courses/{self.course.id}/", HTTP_ACCEPT="application/json")
+        return list_["ETag"], detail["ETag"]
+
+    def assertWriteInvalidates(self, write):
+        version, etags = catalog_cache.get_version(), self.etags()
+        with self.captureOnCommitCallbacks(execute=True):
+            response = write()
+        self.assertLess(response.status_code, 400)
+
+        self.assertNotEqual(catalog_cache.get_version(), version)
+        list_etag = self.etags()[0]
+        self.assertNotEqual(list_etag, etags[0])
+        # A client still holding the old ETag gets the new body, not a 304
+        response = self.api.get("/api/courses/", HTTP_ACCEPT="application/json", HTTP_IF_NONE_MATCH=etags[0])
+        self.assertEqual((response.status_code, response["ETag"]), (200, list_etag))
+        response = self.api.get("/api/courses/", HTTP_ACCEPT="application/json", HTTP_IF_NONE_MATCH=list_etag)
+        self.assertEqual(response.status_code, 304)
+
+    def admin_form(self, **fields):
+        return {
+            "title": "Admin", "course_type": "offline", "price": 100, "instructor_name": "", "is_active": "on",
+            "start_date": "", "end_date": "", "external_id": "",
+            **{field: 0 for field in counters.COUNTER_FIELDS}, **fields,
+        }
+
+    def test_api_writes(self):
+        self.assertWriteInvalidates(lambda: self.api.post("/api/courses/create/", {"title": "New", "price": 5}, format="json"))
+        self.assertWriteInvalidates(
+            lambda: self.api.patch(f"/api/courses/{self.course.id}/update/", {"price": 150}, format="json")
+        )
+        new = Course.objects.get(title="New")
+        self.assertWriteInvalidates(lambda: self.api.delete(f"/api/courses/{new.id}/delete/"))
+
+    def test_admin_writes(self):
+        self.assertWriteInvalidates(
+            lambda: self.client.post(reverse("admin:courses_course_add"), self.admin_form())
+        )
+        self.assertTrue(Course.objects.filter(title="Admin").exists())
+        self.assertWriteInvalidates(lambda: self.client.post(
+            reverse("admin:courses_course_change", args=[self.course.id]), self.admin_form(title="Renamed")
+        ))
+        self.course.refresh_from_db()
+        self.assertEqual(self.course.title, "Renamed")
+        new = Course.objects.get(title="Admin")
+        self.assertWriteInvalidates(
+            lambda: self.client.post(reverse("admin:courses_course_delete", args=[new.id]), {"post": "yes"})
+        )
+        self.assertFalse(Course.objects.filter(id=new.id).exists())
+
+    def test_detail_etag_follows_its_course(self):
+        detail = self.etags()[1]
+        with self.captureOnCommitCallbacks(execute=True):
+            self.api.patch(f"/api/courses/{self.course.id}/update/", {"title": "Changed"}, format="json")
+        response = self.api.get(
+            f"/api/courses/{self.course.id}/", HTTP_ACCEPT="application/json", HTTP_IF_NONE_MATCH=detail
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["title"], "Changed")
+
+
+class AsyncViewTests(TestCase):
+    """
+    The async twins under api/async/ must answer exactly like the DRF views.
+    """
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(mobile="09120000005", first_name="Sara")
+        self.course = Course.objects.create(title="Django", price=1000)
+        section = Section.objects.create(course=self.course, title="Intro", order=1)
+        Lesson.objects.create(section=section, title="Setup", order=1, content_url="https://x/1", is_free_preview=True)
+        Lesson.objects.create(section=section, title="Models", order=2, content_url="https://x/2")
+
+        self.anon = APIClient()
+        self.student = APIClient()
+        self.student.credentials(HTTP_AUTHORIZATION=f"Token {Token.objects.create(user=self.user).key}")
+
+    def assertSameResponse(self, client, path):
+        cache.clear()
+        sync = client.get(f"/api/{path}", HTTP_ACCEPT="application/json")
+        cache.clear()
+        async_ = client.get(f"/api/async/{path}", HTTP_ACCEPT="application/json")
+        self.assertEqual(async_.status_code, sync.status_code)
+        self.assertEqual(async_.content, sync.content)
+
+    def test_catalog_endpoints(self):
+        for path in ("courses/", "courses/?ordering=price", f"courses/{self.course.id}/",
+                     f"courses/{self.course.id}/sections/", "courses/999999/"):
+            with self.subTest(path=path):
+                self.assertSameResponse(self.anon, path)
+
+    def test_lessons_follow_entitlements(self):
+        path = f"courses/{self.course.id}/lessons/"
+        self.assertSameResponse(self.student, path)
+        Enrollment.objects.create(user=self.user, course=self.course)
+        cache.clear()
+        self.assertSameResponse(self.student, path)
+        self.assertEqual(len(self.student.get(f"/api/async/{path}").json()), 2)
+
+    def test_me_requires_token(self):
+        self.assertSameResponse(self.student, "me/")
+        # Equal bodies alone would also pass if both paths mangled the cached user
+        me = self.student.get("/api/async/me/").json()
+        self.assertEqual((me["mobile"], me["first_name"], me["last_name"]), ("09120000005", "Sara", ""))
+        self.assertEqual(self.anon.get("/api/async/me/").status_code, 401)
+        bad = APIClient()
+        bad.credentials(HTTP_AUTHORIZATION="Token nope")
+        self.assertSameResponse(bad, "me/")
+
+    def test_catalog_cache_is_shared(self):
+        cache.clear()
+        etag = self.anon.get("/api/courses/", HTTP_ACCEPT="application/json")["ETag"]
+        response = self.anon.get("/api/async/courses/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+class CartSummaryTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(mobile="09120000006")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.open, self.inactive, self.enrolled, self.extra = Course.objects.bulk_create([
+            Course(title="Open", price=100),
+            Course(title="Gone", price=200, is_active=False),
+            Course(title="Owned", price=300),
+            Course(title="Extra", price=400),
+        ])
+        cart = Cart.objects.create(user=self.user)
+        CartItem.objects.bulk_create([CartItem(cart=cart, course=c) for c in (self.open, self.inactive, self.enrolled)])
+        Enrollment.objects.create(user=self.user, course=self.enrolled)
+
+    def test_totals_and_stale_items(self):
+        summary = self.client.get("/api/cart/summary/").json()
+        self.assertEqual(summary["item_count"], 3)
+        self.assertEqual(summary["total_price"], 600)
+        self.assertEqual(summary["payable_count"], 1)
+        self.assertEqual(summary["payable_total"], 100)
+        self.assertEqual(
+            {(i["course"], i["reason"]) for i in summary["stale_items"]},
+            {(self.inactive.id, "inactive"), (self.enrolled.id, "enrolled")},
+        )
+
+    def test_one_query_then_cached_until_cart_changes(self):
+        with CaptureQueriesContext(connection) as ctx:
+            first = self.client.get("/api/cart/summary/").json()
+        self.assertEqual(len(ctx.captured_queries), 1)
+
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertEqual(self.client.get("/api/cart/summary/").json(), first)
+        self.assertEqual(len(ctx.captured_queries), 0)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post("/api/cart/add/", {"course_id": self.extra.id}, format="json")
+        second = self.client.get("/api/cart/summary/").json()
+        self.assertNotEqual(second["version"], first["version"])
+        self.assertEqual(second["total_price"], 1000)
+
+
+class BulkAddToCartTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(mobile="09120000007")
+        self.cart = Cart.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def add(self, course_ids):
+        return self.client.post("/api/cart/add/", {"course_ids": course_ids}, format="json")
+
+    def test_per_id_results(self):
+        past = timezone.now().date() - timedelta(days=1)
+        ok, gone, owned, closed, queued = Course.objects.bulk_create([
+            Course(title="Ok", price=1),
+            Course(title="Gone", price=1, is_active=False),
+            Course(title="Owned", price=1),
+            Course(title="Closed", price=1, course_type="online", start_date=past),
+            Course(title="Queued", price=1),
+        ])
+        Enrollment.objects.create(user=self.user, course=owned)
+        CartItem.objects.create(cart=self.cart, course=queued)
+
+        response = self.add([ok.id, gone.id, owned.id, closed.id, queued.id, ok.id, 999999])
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(
+            [(r["course_id"], r["result"]) for r in response.json()["results"]],
+            [(ok.id, "added"), (gone.id, "unavailable"), (owned.id, "enrolled"),
+             (closed.id, "closed"), (queued.id, "in_cart"), (999999, "unavailable")],
+        )
+        self.assertEqual(CartItem.objects.filter(cart__user=self.user).count(), 2)
+
+    def test_nothing_added_is_400(self):
+        self.assertEqual(self.add([999999]).status_code, 400)
+
+    def test_query_count_does_not_grow_with_ids(self):
+        counts = []
+        for size in (1, 20):
+            courses = Course.objects.bulk_create([Course(title=f"C{i}", price=1) for i in range(size)])
+            with CaptureQueriesContext(connection) as ctx:
+                self.assertEqual(self.add([c.id for c in courses]).status_code, 201)
+            counts.append(len(ctx.captured_queries))
+        self.assertEqual(counts[0], counts[1])
+
+
+class CartCheckoutTests(TestCase):
+    # Savepoint, cart read, enrollment check, order insert, items insert, cart
+    # delete, release, then the order re-read with its items and their courses
+    checkout_queries = 10
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(mobile="09120000012", first_name="Sara", last_name="Ahmadi")
+        self.cart = Cart.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def fill(self, *courses):
+        CartItem.objects.bulk_create([CartItem(cart=self.cart, course=c) for c in courses])
+
+    def checkout(self):
+        return self.client.post("/api/cart/checkout/", {}, format="json")
+
+    def test_cart_becomes_a_pending_order(self):
+        courses = Course.objects.bulk_create([Course(title=f"C{i}", price=100 * (i + 1)) for i in range(3)])
+        self.fill(*courses)
+
+        response = self.checkout()
+        self.assertEqual(response.status_code, 201)
+        order = Order.objects.get(user=self.user)
+        self.assertEqual((order.status, order.total_price, response.json()["id"]), ("pending", 600, order.id))
+        self.assertCountEqual(order.items.values_list("course_id", "price_snapshot"), [(c.id, c.price) for c in courses])
+        self.assertFalse(CartItem.objects.filter(cart=self.cart).exists())
+
+    def test_empty_cart(self):
+        self.assertEqual(self.checkout().status_code, 400)
+        self.assertFalse(Order.objects.exists())
+
+    def test_rejections_keep_the_cart(self):
+        past = timezone.now().date() - timedelta(days=1)
+        ok = Course.objects.create(title="Ok", price=1)
+        for blocker in (
+            Course.objects.create(title="Gone", price=1, is_active=False),
+            Course.objects.create(title="Closed", price=1, course_type="online", start_date=past),
+            Enrollment.objects.create(user=self.user, course=Course.objects.create(title="Owned", price=1)).course,
+        ):
+            with self.subTest(blocker=blocker.title):
+                CartItem.objects.filter(cart=self.cart).delete()
+                self.fill(ok, blocker)
+                response = self.checkout()
+                self.assertEqual(response.status_code, 400)
+                self.assertIn(str(blocker.id), str(response.json()))
+                self.assertEqual(CartItem.objects.filter(cart=self.cart).count(), 2)
+        self.assertFalse(Order.objects.exists())
+
+    def test_incomplete_profile(self):
+        get_user_model().objects.filter(id=self.user.id).update(last_name="")
+        self.user.refresh_from_db()
+        self.fill(Course.objects.create(title="Ok", price=1))
+        self.assertEqual(self.checkout().status_code, 400)
+
+    def test_query_count_is_flat(self):
+        for size in (1, 20):
+            self.fill(*Course.objects.bulk_create([Course(title=f"C{i}", price=1) for i in range(size)]))
+            with self.assertNumQueries(self.checkout_queries):
+                self.assertEqual(self.checkout().status_code, 201)
+
+    def test_only_cart_items_are_locked(self):
+        compiler = CartCheckoutSerializer.locked_items(self.user).query.get_compiler(using="default")
+        compiler.as_sql()
+        [locked] = compiler.get_select_for_update_of_arguments()
+        self.assertTrue(locked.startswith(connection.ops.quote_name("courses_cartitem")))
+
+
+class CourseOutlineTests(TestCase):
+    def setUp(self):
+        # Runs the deferred rebuilds too, so no test starts with some pending
+        with self.captureOnCommitCallbacks(execute=True):
+            self.course = Course.objects.create(title="Outlined")
+
+    def sections(self, course_id=None):
+        return self.client.get(f"/api/courses/{course_id or self.course.id}/sections/").json()["results"]
+
+    def test_writes_in_one_transaction_rebuild_once(self):
+        with mock.patch.object(outlines._rebuilds, "func", wraps=outlines.rebuild_many) as rebuild_many, \
+                mock.patch.object(search._reindexes, "func") as reindex, \
+                self.captureOnCommitCallbacks(execute=True):
+            section = Section.objects.create(course=self.course, title="S1")
+            for i in range(5):
+                Lesson.objects.create(section=section, title=f"L{i}", order=i)
+        rebuild_many.assert_called_once_with([self.course.id])
+        reindex.assert_called_once_with([self.course.id])
+
+        body = self.sections()
+        self.assertEqual([s["title"] for s in body], ["S1"])
+        self.assertEqual([lesson["title"] for lesson in body[0]["lessons"]], [f"L{i}" for i in range(5)])
+
+    def test_saving_a_lesson_in_place_needs_no_section_lookup(self):
+        lesson = Lesson.objects.create(section=Section.objects.create(course=self.course, title="S"), title="A")
+        lesson = Lesson.objects.get(id=lesson.id)
+        lesson.title = "B"
+        with CaptureQueriesContext(connection) as ctx:
+            lesson.save()
+        self.assertFalse([q for q in ctx.captured_queries if 'FROM "courses_section"' in q["sql"]])
+
+    def test_moved_lesson_rebuilds_both_outlines(self):
+        other = Course.objects.create(title="Other")
+        lesson = Lesson.objects.create(section=Section.objects.create(course=self.course, title="S"), title="Moving")
+        target = Section.objects.create(course=other, title="T")
+        with self.captureOnCommitCallbacks(execute=True):
+            lesson.section = target
+            lesson.save()
+        self.assertEqual(self.sections()[0]["lessons"], [])
+        self.assertEqual(self.sections(other.id)[0]["lessons"][0]["title"], "Moving")
+
+    def test_missing_outline_is_rebuilt_on_read(self):
+        Section.objects.create(course=self.course, title="S")
+        CourseOutline.objects.filter(course=self.course).delete()
+        self.assertEqual([s["title"] for s in self.sections()], ["S"])
+        self.assertTrue(CourseOutline.objects.filter(course=self.course).exists())
+
+    def test_sections_view_keeps_the_page_envelope(self):
+        empty = {"count": 0, "next": None, "previous": None, "results": []}
+        response = self.client.get(f"/api/courses/{self.course.id}/sections/")
+        self.assertEqual((response.status_code, response["Content-Type"]), (200, "application/json"))
+        self.assertEqual(response.json(), empty)
+        self.assertEqual(self.client.get("/api/courses/999999/sections/").json(), empty)
+
+        # More sections than PAGE_SIZE: all on the one page
+        with self.captureOnCommitCallbacks(execute=True):
+            for i in range(7):
+                Section.objects.create(course=self.course, title=f"S{i}", order=i)
+        for path in (f"/api/courses/{self.course.id}/sections/", f"/api/async/courses/{self.course.id}/sections/"):
+            page = self.client.get(path).json()
+            self.assertEqual(list(page), ["count", "next", "previous", "results"])
+            self.assertEqual((page["count"], page["next"], page["previous"]), (7, None, None))
+            self.assertEqual(list(page["results"][0]), ["id", "title", "order", "lessons"])
+
+    def test_cascade_delete_is_flat(self):
+        counts = []
+        for size in (2, 20):
+            with self.captureOnCommitCallbacks(execute=True):
+                course = Course.objects.create(title=f"Doomed {size}")
+                section = Section.objects.create(course=course, title="S")
+                Lesson.objects.bulk_create([Lesson(section=section, title=f"L{i}") for i in range(size)])
+            with CaptureQueriesContext(connection) as ctx, self.captureOnCommitCallbacks(execute=True):
+                course.delete()
+            counts.append(len(ctx.captured_queries))
+        self.assertEqual(counts[0], counts[1])
+
+
+class CourseSearchTests(TestCase):
+    backends = ("python", "fts5")
+
+    def setUp(self):
+        # Shorter titles rank higher, so the inactive courses come first
+        self.inactive = [Course.objects.create(title="Python", is_active=False) for _ in range(3)]
+        self.active = [Course.objects.create(title=f"Python course {i}") for i in range(2)]
+        self.persian = Course.objects.create(title="برنامه\u200cنویسی پیشرفته")
+
+    def for_each_backend(self):
+        for backend in self.backends:
+            with self.subTest(backend=backend), override_settings(COURSE_SEARCH_BACKEND=backend):
+                search.rebuild()
+                yield backend
+
+    def ids(self, query, **kwargs):
+        return [cid for cid, _ in search.search_ids(query, **kwargs)]
+
+    def test_limit_applies_after_the_active_filter(self):
+        for _ in self.for_each_backend():
+            self.assertCountEqual(self.ids("pyth", limit=2), [c.id for c in self.active])
+            self.assertEqual(len(self.ids("python", limit=None, active_only=False)), 5)
+
+    def test_arabic_spelling_matches_persian_title(self):
+        for _ in self.for_each_backend():
+            self.assertEqual(self.ids("برنامه نويسي"), [self.persian.id])
+
+    def test_view_returns_active_courses(self):
+        for _ in self.for_each_backend():
+            response = self.client.get("/api/courses/search/", {"q": "python", "limit": 2})
+            self.assertCountEqual([r["id"] for r in response.json()["results"]], [c.id for c in self.active])
+
+    def test_admin_search_includes_inactive_and_says_when_capped(self):
+        self.client.force_login(get_user_model().objects.create_superuser(mobile="09120000011"))
+        url = reverse("admin:courses_course_changelist")
+        search.rebuild()
+        response = self.client.get(url, {"q": "python"})
+        self.assertEqual(response.context["cl"].result_count, 5)
+        self.assertFalse(list(response.context["messages"]))
+
+        with mock.patch.object(admin.site._registry[Course], "search_limit", 2):
+            response = self.client.get(url, {"q": "python"})
+        self.assertEqual(response.context["cl"].result_count, 2)
+        self.assertIn("2 best matches", str(list(response.context["messages"])[0]))
+
+
+class AdminChangelistBudgetTests(TestCase):
+    """
+    Every large-table changelist stays within its query budget, whatever the row count.
+    """
+
+    def setUp(self):
+        self.admin = get_user_model().objects.create_superuser(mobile="09120000009")
+        self.client.force_login(self.admin)
+
+    def add_rows(self, n):
+        users = [get_user_model().objects.create_user(mobile=f"0913{Course.objects.count():04d}{i:03d}") for i in range(n)]
+        for user in users:
+            order, courses = make_order(user, 2)
+            fulfill_order(order.id, user)
+            section = Section.objects.create(course=courses[0], title="S")
+            Lesson.objects.create(section=section, title="L")
+
+    def changelist_queries(self):
+        counts = {}
+        for model, model_admin in admin.site._registry.items():
+            if not isinstance(model_admin, LargeTableAdminMixin):
+                continue
+            url = reverse(f"admin:{model._meta.app_label}_{model._meta.model_name}_changelist")
+            with CaptureQueriesContext(connection) as ctx:
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, 200, url)
+            self.assertLessEqual(len(ctx.captured_queries), model_admin.changelist_query_budget, url)
+            counts[url] = len(ctx.captured_queries)
+        return counts
+
+    def test_budget_and_no_per_row_queries(self):
+        self.add_rows(1)
+        few = self.changelist_queries()
+        self.add_rows(5)
+        self.assertEqual(self.changelist_queries(), few)
+
+    def test_autocomplete_filter(self):
+        self.add_rows(2)
+        course = Course.objects.first()
+        url = reverse("admin:courses_enrollment_changelist")
+        response = self.client.get(url, {"course__id__exact": course.id})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context["cl"].result_count, Enrollment.objects.filter(course=course).count())
+        self.assertContains(response, "admin-autocomplete")
+        self.assertContains(response, f'<option value="{course.id}" selected>{course.title}</option>', html=True)
+
+    def test_filtered_count_is_exact_and_last_page_reachable(self):
+        self.add_rows(3)
+        url = reverse("admin:courses_enrollment_changelist")
+        total = Enrollment.objects.filter(status="active").count()
+        with mock.patch.object(admin.site._registry[Enrollment], "list_per_page", 1):
+            response = self.client.get(url, {"status__exact": "active", "p": total})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context["cl"].result_count, total)
+        self.assertEqual(len(response.context["cl"].result_list), 1)
+
+
+class CatalogImportExportTests(TestCase):
+    def setUp(self):
+        self.course = Course.objects.create(title="Python", price=500, course_type="offline")
+        section = Section.objects.create(course=self.course, title="Basics", order=1)
+        Lesson.objects.create(section=section, title="Intro", order=1, is_free_preview=True)
+        Lesson.objects.create(section=section, title="Loops", order=2, content_url="https://example.com/loops")
+
+    def export(self, fmt):
+        catalog_io.stamp_external_ids()
+        return "".join(catalog_io.write(catalog_io.export_records(), fmt))
+
+    def run_import(self, text, fmt, chunk_size=1000):
+        with self.captureOnCommitCallbacks(execute=True):
+            return catalog_io.import_records(catalog_io.read(text.splitlines(keepends=True), fmt), chunk_size)
+
+    def test_round_trip_updates_in_place(self):
+        for fmt in catalog_io.FORMATS:
+            with self.subTest(fmt=fmt):
+                stats = self.run_import(self.export(fmt), fmt, chunk_size=1)
+                self.assertEqual(
+                    (stats["courses_updated"], stats["sections_updated"], stats["lessons_updated"]), (1, 1, 2)
+                )
+                self.assertEqual(stats["lessons_created"], 0)
+                self.assertEqual((Course.objects.count(), Section.objects.count(), Lesson.objects.count()), (1, 1, 2))
+                lesson = Lesson.objects.get(title="Intro")
+                self.assertTrue(lesson.is_free_preview)
+                self.assertEqual(lesson.section.course, self.course)
+
+    def test_import_creates_tree_and_outline(self):
+        text = "\n".join([
+            '{"type": "course", "external_id": "c1", "title": "Django", "price": "900", "course_type": "online"}',
+            '{"type": "section", "external_id": "s1", "parent": "c1", "title": "Models"}',
+            '{"type": "lesson", "external_id": "l1", "parent": "s1", "title": "Fields", "order": 2}',
+        ])
+        stats = self.run_import(text, "jsonl")
+        self.assertEqual((stats["courses_created"], stats["sections_created"], stats["lessons_created"]), (1, 1, 1))
+        course = Course.objects.get(external_id="c1")
+        self.assertEqual((course.price, course.course_type, course.is_active), (900, "online", True))
+        self.assertIn("Fields", course.outline.body)
+
+    def test_bad_record_rolls_back(self):
+        text = "\n".join([
+            '{"type": "course", "external_id": "c2", "title": "Go"}',
+            '{"type": "lesson", "external_id": "l2", "parent": "missing", "title": "X"}',
+        ])
+        with self.assertRaisesMessage(catalog_io.CatalogImportError, "line 2"):
+            self.run_import(text, "jsonl")
+        self.assertFalse(Course.objects.filter(external_id="c2").exists())
+
+    def test_export_endpoint_is_admin_only_and_streams(self):
+        url = reverse("catalog-export")
+        self.assertIn(self.client.get(url).status_code, (401, 403))
+        self.client.force_login(get_user_model().objects.create_superuser(mobile="09120000010"))
+        response = self.client.get(url, {"fmt": "csv"})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        with CaptureQueriesContext(connection) as ctx:
+            body = b"".join(response.streaming_content).decode()
+        self.assertFalse([q for q in ctx.captured_queries if not q["sql"].startswith("SELECT")])
+        self.assertTrue(body.startswith("type,external_id,parent,"))
+        self.assertEqual(body.count("\n"), 5)  # header + course + section + 2 lessons
+        self.assertIn(f"course,course:{self.course.id},,Python,", body)  # stamped on create
+
+    def test_partial_update_keeps_other_fields(self):
+        Course.objects.filter(id=self.course.id).update(
+            external_id="a", is_active=False, instructor_name="Reza", price=700,
+        )
+        stats = self.run_import('{"type": "course", "external_id": "a", "title": "A2"}', "jsonl")
+        self.assertEqual((stats["courses_updated"], stats["courses_created"]), (1, 0))
+        self.course.refresh_from_db()
+        self.assertEqual(
+            (self.course.title, self.course.is_active, self.course.instructor_name, self.course.price),
+            ("A2", False, "Reza", 700),
+        )
+
+    def test_invalid_values_are_rejected_with_400(self):
+        self.client.force_login(get_user_model().objects.create_superuser(mobile="09120000017"))
+        for record, message in (
+            ('{"type": "course", "external_id": "n", "title": "N", "price": "-5"}', "invalid price"),
+            ('{"type": "course", "external_id": "n", "title": "N", "course_type": "hybrid"}', "invalid course_type"),
+            ('{"type": "course", "external_id": "n"}', "title is required"),
+        ):
+            with self.subTest(record=record):
+                upload = SimpleUploadedFile("catalog.jsonl", record.encode())
+                response = self.client.post(reverse("catalog-import"), {"file": upload})
+                self.assertEqual(response.status_code, 400)
+                self.assertIn(message, response.json()["detail"])
+        self.assertFalse(Course.objects.filter(external_id="n").exists())
+
+
+class FinanceExportTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(mobile="09120000011")
+        self.paid, _ = make_order(self.user, 3)
+        fulfill_order(self.paid.id, self.user)
+        make_order(self.user, 2)  # stays pending
+        self.client.force_login(get_user_model().objects.create_superuser(mobile="09120000012"))
+
+    def rows(self, url, params):
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return b"".join(response.streaming_content).decode().splitlines()
+
+    def test_orders_flattened_with_items(self):
+        today = timezone.localdate().isoformat()
+        lines = self.rows(reverse("finance-orders-export"), {"status": "paid", "date_from": today, "date_to": today})
+        self.assertEqual(lines[0].split(",")[:2], ["order_id", "order_created_at"])
+        self.assertEqual(len(lines), 1 + 3)
+        self.assertTrue(all(line.startswith(f"{self.paid.id},") for line in lines[1:]))
+
+        yesterday = (timezone.localdate() - timedelta(days=1)).isoformat()
+        self.assertEqual(len(self.rows(reverse("finance-orders-export"), {"date_to": yesterday})), 1)
+
+    def test_enrollments_and_filter_validation(self):
+        lines = self.rows(reverse("finance-enrollments-export"), {"status": "active"})
+        self.assertEqual(len(lines), 1 + 3)
+        response = self.client.get(reverse("finance-enrollments-export"), {"status": "paid"})
+        self.assertEqual(response.status_code, 400)
+
+    def test_formula_cells_are_neutralized(self):
+        Course.objects.filter(id=self.paid.items.first().course_id).update(title='=HYPERLINK("http://x","y")')
+        lines = self.rows(reverse("finance-orders-export"), {"status": "paid"})
+        titles = [row[-2] for row in csv.reader(lines[1:])]
+        self.assertIn("'=HYPERLINK(\"http://x\",\"y\")", titles)
+        self.assertEqual(
+            [finance_export._cell(v) for v in ("-1+2", "@SUM(A1)", "+x", "plain", -5)],
+            ["'-1+2", "'@SUM(A1)", "'+x", "plain", -5],
+        )
+
+    def test_header_before_query(self):
+        chunks = finance_export.export("orders")
+        with CaptureQueriesContext(connection) as ctx:
+            header = next(chunks)
+        self.assertEqual(len(ctx.captured_queries), 0)
+        self.assertTrue(header.startswith("order_id,"))
+
+    def test_admin_only(self):
+        self.client.force_login(self.user)
+        self.assertEqual(self.client.get(reverse("finance-orders-export")).status_code, 403)
+
+
+class DailyRollupTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(mobile="09120000013")
+        self.order, self.courses = make_order(self.user, 2)
+        Enrollment.objects.create(user=self.user, course=self.courses[0], status="cancelled")
+
+    def snapshot(self):
+        return sorted(CourseDailyStats.objects.values_list("course_id", "day", "revenue", "paid_orders", "new_enrollments"))
+
+    def test_incremental_matches_rebuild(self):
+        fulfill_order(self.order.id, self.user)
+        other = get_user_model().objects.create_user(mobile="09120000014")
+        second = Order.objects.create(user=other, total_price=self.courses[0].price)
+        OrderItem.objects.create(order=second, course=self.courses[0], price_snapshot=self.courses[0].price)
+        fulfill_order(second.id, other)
+
+        today = timezone.localdate()
+        first = CourseDailyStats.objects.get(course=self.courses[0], day=today)
+        # The cancelled enrollment was created (and counted) before the payment
+        self.assertEqual((first.revenue, first.paid_orders, first.new_enrollments), (2 * self.courses[0].price, 2, 2))
+
+        incremental = self.snapshot()
+        CourseDailyStats.objects.update(revenue=0, paid_orders=0, new_enrollments=0)
+        self.assertEqual(rollups.rebuild(), 2)
+        self.assertEqual(self.snapshot(), incremental)
+
+    def test_analytics_endpoint(self):
+        fulfill_order(self.order.id, self.user)
+        url = reverse("analytics-daily")
+        self.client.force_login(get_user_model().objects.create_superuser(mobile="09120000015"))
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url, {"course": self.courses[1].id})
+        self.assertEqual(response.status_code, 200)
+        self.assertLessEqual(len(ctx.captured_queries), 4)  # session, user, series, totals
+        self.assertEqual(response.data["totals"], {"revenue": self.courses[1].price, "paid_orders": 1, "new_enrollments": 1})
+        self.assertEqual(len(response.data["results"]), 1)
+
+        tomorrow = (timezone.localdate() + timedelta(days=1)).isoformat()
+        response = self.client.get(url, {"date_from": tomorrow})
+        self.assertEqual(response.data, {"results": [], "totals": {"revenue": 0, "paid_orders": 0, "new_enrollments": 0}})
+
+
+class CourseCounterTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(mobile="09120000016")
+        self.course = Course.objects.create(title="Counted", price=100)
+        self.other = Course.objects.create(title="Other", price=100)
+
+    def counts(self, course):
+        course.refresh_from_db()
+        return tuple(getattr(course, f) for f in counters.COUNTER_FIELDS)
+
+    def test_content_write_paths(self):
+        section = Section.objects.create(course=self.course, title="S")
+        Lesson.objects.create(section=section, title="A", is_free_preview=True)
+        lesson = Lesson.objects.create(section=section, title="B")
+        self.assertEqual(self.counts(self.course), (0, 1, 2, 1))
+
+        lesson.is_free_preview = True
+        lesson.save()
+        self.assertEqual(self.counts(self.course), (0, 1, 2, 2))
+
+        lesson.section = Section.objects.create(course=self.other, title="T")
+        lesson.save()
+        self.assertEqual(self.counts(self.course), (0, 1, 1, 1))
+        self.assertEqual(self.counts(self.other), (0, 1, 1, 1))
+
+        section.course = self.other
+        section.save()
+        self.assertEqual(self.counts(self.course), (0, 0, 0, 0))
+        self.assertEqual(self.counts(self.other), (0, 2, 2, 2))
+
+        section.delete()
+        self.assertEqual(self.counts(self.other), (0, 1, 1, 1))
+
+    def test_cascade_deletes_do_not_update_per_row(self):
+        section = Section.objects.create(course=self.course, title="S")
+        Lesson.objects.bulk_create([Lesson(section=section, title=f"L{i}", is_free_preview=i < 3) for i in range(20)])
+        Section.objects.create(course=self.course, title="Empty")
+        users = [get_user_model().objects.create_user(mobile=f"0912200{i:04d}") for i in range(20)]
+        Enrollment.objects.bulk_create([Enrollment(user=u, course=self.course) for u in users])
+        counters.recount([self.course.id])
+
+        with CaptureQueriesContext(connection) as ctx:
+            section.delete()
+        updates = [q for q in ctx.captured_queries if q["sql"].startswith("UPDATE")]
+        self.assertEqual(len(updates), 1)
+        self.assertEqual(self.counts(self.course), (20, 1, 0, 0))
+
+        with CaptureQueriesContext(connection) as ctx:
+            self.course.delete()
+        self.assertFalse([q for q in ctx.captured_queries if q["sql"].startswith("UPDATE")])
+
+    def test_enrollment_write_paths(self):
+        enrollment = Enrollment.objects.create(user=self.user, course=self.course)
+        self.assertEqual(self.counts(self.course)[0], 1)
+        enrollment.status = "cancelled"
+        enrollment.save()
+        self.assertEqual(self.counts(self.course)[0], 0)
+
+        order = Order.objects.create(user=self.user, total_price=200)
+        OrderItem.objects.bulk_create([
+            OrderItem(order=order, course=self.course, price_snapshot=100),
+            OrderItem(order=order, course=self.other, price_snapshot=100),
+        ])
+        fulfill_order(order.id, self.user)
+        self.assertEqual((self.counts(self.course)[0], self.counts(self.other)[0]), (1, 1))
+
+        Enrollment.objects.get(user=self.user, course=self.other).delete()
+        self.assertEqual(self.counts(self.other)[0], 0)
+
+    def test_cached_detail_shows_new_content_counts(self):
+        cache.clear()
+        url = f"/api/courses/{self.course.id}/"
+
+        def counts():
+            data = self.client.get(url).json()
+            return data["section_count"], data["lesson_count"], data["free_preview_count"]
+
+        self.assertEqual(counts(), (0, 0, 0))
+        with self.captureOnCommitCallbacks(execute=True):
+            section = Section.objects.create(course=self.course, title="S")
+            Lesson.objects.create(section=section, title="A", is_free_preview=True)
+        self.assertEqual(counts(), (1, 1, 1))
+        with self.captureOnCommitCallbacks(execute=True):
+            section.delete()
+        self.assertEqual(counts(), (0, 0, 0))
+
+    def test_recount_repairs_drift(self):
+        Section.objects.create(course=self.course, title="S")
+        Enrollment.objects.create(user=self.user, course=self.course)
+        Course.objects.filter(id=self.course.id).update(enrollment_count=7, section_count=0)
+        self.assertEqual(list(counters.drifted().values_list("id", flat=True)), [self.course.id])
+        self.assertEqual(counters.recount(chunk_size=1), 2)
+        self.assertEqual(self.counts(self.course), (1, 1, 0, 0))
+        self.assertFalse(counters.drifted().exists())
+
+    def test_order_by_popularity(self):
+        Enrollment.objects.create(user=self.user, course=self.other)
+        cache.clear()
+        response = self.client.get(reverse("course-list"), {"ordering": "-enrollment_count"})
+        self.assertEqual(response.status_code, 200)
+        results = response.json()["results"]
+        self.assertEqual([c["id"] for c in results[:2]], [self.other.id, self.course.id])
+        self.assertEqual(results[0]["enrollment_count"], 1)
+
+
+class SeedLoadSmokeTests(TestCase):
+    """
+    seed_load on a tiny dataset: row counts, the derived data it rebuilds,
+    and bench_api driving every route against the result.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        call_command(
+            "seed_load", users=30, courses=6, sections=2, lessons=2, enrollments=60, carts=5, orders=12,
+            chunk_size=7, seed=3, stdout=StringIO(),
+        )
+
+    def test_row_counts(self):
+        self.assertEqual(get_user_model().objects.count(), 30)
+        self.assertEqual(Course.objects.count(), 6)
+        self.assertEqual(Cart.objects.count(), 5)
+        self.assertEqual(Order.objects.count(), 12)
+        # Enrollments that repeat a (user, course) pair are dropped
+        self.assertTrue(0 < Enrollment.objects.count() <= 60)
+        self.assertGreaterEqual(Section.objects.count(), 6)
+        self.assertGreaterEqual(Lesson.objects.count(), Section.objects.count())
+        self.assertFalse(OrderItem.objects.filter(order__isnull=True).exists())
+
+    def test_derived_data_matches_the_source_tables(self):
+        self.assertFalse(counters.drifted().exists())
+        self.assertFalse(
+            Enrollment.objects.filter(status="active", access_expires_at__lte=timezone.now()).exists()
+        )
+        for model in (Course, Section, Lesson):
+            self.assertFalse(model.objects.filter(external_id__isnull=True).exists())
+
+        paid = OrderItem.objects.filter(order__status="paid")
+        stats = CourseDailyStats.objects.aggregate(
+            revenue=Sum("revenue"), paid_orders=Sum("paid_orders"), new_enrollments=Sum("new_enrollments"),
+        )
+        self.assertEqual(stats["revenue"], paid.aggregate(total=Sum("price_snapshot"))["total"])
+        self.assertEqual(stats["paid_orders"], paid.values("order_id", "course_id").distinct().count())
+        self.assertEqual(stats["new_enrollments"], Enrollment.objects.count())
+
+        for course in Course.objects.all():
+            with self.subTest(course=course.title):
+                stored = CourseOutline.objects.get(course=course)
+                self.assertEqual((stored.body, stored.section_count), outlines.rebuild(course.id))
+                self.assertIn(course.id, [cid for cid, _ in search.search_ids(course.title, None, active_only=False)])
+
+    def test_bench_api_runs_every_route(self):
+        out = StringIO()
+        call_command("bench_api", iterations=1, stdout=out)
+        report = json.loads(out.getvalue())
+        # catalog-import has no spec; the others need rows this tiny seed may not have
+        skipped = {name for name, result in report.items() if "skipped" in result}
+        self.assertLessEqual(skipped, {"catalog-import", "course-delete", "cart-remove"})
+        for name, result in report.items():
+            with self.subTest(route=name):
+                if "skipped" in result:
+                    continue
+                self.assertTrue(all(status < 500 for status in result["status"]), result)
+                self.assertGreater(result["bytes"], 0)
+        self.assertEqual(report["course-list"]["status"], [200])
+
+
+class PrimaryReplicaRouterTests(SimpleTestCase):
+    def setUp(self):
+        self.router = db_router.PrimaryReplicaRouter()
+        self.router.replica_configured = lambda: True
+        token = db_router._pinned.set(False)
+        self.addCleanup(db_router._pinned.reset, token)
+
+    def test_catalog_reads_go_to_replica(self):
+        self.assertEqual(self.router.db_for_read(Course), "replica")
+        self.assertEqual(self.router.db_for_read(Lesson), "replica")
+        self.assertEqual(self.router.db_for_read(Order), "default")
+
+    def test_write_pins_reads_to_primary(self):
+        self.assertEqual(self.router.db_for_write(Enrollment), "default")
+        self.assertEqual(self.router.db_for_read(Course), "default")
+
+    def test_transaction_reads_primary(self):
+        with mock.patch.object(connections["default"], "in_atomic_block", True):
+            self.assertEqual(self.router.db_for_read(Course), "default")
+
+    def test_no_replica_configured(self):
+        self.router.replica_configured = lambda: False
+        self.assertEqual(self.router.db_for_read(Course), "default")
+
+@skipUnless(connection.vendor == "postgresql", "needs a server database for real concurrent writers")
+class ConcurrentFulfillmentTests(TransactionTestCase):
+    def test_exactly_one_winner(self):
+        user = get_user_model().objects.create_user(mobile="09120000003")
+        order, courses = make_order(user, 5)
+
+        workers = 8
+        barrier = threading.Barrier(workers)
+        winners, losers = [], []
+
+        def pay():
+            try:
+                barrier.wait()
+                fulfill_order(order.id, user)
+                winners.append(1)
+            except OrderNotPayable:
+                losers.append(1)
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=pay) for _ in range(workers)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        self.assertEqual(len(winners), 1)
+        self.assertEqual(len(losers), workers - 1)
+        self.assertEqual(Enrollment.objects.filter(user=user).count(), len(courses))
@@ -1,35 +1,70 @@
+import codecs
 from rest_framework.generics import ListAPIView, RetrieveAPIView, CreateAPIView, UpdateAPIView, DestroyAPIView
 from rest_framework.permissions import AllowAny, IsAdminUser , IsAuthenticated
 from rest_framework import filters
 from rest_framework.response import Response
+from rest_framework.views import APIView
+from django.http import HttpResponse, StreamingHttpResponse
 from rest_framework import status
-from .models import Course, Enrollment, Section, Lesson , Order, OrderItem , Cart , CartItem
-from .serializers import (CourseSerializer, EnrollmentSerializer, SectionSerializer,
+from .models import Course, Enrollment, Lesson , Order, OrderItem , CartItem
+from .serializers import (CourseSerializer, EnrollmentSerializer,
     LessonPublicSerializer, LessonDetailSerializer , OrderSerializer, OrderCreateSerializer,
-    CartItemSerializer , AddToCartSerializer)
+    CartItemSerializer , AddToCartSerializer, BulkAddToCartSerializer, CartCheckoutSerializer,
+    FinanceExportFilterSerializer, AnalyticsFilterSerializer)
 from .filters import CourseFilter
 from .permissions import IsEnrolledOrPreview
-from django.utils import timezone
-
-class CourseListView(ListAPIView):
+from .pagination import KeysetPagination
+from .catalog_cache import CatalogCacheMixin
+from .fast_serializers import FastListMixin
+from . import carts, catalog_io, entitlements, finance_export, outlines, rollups, search
+from .fulfillment import fulfill_order, OrderNotPayable
+from jobs.queue import enqueue_on_commit
+from django.db import DataError, IntegrityError, transaction
+
+class CourseListView(CatalogCacheMixin, FastListMixin, ListAPIView):
     permission_classes = [AllowAny]
+    catalog_scope = "course-list"
     serializer_class = CourseSerializer
+    pagination_class = KeysetPagination
     filterset_class = CourseFilter                  
     filter_backends = [                            
         filters.OrderingFilter,
     ]
-    ordering_fields = ["created_at", "price", "title"]  
+    ordering_fields = ["created_at", "price", "title", "enrollment_count", "lesson_count"]
     ordering = ["-created_at"]                         
 
     def get_queryset(self):
         return Course.objects.filter(is_active=True).order_by("-created_at")
 
-class CourseDetailView(RetrieveAPIView):
+class CourseDetailView(CatalogCacheMixin, RetrieveAPIView):
     permission_classes = [AllowAny]
+    catalog_scope = "course-detail"
     serializer_class = CourseSerializer
     queryset = Course.objects.filter(is_active=True)
     lookup_field = "id"
 
+class CourseSearchView(APIView):
+    """
+    Ranked full-text search over course, instructor, section and lesson titles.
+    Query: ?q=<text>&limit=<n>
+    """
+    permission_classes = [AllowAny]
+    default_limit = 20
+    max_limit = 50
+
+    def get(self, request, *args, **kwargs):
+        query = request.query_params.get("q", "").strip()
+        try:
+            limit = int(request.query_params.get("limit", self.default_limit))
+        except ValueError:
+            limit = self.default_limit
+        limit = max(1, min(limit, self.max_limit))
+
+        ranked = search.search_ids(query, limit)
+        courses = Course.objects.filter(is_active=True).in_bulk([cid for cid, _ in ranked])
+        results = [courses[cid] for cid, _ in ranked if cid in courses]
+        return Response({"query": query, "results": CourseSerializer(results, many=True).data})
+
 class CourseCreateView(CreateAPIView):
     permission_classes = [IsAdminUser]
     serializer_class = CourseSerializer
@@ -48,9 +83,99 @@ class CourseDeleteView(DestroyAPIView):
     lookup_field = "id"
 
 
-class MyEnrollmentListView(ListAPIView):
+class CatalogExportView(APIView):
+    """
+    Whole catalog as JSONL (default) or CSV, streamed: ?fmt=jsonl|csv.
+    Same format as the export_catalog command.
+    """
+    permission_classes = [IsAdminUser]
+
+    def get(self, request, *args, **kwargs):
+        fmt = request.query_params.get("fmt", "jsonl")
+        if fmt not in catalog_io.FORMATS:
+            return Response({"detail": "fmt must be jsonl or csv"}, status=status.HTTP_400_BAD_REQUEST)
+
+        response = StreamingHttpResponse(
+            catalog_io.write(catalog_io.export_records(), fmt),
+            content_type=catalog_io.CONTENT_TYPES[fmt],
+        )
+        response["Content-Disposition"] = f'attachment; filename="catalog.{fmt}"'
+        return response
+
+
+class CatalogImportView(APIView):
+    """
+    Multipart upload: file=<catalog.jsonl|catalog.csv>, optional fmt=jsonl|csv
+    (defaults to the file extension). Upserts by external_id; all or nothing.
+    Very large catalogs are better loaded with the import_catalog command.
+    """
+    permission_classes = [IsAdminUser]
+
+    def post(self, request, *args, **kwargs):
+        upload = request.FILES.get("file")
+        if upload is None:
+            return Response({"detail": "file is required"}, status=status.HTTP_400_BAD_REQUEST)
+        fmt = request.data.get("fmt") or ("csv" if upload.name.lower().endswith(".csv") else "jsonl")
+        if fmt not in catalog_io.FORMATS:
+            return Response({"detail": "fmt must be jsonl or csv"}, status=status.HTTP_400_BAD_REQUEST)
+
+        lines = codecs.iterdecode(upload, "utf-8-sig")
+        try:
+            stats = catalog_io.import_records(catalog_io.read(lines, fmt))
+        except (catalog_io.CatalogImportError, UnicodeDecodeError) as e:
+            return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except (IntegrityError, DataError) as e:
+            # Whatever validation missed (e.g. an external_id created concurrently)
+            return Response({"detail": f"rejected by the database: {e}"}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(stats)
+
+
+class FinanceExportView(APIView):
+    """
+    Streamed CSV for finance. Query: date_from, date_to (YYYY-MM-DD, inclusive), status;
+    orders also take by=created|paid (which date the range applies to).
+    """
+    permission_classes = [IsAdminUser]
+    dataset = None
+
+    def get(self, request, *args, **kwargs):
+        params = FinanceExportFilterSerializer(data=request.query_params, context={"dataset": self.dataset})
+        params.is_valid(raise_exception=True)
+
+        response = StreamingHttpResponse(
+            finance_export.export(self.dataset, **params.validated_data), content_type="text/csv",
+        )
+        response["Content-Disposition"] = f'attachment; filename="{self.dataset}.csv"'
+        return response
+
+
+class FinanceOrdersExportView(FinanceExportView):
+    dataset = "orders"
+
+
+class FinanceEnrollmentsExportView(FinanceExportView):
+    dataset = "enrollments"
+
+
+class DailyAnalyticsView(APIView):
+    """
+    Revenue, paid orders and new enrollments per day, from the rollup table.
+    Query: date_from, date_to (inclusive), course (id).
+    """
+    permission_classes = [IsAdminUser]
+
+    def get(self, request, *args, **kwargs):
+        params = AnalyticsFilterSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        query = params.validated_data
+        days, totals = rollups.daily_series(query.get("date_from"), query.get("date_to"), query.get("course"))
+        return Response({"results": days, "totals": totals})
+
+
+class MyEnrollmentListView(FastListMixin, ListAPIView):
     permission_classes = [IsAuthenticated]
     serializer_class = EnrollmentSerializer
+    pagination_class = KeysetPagination
 
     def get_queryset(self):
         return Enrollment.objects.filter(user=self.request.user).select_related("course")
@@ -65,61 +190,30 @@ class EnrollmentCreateView(CreateAPIView):
         
         
 
-class CourseSectionsView(ListAPIView):
-   
+class CourseSectionsView(APIView):
+    """
+    Section → lesson outline of a course, served from the stored CourseOutline
+    in the usual page envelope; every section is on the one page.
+    """
     permission_classes = [AllowAny]
-    serializer_class = SectionSerializer
 
-    def get_queryset(self):
-        course_id = self.kwargs["id"]
-        return Section.objects.filter(course_id=course_id).prefetch_related("lessons")
+    def get(self, request, *args, **kwargs):
+        body = outlines.get_body(self.kwargs["id"])
+        return HttpResponse(body, content_type="application/json")
     
 
 class CourseLessonsListView(ListAPIView):
     permission_classes = [AllowAny]
 
-    def _has_active_access(self, user, course_id):
-        """
-        Returns True if user is enrolled and (for offline courses) access is not expired.
-        """
-        if not (user and user.is_authenticated):
-            return False
-
-        try:
-            course = Course.objects.get(id=course_id)
-        except Course.DoesNotExist:
-            return False
-
-        # User must be enrolled and active
-        enrolled = Enrollment.objects.filter(
-            user=user,
-            course_id=course_id,
-            status="active"
-        ).exists()
-        if not enrolled:
-            return False
-
-        # For offline courses, enforce access end date
-        today = timezone.now().date()
-        if course.course_type == "offline" and course.end_date:
-            if today > course.end_date:
-                # Access expired
-                return False
-
-        return True
-
     def get_queryset(self):
         course_id = self.kwargs["id"]
         qs = Lesson.objects.filter(
             section__course_id=course_id
         ).select_related("section", "section__course")
 
-        user = self.request.user
-        has_access = self._has_active_access(user, course_id)
-
         # If user has active access → full lessons
         # Otherwise → only free preview lessons
-        if has_access:
+        if entitlements.has_full_access(self.request, course_id):
             return qs
         return qs.filter(is_free_preview=True)
 
@@ -127,8 +221,8 @@ class CourseLessonsListView(ListAPIView):
         course_id = self.kwargs["id"]
         queryset = self.get_queryset()
 
-        # Use the same logic as get_queryset to decide serializer
-        enrolled_with_access = self._has_active_access(request.user, course_id)
+        # Memoized on the request, so this does not hit the database again
+        enrolled_with_access = entitlements.has_full_access(request, course_id)
 
         from .serializers import LessonDetailSerializer, LessonPublicSerializer
         ser_class = LessonDetailSerializer if enrolled_with_access else LessonPublicSerializer
@@ -136,7 +230,6 @@ class CourseLessonsListView(ListAPIView):
         return Response(serializer.data, status=status.HTTP_200_OK)
 
 
-from django.utils import timezone
 from rest_framework.permissions import AllowAny
 from rest_framework.generics import RetrieveAPIView
 from rest_framework.exceptions import PermissionDenied
@@ -161,11 +254,8 @@ class LessonDetailView(RetrieveAPIView):
             self.permission_denied(self.request, message=perm.message)
 
         #  Additional rule for offline courses: access expiry
-        course = obj.section.course
-        today = timezone.now().date()
-
-        if course.course_type == "offline" and course.end_date:
-            if today > course.end_date and not obj.is_free_preview:
+        if not obj.is_free_preview:
+            if entitlements.get_access(self.request, obj.section.course_id) == entitlements.EXPIRED:
                 # Access to this offline content is expired
                 raise PermissionDenied("Access to this offline course has expired.")
 
@@ -175,9 +265,10 @@ class LessonDetailView(RetrieveAPIView):
 #################################
 
  
-class MyOrdersListView(ListAPIView):
+class MyOrdersListView(FastListMixin, ListAPIView):
     permission_classes = [IsAuthenticated]
     serializer_class = OrderSerializer
+    pagination_class = KeysetPagination
     def get_queryset(self):
         return Order.objects.filter(user=self.request.user).prefetch_related("items", "items__course")
 
@@ -219,50 +310,75 @@ class OrderPayView(CreateAPIView):
     def post(self, request, *args, **kwargs):
         order_id = kwargs.get("id")
         try:
-            order = Order.objects.select_related("user").prefetch_related("items", "items__course").get(id=order_id, user=request.user)
-        except Order.DoesNotExist:
-            return Response({"detail": "Order not found."}, status=status.HTTP_404_NOT_FOUND)
+            fulfill_order(order_id, request.user)
+        except OrderNotPayable as e:
+            if e.status is None:
+                return Response({"detail": "Order not found."}, status=status.HTTP_404_NOT_FOUND)
+            return Response({"detail": f"Order already {e.status}."}, status=status.HTTP_400_BAD_REQUEST)
 
-        if order.status != "pending":
-            return Response({"detail": f"Order already {order.status}."}, status=status.HTTP_400_BAD_REQUEST)
-
-
-        order.status = "paid"
-        order.paid_at = timezone.now()
-        order.save(update_fields=["status", "paid_at"])
-
-
-        for item in order.items.all():
-            Enrollment.objects.get_or_create(
-                user=request.user,
-                course=item.course,
-                defaults={"status": "active"},
-            )
+        # Side effects run in the job worker, not in this request
+        enqueue_on_commit("courses.send_order_receipt", order_id=order_id)
 
+        order = Order.objects.prefetch_related("items", "items__course").get(id=order_id)
         return Response(OrderSerializer(order).data, status=status.HTTP_200_OK)
 
 ###########################################
 
-class CartListView(ListAPIView):
+class CartListView(FastListMixin, ListAPIView):
     permission_classes = [IsAuthenticated]
     serializer_class = CartItemSerializer
 
     def get_queryset(self):
-        # Each user has one cart; create it if it doesn't exist
-        cart, _ = Cart.objects.get_or_create(user=self.request.user)
-        return cart.items.select_related("course")
-    
+        # No cart yet simply means no items; nothing needs creating on a read
+        return CartItem.objects.filter(cart__user=self.request.user).select_related("course")
+
+
+class CartSummaryView(APIView):
+    """
+    Item count, totals and items checkout would reject, in one cached response.
+    "version" changes whenever the summary does.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, *args, **kwargs):
+        return Response(carts.get_summary(request.user.id))
+
+
 class AddToCartView(CreateAPIView):
+    """
+    Body: { "course_id": 1 } or, for several at once, { "course_ids": [1, 2, 3] }.
+    The list form answers 201 with a result per ID if anything was added, else 400.
+    """
     permission_classes = [IsAuthenticated]
     serializer_class = AddToCartSerializer
 
+    def get_serializer_class(self):
+        if "course_ids" in self.request.data:
+            return BulkAddToCartSerializer
+        return AddToCartSerializer
+
     def create(self, request, *args, **kwargs):
+        if "course_ids" in request.data:
+            return self.create_many(request)
+
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         item = serializer.save()  # returns CartItem
+        carts.bump_version(request.user.id)
 
         output_data = CartItemSerializer(item).data
         return Response(output_data, status=status.HTTP_201_CREATED)
+
+    def create_many(self, request):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        results = serializer.save()
+
+        added = any(r["result"] == "added" for r in results)
+        return Response(
+            {"results": results},
+            status=status.HTTP_201_CREATED if added else status.HTTP_400_BAD_REQUEST,
+        )
     
 class RemoveFromCartView(DestroyAPIView):
     permission_classes = [IsAuthenticated]
@@ -271,3 +387,32 @@ class RemoveFromCartView(DestroyAPIView):
     def get_queryset(self):
         # Only allow deleting items from the current user's cart
         return CartItem.objects.filter(cart__user=self.request.user)
+
+    def perform_destroy(self, instance):
+        instance.delete()
+        carts.bump_version(self.request.user.id)
+
+class CartCheckoutView(CreateAPIView):
+    """
+    Turn the whole cart into a pending order in one transaction.
+    Body: {}
+    """
+    permission_classes = [IsAuthenticated]
+    serializer_class = CartCheckoutSerializer
+
+    def create(self, request, *args, **kwargs):
+        if not request.user.is_profile_complete():
+            return Response(
+                {
+                    "detail": "please enter your name and firstname"
+                },
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        with transaction.atomic():
+            ser = self.get_serializer(data=request.data)
+            ser.is_valid(raise_exception=True)
+            order = ser.save()
+
+        order = Order.objects.prefetch_related("items", "items__course").get(pk=order.pk)
+        return Response(OrderSerializer(order).data, status=status.HTTP_201_CREATED)
@@ -0,0 +1,18 @@
+from django.contrib import admin
+from django.utils import timezone
+from .models import Job
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ("id", "name", "status", "attempts", "max_attempts", "run_at", "finished_at")
+    list_filter = ("status", "name")
+    search_fields = ("name",)
+    ordering = ("-id",)
+    readonly_fields = ("claimed_by", "claimed_at", "last_error", "created_at", "finished_at")
+    actions = ["requeue"]
+
+    @admin.action(description="Requeue selected jobs")
+    def requeue(self, request, queryset):
+        n = queryset.exclude(status="running").update(status="queued", attempts=0, run_at=timezone.now(), last_error="")
+        self.message_user(request, f"Requeued {n} jobs.")
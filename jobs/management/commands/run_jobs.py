@@ -0,0 +1,73 @@
+import os
+import signal
+import socket
+import time
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, FIRST_COMPLETED, wait
+from django.core.management.base import BaseCommand
+from django.db import connections
+from jobs import queue
+
+
+def _process_init():
+    # Spawned children (macOS/Windows) start without Django configured
+    import django
+    django.setup()
+
+
+def _run(job_id, claimed_by):
+    try:
+        return queue.run_job(job_id, claimed_by)
+    finally:
+        # Pool threads/processes are long-lived; don't leak one connection each
+        connections.close_all()
+
+
+class Command(BaseCommand):
+    help = "Run the background job worker."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--concurrency", type=int, default=4, help="Jobs run in parallel.")
+        parser.add_argument("--pool", choices=["thread", "process"], default="thread")
+        parser.add_argument("--poll-interval", type=float, default=1.0, help="Seconds to sleep when idle.")
+        parser.add_argument("--once", action="store_true", help="Drain due jobs and exit.")
+
+    def handle(self, *args, **options):
+        concurrency = options["concurrency"]
+        worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self.stopping = False
+        signal.signal(signal.SIGINT, self._stop)
+        signal.signal(signal.SIGTERM, self._stop)
+
+        if options["pool"] == "process":
+            # Children must not share the parent's database sockets
+            connections.close_all()
+            pool = ProcessPoolExecutor(max_workers=concurrency, initializer=_process_init)
+        else:
+            pool = ThreadPoolExecutor(max_workers=concurrency)
+
+        self.stdout.write(f"Worker {worker_id}: {options['pool']} pool x{concurrency}")
+        running = set()
+        last_reap = 0.0
+        with pool:
+            while not self.stopping:
+                if time.monotonic() - last_reap > 60:
+                    queue.requeue_stale()
+                    last_reap = time.monotonic()
+
+                free = concurrency - len(running)
+                jobs = queue.claim(free, worker_id) if free else []
+                running.update(pool.submit(_run, job.id, job.claimed_by) for job in jobs)
+
+                if not running:
+                    if options["once"]:
+                        break
+                    time.sleep(options["poll_interval"])
+                    continue
+
+                _, running = wait(running, timeout=options["poll_interval"], return_when=FIRST_COMPLETED)
+
+            wait(running)
+        self.stdout.write("Worker stopped.")
+
+    def _stop(self, signum, frame):
+        self.stopping = True
@@ -0,0 +1,32 @@
+from django.db import models
+from django.utils import timezone
+
+
+class Job(models.Model):
+    STATUS_CHOICES = [
+        ("queued", "Queued"),
+        ("running", "Running"),
+        ("done", "Done"),
+        ("dead", "Dead"),   # gave up after max_attempts
+    ]
+
+    name = models.CharField(max_length=100)                 # registered handler name
+    payload = models.JSONField(default=dict, blank=True)    # handler kwargs
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default="queued")
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=5)
+    run_at = models.DateTimeField(default=timezone.now)     # not picked up before this
+    claimed_by = models.CharField(max_length=64, blank=True)
+    claimed_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ("run_at", "id")
+        indexes = [
+            models.Index(fields=["status", "run_at", "id"], name="job_status_run_at_idx"),
+        ]
+
+    def __str__(self):
+        return f"Job #{self.pk} {self.name} ({self.status})"
@@ -0,0 +1,148 @@
+import logging
+import random
+import traceback
+import uuid
+from datetime import timedelta
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+_handlers = {}
+
+BACKOFF_BASE_SECONDS = 10
+BACKOFF_MAX_SECONDS = 60 * 60
+STALE_AFTER = timedelta(minutes=15)   # running this long → assume the worker died
+
+
+def task(name):
+    """
+    Register a job handler:
+
+        @task("courses.send_order_receipt")
+        def send_order_receipt(order_id): ...
+    """
+    def decorator(func):
+        _handlers[name] = func
+        return func
+    return decorator
+
+
+def enqueue(name, *, run_at=None, max_attempts=5, **payload):
+    """
+    Insert a job now. Inside a transaction the job commits (or rolls back) with it.
+    """
+    if name not in _handlers:
+        raise ValueError(f"Unknown job: {name}")
+    return Job.objects.create(
+        name=name,
+        payload=payload,
+        run_at=run_at or timezone.now(),
+        max_attempts=max_attempts,
+    )
+
+
+def enqueue_on_commit(name, **kwargs):
+    """
+    Insert a job once the current transaction commits; what views call after a write.
+    """
+    if name not in _handlers:
+        raise ValueError(f"Unknown job: {name}")
+    transaction.on_commit(lambda: enqueue(name, **kwargs))
+
+
+def claim(limit, worker_id=None):
+    """
+    Claim up to `limit` due jobs for this worker and return them.
+
+    select_for_update(skip_locked) keeps concurrent workers off each other's
+    rows where the database supports it; the conditional UPDATE with a fresh
+    claim token makes the claim exclusive everywhere else (e.g. SQLite).
+    """
+    token = f"{worker_id or 'worker'}:{uuid.uuid4().hex[:12]}"
+    now = timezone.now()
+    with transaction.atomic():
+        ids = list(
+            Job.objects.select_for_update(skip_locked=True)
+            .filter(status="queued", run_at__lte=now)
+            .order_by("run_at", "id")
+            .values_list("id", flat=True)[:limit]
+        )
+        if not ids:
+            return []
+        Job.objects.filter(id__in=ids, status="queued").update(
+            status="running", claimed_by=token, claimed_at=now
+        )
+        # Read back in the same transaction: if this fails, the claim rolls back
+        # instead of leaving jobs running with no worker until requeue_stale()
+        return list(Job.objects.filter(claimed_by=token, status="running"))
+
+
+def backoff(attempts):
+    # Exponential with full jitter, so a burst of failures does not retry in lockstep
+    delay = min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * 2 ** max(attempts - 1, 0))
+    return timedelta(seconds=random.uniform(delay / 2, delay))
+
+
+def _record(job, **fields):
+    """
+    Write a run's outcome only while this worker still holds the claim.
+    requeue_stale() may have handed the job to another worker meanwhile;
+    that worker's run owns the row now.
+    """
+    updated = Job.objects.filter(id=job.id, status="running", claimed_by=job.claimed_by).update(**fields)
+    if not updated:
+        logger.warning("Job %s (%s) was reclaimed while running; outcome not recorded", job.id, job.name)
+    return bool(updated)
+
+
+def run_job(job_id, claimed_by=None):
+    """
+    Execute one claimed job and record the outcome. Safe to call from a pool worker.
+    claimed_by is the claim token from claim(); a job reclaimed by another
+    worker before it starts is skipped. Returns True if it succeeded and the
+    outcome was recorded.
+    """
+    job = Job.objects.get(id=job_id)
+    if claimed_by is not None and (job.status, job.claimed_by) != ("running", claimed_by):
+        logger.warning("Job %s (%s) was reclaimed before it started; skipped", job.id, job.name)
+        return False
+    attempts = job.attempts + 1
+    handler = _handlers.get(job.name)
+
+    try:
+        if handler is None:
+            raise LookupError(f"No handler registered for {job.name!r}")
+        handler(**job.payload)
+    except Exception:
+        error = traceback.format_exc()
+        if attempts >= job.max_attempts:
+            if _record(job, status="dead", attempts=attempts, last_error=error, finished_at=timezone.now()):
+                logger.error("Job %s (%s) is dead after %s attempts", job.id, job.name, attempts)
+        elif _record(
+            job, status="queued", attempts=attempts, last_error=error,
+            run_at=timezone.now() + backoff(attempts), claimed_by="",
+        ):
+            logger.warning("Job %s (%s) failed, attempt %s", job.id, job.name, attempts)
+        return False
+
+    return _record(job, status="done", attempts=attempts, finished_at=timezone.now())
+
+
+def requeue_stale():
+    """
+    Put back jobs whose worker died mid-run. Returns the number requeued.
+    The lost run counts as an attempt, so a job that keeps killing its worker
+    goes dead at max_attempts instead of cycling forever.
+    """
+    stale = Job.objects.filter(status="running", claimed_at__lt=timezone.now() - STALE_AFTER)
+    with transaction.atomic():
+        dead = stale.filter(attempts__gte=F("max_attempts") - 1).update(
+            status="dead", attempts=F("attempts") + 1, claimed_by="", finished_at=timezone.now(),
+            last_error="Worker stopped responding mid-run",
+        )
+        if dead:
+            logger.error("%s stale jobs are dead after max_attempts", dead)
+        return stale.update(status="queued", attempts=F("attempts") + 1, claimed_by="")
@@ -0,0 +1,151 @@
+import threading
+import time
+from unittest import mock
+from django.db import OperationalError, connections
+from django.test import TestCase, TransactionTestCase
+from django.utils import timezone
+from . import queue
+from .models import Job
+
+
+def make_jobs(n, **fields):
+    return Job.objects.bulk_create([Job(name="tests.noop", **fields) for _ in range(n)])
+
+
+class ClaimConcurrencyTests(TransactionTestCase):
+    def test_concurrent_claims_are_exclusive(self):
+        make_jobs(40)
+        workers = 8
+        barrier = threading.Barrier(workers)
+        claimed = []
+
+        def work(n):
+            try:
+                barrier.wait()
+                while True:
+                    try:
+                        jobs = queue.claim(3, f"w{n}")
+                    except OperationalError:
+                        # The in-memory test database locks whole tables instead of waiting
+                        time.sleep(0.001)
+                        continue
+                    if not jobs:
+                        return
+                    claimed.extend(job.id for job in jobs)
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=work, args=(n,)) for n in range(workers)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        # Every job claimed exactly once
+        self.assertEqual(sorted(claimed), sorted(Job.objects.values_list("id", flat=True)))
+        self.assertEqual(Job.objects.filter(status="running").count(), 40)
+
+
+class JobQueueTests(TestCase):
+    def setUp(self):
+        self.calls = []
+        patcher = mock.patch.dict(queue._handlers, {"tests.noop": self.noop, "tests.fail": self.fail_job})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def noop(self, **payload):
+        self.calls.append(payload)
+
+    def fail_job(self, **payload):
+        raise RuntimeError("boom")
+
+    def test_claim_takes_only_due_queued_jobs(self):
+        [due] = make_jobs(1)
+        make_jobs(1, run_at=timezone.now() + queue.STALE_AFTER)
+        make_jobs(1, status="done")
+        self.assertEqual([job.id for job in queue.claim(10, "a")], [due.id])
+        self.assertEqual(queue.claim(10, "b"), [])
+
+    def test_success_is_recorded(self):
+        job = queue.enqueue("tests.noop", run_at=timezone.now())
+        [claimed] = queue.claim(1, "a")
+        self.assertTrue(queue.run_job(claimed.id, claimed.claimed_by))
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ("done", 1))
+        self.assertIsNotNone(job.finished_at)
+
+    def test_failures_back_off_then_die(self):
+        job = Job.objects.create(name="tests.fail", max_attempts=2)
+        [claimed] = queue.claim(1, "a")
+        self.assertFalse(queue.run_job(claimed.id, claimed.claimed_by))
+
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts, job.claimed_by), ("queued", 1, ""))
+        self.assertIn("boom", job.last_error)
+        self.assertGreater(job.run_at, timezone.now())
+        self.assertEqual(queue.claim(1, "a"), [])  # not due yet
+
+        Job.objects.filter(id=job.id).update(run_at=timezone.now())
+        [claimed] = queue.claim(1, "a")
+        self.assertFalse(queue.run_job(claimed.id, claimed.claimed_by))
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ("dead", 2))
+        self.assertIsNotNone(job.finished_at)
+
+    def test_backoff_grows_and_is_capped(self):
+        with mock.patch("jobs.queue.random.uniform", side_effect=lambda low, high: high):
+            delays = [queue.backoff(n).total_seconds() for n in (1, 2, 3, 20)]
+        self.assertEqual(delays, [10, 20, 40, queue.BACKOFF_MAX_SECONDS])
+
+    def test_requeue_stale(self):
+        stale, fresh = make_jobs(2)
+        queue.claim(2, "a")
+        Job.objects.filter(id=stale.id).update(claimed_at=timezone.now() - queue.STALE_AFTER * 2)
+
+        self.assertEqual(queue.requeue_stale(), 1)
+        self.assertEqual(
+            dict(Job.objects.values_list("id", "status")), {stale.id: "queued", fresh.id: "running"}
+        )
+        self.assertEqual(Job.objects.get(id=stale.id).attempts, 1)
+
+    def test_requeue_stale_gives_up_at_max_attempts(self):
+        [job] = make_jobs(1, max_attempts=2)
+        for expected in (("queued", 1), ("dead", 2)):
+            queue.claim(1, "a")
+            Job.objects.filter(id=job.id).update(claimed_at=timezone.now() - queue.STALE_AFTER * 2)
+            queue.requeue_stale()
+            job.refresh_from_db()
+            self.assertEqual((job.status, job.attempts), expected)
+        self.assertIsNotNone(job.finished_at)
+        self.assertEqual(queue.claim(1, "a"), [])
+
+    def reclaim(self, job_id):
+        Job.objects.filter(id=job_id).update(claimed_at=timezone.now() - queue.STALE_AFTER * 2)
+        queue.requeue_stale()
+        [job] = queue.claim(1, "b")
+        return job
+
+    def test_reclaimed_job_keeps_the_new_workers_outcome(self):
+        [job] = make_jobs(1)
+        [first] = queue.claim(1, "a")
+        second = {}
+        # The first run is still going when the job is considered stale and reclaimed
+        queue._handlers["tests.noop"] = lambda: second.setdefault("job", self.reclaim(job.id))
+
+        self.assertFalse(queue.run_job(first.id, first.claimed_by))
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.claimed_by, job.attempts), ("running", second["job"].claimed_by, 1))
+
+        queue._handlers["tests.noop"] = lambda: None
+        self.assertTrue(queue.run_job(job.id, second["job"].claimed_by))
+        job.refresh_from_db()
+        self.assertEqual(job.status, "done")
+
+    def test_job_reclaimed_before_start_is_skipped(self):
+        [job] = make_jobs(1)
+        [first] = queue.claim(1, "a")
+        self.reclaim(job.id)
+
+        self.assertFalse(queue.run_job(first.id, first.claimed_by))
+        self.assertEqual(self.calls, [])
+        self.assertEqual(Job.objects.get(id=job.id).status, "running")
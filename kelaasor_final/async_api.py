@@ -0,0 +1,48 @@
+"""
+Plumbing for the native async read endpoints (courses/async_views.py, users/async_views.py).
+
+They are plain Django async views, so under ASGI a request never leaves the
+event loop: no DRF request cycle, JSON only, token authentication only.
+Response bodies are the same bytes the DRF views produce.
+"""
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.http import HttpResponse
+from django.views import View
+from rest_framework.exceptions import APIException, AuthenticationFailed, NotAuthenticated
+from rest_framework.renderers import JSONRenderer
+from users.authentication import CachedTokenAuthentication
+
+
+def json_response(data, status=200):
+    return HttpResponse(JSONRenderer().render(data), content_type="application/json", status=status)
+
+
+def select_view(sync_view, async_view, **initkwargs):
+    """
+    The view served on a primary URL: the async twin when settings.ASYNC_VIEWS is on.
+    """
+    view = async_view if getattr(settings, "ASYNC_VIEWS", False) else sync_view
+    return view.as_view(**initkwargs)
+
+
+class AsyncJSONView(View):
+    authentication = CachedTokenAuthentication()
+    http_method_names = ["get", "head", "options"]
+
+    async def dispatch(self, request, *args, **kwargs):
+        try:
+            user_auth = await self.authentication.aauthenticate(request)
+            # Replaces the session-backed lazy user, which would query synchronously
+            request.user = user_auth[0] if user_auth else AnonymousUser()
+            return await super().dispatch(request, *args, **kwargs)
+        except APIException as exc:
+            return self.handle_exception(request, exc)
+
+    def handle_exception(self, request, exc):
+        response = json_response({"detail": exc.detail}, status=exc.status_code)
+        if isinstance(exc, (NotAuthenticated, AuthenticationFailed)):
+            # Same as DRF with token auth first in DEFAULT_AUTHENTICATION_CLASSES
+            response.status_code = 401
+            response["WWW-Authenticate"] = self.authentication.authenticate_header(request)
+        return response
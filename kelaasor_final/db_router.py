@@ -0,0 +1,76 @@
+"""
+Primary/replica routing.
+
+Catalog and content reads (courses, sections, lessons, outlines) go to the
+"replica" alias when one is configured. Everything else, every write, reads
+inside a transaction and any read after a write in the same request go to
+"default", so a request always sees its own writes.
+"""
+from contextvars import ContextVar
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.db import DEFAULT_DB_ALIAS, connections
+
+REPLICA_DB_ALIAS = "replica"
+
+# Models whose reads may be slightly stale
+REPLICA_MODELS = {"courses.course", "courses.section", "courses.lesson", "courses.courseoutline"}
+
+# Set once the current request (or, outside requests, the current thread/task) has written
+_pinned = ContextVar("db_pinned_to_primary", default=False)
+
+
+def pin_to_primary():
+    _pinned.set(True)
+
+
+class PrimaryReplicaRouter:
+    def replica_configured(self):
+        return REPLICA_DB_ALIAS in connections.settings
+
+    def db_for_read(self, model, **hints):
+        if model._meta.label_lower not in REPLICA_MODELS or not self.replica_configured():
+            return DEFAULT_DB_ALIAS
+        if _pinned.get() or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return REPLICA_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        pin_to_primary()
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Same data on both aliases
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # The replica gets its schema from the primary
+        return db != REPLICA_DB_ALIAS
+
+
+class PinningMiddleware:
+    """
+    Scope read-your-writes pinning to one request.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        token = _pinned.set(False)
+        try:
+            return self.get_response(request)
+        finally:
+            _pinned.reset(token)
+
+    async def __acall__(self, request):
+        token = _pinned.set(False)
+        try:
+            return await self.get_response(request)
+        finally:
+            _pinned.reset(token)
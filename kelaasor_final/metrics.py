@@ -0,0 +1,230 @@
+"""
+Per-request timing: SQL count/time, view time, render time and response size.
+
+Sampled requests are folded into per-route histograms, exposed in Prometheus
+text format at api/_metrics/ (admins only). Histograms are per process.
+Sampled responses to staff also get a Server-Timing header; everyone else
+only with settings.METRICS_SERVER_TIMING, since it exposes query counts.
+"""
+import random
+import threading
+import time
+from contextlib import ExitStack
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+from rest_framework.renderers import JSONRenderer
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576)
+
+
+class RequestMetrics:
+    __slots__ = ("start", "view_start", "db_count", "db_time", "render_time")
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.view_start = None
+        self.db_count = 0
+        self.db_time = 0.0
+        self.render_time = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        # connection.execute_wrapper hook
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += time.perf_counter() - start
+            self.db_count += 1
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last one is +Inf
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.sum += value
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                return
+        self.counts[-1] += 1
+
+    def lines(self, name, labels):
+        cumulative = 0
+        for bound, count in zip(self.buckets + ("+Inf",), self.counts):
+            cumulative += count
+            yield f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}'
+        yield f"{name}_sum{{{labels}}} {self.sum}"
+        yield f"{name}_count{{{labels}}} {cumulative}"
+
+
+class Registry:
+    METRICS = {
+        "duration_seconds": ("Total request time.", DURATION_BUCKETS),
+        "db_seconds": ("Time spent in SQL.", DURATION_BUCKETS),
+        "view_seconds": ("View time outside SQL: object building and serializers.", DURATION_BUCKETS),
+        "render_seconds": ("Response rendering time.", DURATION_BUCKETS),
+        "db_queries": ("SQL queries per request.", QUERY_BUCKETS),
+        "response_bytes": ("Response body size.", SIZE_BUCKETS),
+    }
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.routes = {}  # (method, route, status class) -> {metric: Histogram}
+
+    def observe(self, key, values):
+        with self.lock:
+            histograms = self.routes.get(key)
+            if histograms is None:
+                histograms = self.routes[key] = {m: Histogram(b) for m, (_, b) in self.METRICS.items()}
+            for metric, value in values.items():
+                histograms[metric].observe(value)
+
+    def render(self):
+        lines = [
+            "# HELP kelaasor_metrics_sample_rate Fraction of requests recorded.",
+            "# TYPE kelaasor_metrics_sample_rate gauge",
+            f"kelaasor_metrics_sample_rate {sample_rate()}",
+        ]
+        with self.lock:
+            for metric, (help_text, _) in self.METRICS.items():
+                name = f"kelaasor_http_{metric}"
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} histogram")
+                for (method, route, status), histograms in sorted(self.routes.items()):
+                    labels = f'method="{method}",route="{route}",status="{status}"'
+                    lines.extend(histograms[metric].lines(name, labels))
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+
+def sample_rate():
+    return float(getattr(settings, "METRICS_SAMPLE_RATE", 0.0))
+
+
+def _timing_for_everyone():
+    return getattr(settings, "METRICS_SERVER_TIMING", False)
+
+
+def _is_staff(request):
+    # DRF puts the user it authenticated (token, session) back on the Django request
+    user = getattr(request, "user", None)
+    return bool(user is not None and user.is_staff)
+
+
+def _response_size(response):
+    if response.streaming:
+        return None  # unknown until the body has been sent
+    return len(response.content)
+
+
+class MetricsMiddleware:
+    """
+    Put it first in MIDDLEWARE so "total" covers the whole stack.
+    Sync and async capable, so async views stay on the event loop under ASGI.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        metrics = self._start(request)
+        if metrics is None:
+            return self.get_response(request)
+        with self._wrap_connections(metrics):
+            response = self.get_response(request)
+        return self._finish(request, metrics, response, _timing_for_everyone() or _is_staff(request))
+
+    async def __acall__(self, request):
+        metrics = self._start(request)
+        if metrics is None:
+            return await self.get_response(request)
+        # Connections are per thread and the ORM runs in the request's
+        # sync_to_async thread, not on the event loop: wrap them there
+        stack = await sync_to_async(self._wrap_connections)(metrics)
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(stack.close)()
+        # request.user may still be the lazy session user, which queries
+        show_timing = _timing_for_everyone() or await sync_to_async(_is_staff)(request)
+        return self._finish(request, metrics, response, show_timing)
+
+    def _start(self, request):
+        rate = sample_rate()
+        if not rate or random.random() >= rate:
+            return None
+        metrics = request._metrics = RequestMetrics()
+        return metrics
+
+    def _wrap_connections(self, metrics):
+        stack = ExitStack()
+        for conn in connections.all():
+            stack.enter_context(conn.execute_wrapper(metrics))
+        return stack
+
+    def _finish(self, request, metrics, response, show_timing):
+        total = time.perf_counter() - metrics.start
+        view_total = time.perf_counter() - metrics.view_start if metrics.view_start else total
+        view = max(view_total - metrics.render_time - metrics.db_time, 0.0)
+        size = _response_size(response)
+
+        if show_timing:
+            response["Server-Timing"] = ", ".join([
+                f'db;dur={metrics.db_time * 1000:.2f};desc="{metrics.db_count} queries"',
+                f"view;dur={view * 1000:.2f}",
+                f"render;dur={metrics.render_time * 1000:.2f}",
+                f"total;dur={total * 1000:.2f}",
+            ])
+
+        match = getattr(request, "resolver_match", None)
+        route = match.route if match else "unmatched"
+        values = {
+            "duration_seconds": total,
+            "db_seconds": metrics.db_time,
+            "view_seconds": view,
+            "render_seconds": metrics.render_time,
+            "db_queries": metrics.db_count,
+        }
+        if size is not None:
+            values["response_bytes"] = size
+        registry.observe((request.method, route, f"{response.status_code // 100}xx"), values)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        metrics = getattr(request, "_metrics", None)
+        if metrics is not None:
+            metrics.view_start = time.perf_counter()
+
+
+class TimedJSONRenderer(JSONRenderer):
+    """
+    DRF side of the instrumentation: separates render time from view time.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        request = (renderer_context or {}).get("request")
+        metrics = getattr(getattr(request, "_request", None), "_metrics", None)
+        if metrics is None:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        start = time.perf_counter()
+        try:
+            return super().render(data, accepted_media_type, renderer_context)
+        finally:
+            metrics.render_time += time.perf_counter() - start
+
@@ -18,6 +18,45 @@ load_dotenv()
 KAVENEGAR_API_KEY = os.getenv("KAVENEGAR_API_KEY")
 KAVENEGAR_SENDER = os.getenv("KAVENEGAR_SENDER", "")
 
+# Outbound SMS (see users/sms); without a Kavenegar key messages go to a local
+# file, which is refused unless DEBUG is on
+SMS_BACKEND = os.getenv(
+    "SMS_BACKEND",
+    "users.sms.backends.KavenegarBackend" if KAVENEGAR_API_KEY else "users.sms.backends.FileBackend",
+)
+SMS_RATE_LIMIT = float(os.getenv("SMS_RATE_LIMIT", "5"))   # provider calls per second
+SMS_MAX_RETRIES = int(os.getenv("SMS_MAX_RETRIES", "3"))
+SMS_FILE_PATH = os.getenv("SMS_FILE_PATH", "sms_outbox.jsonl")
+
+# OTP login (see users/otp.py); "auto" uses the cache only when it is shared
+OTP_STORE = os.getenv("OTP_STORE", "auto")
+OTP_TTL_SECONDS = 120
+OTP_MAX_ATTEMPTS = 5
+OTP_RESEND_SECONDS = 60
+
+# Token auth cache (see users/authentication.py)
+AUTH_TOKEN_CACHE_SIZE = 10000    # entries in each process's LRU
+AUTH_TOKEN_LOCAL_TTL = 5         # seconds; bounds revocation lag in other processes
+AUTH_TOKEN_CACHE_TTL = 300       # seconds in the shared cache
+
+# Request instrumentation (see kelaasor_final/metrics.py): fraction of requests
+# timed and counted in api/_metrics/. Their Server-Timing header goes to staff
+# only, or to every client with METRICS_SERVER_TIMING
+METRICS_SAMPLE_RATE = float(os.getenv("METRICS_SAMPLE_RATE", "0.1"))
+METRICS_SERVER_TIMING = os.getenv("METRICS_SERVER_TIMING", "0") == "1"
+
+# Opt-in: list endpoints render from .values() rows instead of model instances
+# (see courses/fast_serializers.py); output is identical either way
+FAST_SERIALIZATION = os.getenv("FAST_SERIALIZATION", "0") == "1"
+
+# Serve the read-heavy endpoints (course list/detail/sections/lessons, me) with
+# their native async twins (courses/async_views.py). Only pays off under ASGI;
+# the twins are always reachable under api/async/ as well.
+ASYNC_VIEWS = os.getenv("ASYNC_VIEWS", "0") == "1"
+
+# Course search (see courses/search.py): "auto" uses SQLite FTS5 when available
+COURSE_SEARCH_BACKEND = os.getenv("COURSE_SEARCH_BACKEND", "auto")
+
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -49,9 +88,12 @@ INSTALLED_APPS = [
     'django_filters',
     'users',
     'courses',
+    'jobs',
 ]
 
 MIDDLEWARE = [
+    'kelaasor_final.metrics.MetricsMiddleware',
+    'kelaasor_final.db_router.PinningMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -66,7 +108,7 @@ ROOT_URLCONF = 'kelaasor_final.urls'
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
-        'DIRS': [],
+        'DIRS': [BASE_DIR / 'templates'],
         'APP_DIRS': True,
         'OPTIONS': {
             'context_processors': [
@@ -87,7 +129,34 @@ WSGI_APPLICATION = 'kelaasor_final.wsgi.application'
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'NAME': os.getenv("DB_NAME", BASE_DIR / 'db.sqlite3'),
+        # Keep connections open between requests (per worker thread); checked before reuse.
+        # Under ASGI every request gets its own connection, so use 0 there.
+        'CONN_MAX_AGE': int(os.getenv("DB_CONN_MAX_AGE", "60")),
+        'CONN_HEALTH_CHECKS': True,
+    }
+}
+
+# Optional read replica for catalog/content reads (see kelaasor_final/db_router.py).
+# Two SQLite files locally: DB_REPLICA_NAME=db_replica.sqlite3, then
+# `python manage.py sync_replica` copies the primary into it (replication "lag" = until the next sync).
+if os.getenv("DB_REPLICA_NAME"):
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'NAME': os.getenv("DB_REPLICA_NAME"),
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_ROUTERS = ['kelaasor_final.db_router.PrimaryReplicaRouter']
+
+
+# Cache
+# Shared cache backing entitlement lookups; point it at Redis/Memcached in production
+
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv("CACHE_BACKEND", 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv("CACHE_LOCATION", ''),
     }
 }
 
@@ -137,7 +206,7 @@ AUTH_USER_MODEL = "users.User"
 
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": [
-        "rest_framework.authentication.TokenAuthentication", # ← use Token auth
+        "users.authentication.CachedTokenAuthentication", # ← Token auth, cached (users/authentication.py)
         "rest_framework.authentication.SessionAuthentication",
         "rest_framework.authentication.BasicAuthentication",
     ],
@@ -148,6 +217,10 @@ REST_FRAMEWORK = {
     "DEFAULT_PERMISSION_CLASSES": [
         "rest_framework.permissions.IsAuthenticatedOrReadOnly",
     ],
+    "DEFAULT_RENDERER_CLASSES": [
+        "kelaasor_final.metrics.TimedJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ],
     "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.PageNumberPagination",
     "PAGE_SIZE": 5,
 }
\ No newline at end of file
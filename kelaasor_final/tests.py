@@ -0,0 +1,102 @@
+import re
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import AsyncClient, TestCase, override_settings
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+from courses.models import Course
+from . import metrics
+
+
+def _queries(response):
+    return int(re.search(r'desc="(\d+) queries"', response["Server-Timing"]).group(1))
+
+
+@override_settings(METRICS_SAMPLE_RATE=1.0, METRICS_SERVER_TIMING=True)
+class MetricsUnderASGITests(TestCase):
+    def setUp(self):
+        self.course = Course.objects.create(title="Timed")
+
+    async def test_queries_are_counted_for_sync_and_async_views(self):
+        client = AsyncClient()
+        for path in (f"/api/courses/{self.course.id}/", f"/api/async/courses/{self.course.id}/"):
+            with self.subTest(path=path):
+                await cache.aclear()
+                response = await client.get(path)
+                self.assertEqual(response.status_code, 200)
+                self.assertGreater(_queries(response), 0)
+
+
+@override_settings(METRICS_SAMPLE_RATE=1.0)
+class MetricsMiddlewareTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        with metrics.registry.lock:
+            metrics.registry.routes.clear()
+        self.course = Course.objects.create(title="Timed")
+        self.path = f"/api/courses/{self.course.id}/"
+        users = get_user_model().objects
+        self.staff = APIClient()
+        self.staff.credentials(
+            HTTP_AUTHORIZATION=f"Token {Token.objects.create(user=users.create_superuser(mobile='09120000101')).key}"
+        )
+        self.student = APIClient()
+        self.student.credentials(
+            HTTP_AUTHORIZATION=f"Token {Token.objects.create(user=users.create_user(mobile='09120000102')).key}"
+        )
+
+    def test_server_timing_goes_to_staff_only(self):
+        self.assertNotIn("Server-Timing", self.client.get(self.path))
+        self.assertNotIn("Server-Timing", self.student.get(self.path))
+
+        cache.clear()
+        response = self.staff.get(self.path)
+        self.assertEqual(
+            [part.split(";")[0] for part in response["Server-Timing"].split(", ")], ["db", "view", "render", "total"]
+        )
+        self.assertGreater(_queries(response), 0)
+
+    async def test_server_timing_goes_to_staff_only_under_asgi(self):
+        client = AsyncClient()
+        token = await Token.objects.aget(user__mobile="09120000101")
+        for path in (self.path, f"/api/async/courses/{self.course.id}/"):
+            with self.subTest(path=path):
+                self.assertNotIn("Server-Timing", await client.get(path))
+                response = await client.get(path, headers={"Authorization": f"Token {token.key}"})
+                self.assertIn("Server-Timing", response)
+
+    def test_setting_sends_server_timing_to_everyone(self):
+        with override_settings(METRICS_SERVER_TIMING=True):
+            self.assertGreater(_queries(self.client.get(self.path)), 0)
+
+    def test_unsampled_requests_are_not_recorded(self):
+        with override_settings(METRICS_SAMPLE_RATE=0.0):
+            response = self.staff.get(self.path)
+        self.assertNotIn("Server-Timing", response)
+        self.assertEqual(metrics.registry.routes, {})
+
+    def test_requests_are_recorded_per_route(self):
+        for _ in range(3):
+            cache.clear()  # every request reads the course
+            self.client.get(self.path)
+        self.client.get("/api/courses/999999/")
+
+        labels = 'method="GET",route="api/courses/<int:id>/"'
+        histograms = metrics.registry.routes[("GET", "api/courses/<int:id>/", "2xx")]
+        self.assertEqual(sum(histograms["db_queries"].counts), 3)
+        self.assertIn(("GET", "api/courses/<int:id>/", "4xx"), metrics.registry.routes)
+
+        text = metrics.registry.render()
+        self.assertIn(f'kelaasor_http_duration_seconds_count{{{labels},status="2xx"}} 3', text)
+        self.assertIn(f'kelaasor_http_response_bytes_count{{{labels},status="4xx"}} 1', text)
+        self.assertIn("kelaasor_metrics_sample_rate 1.0", text)
+
+    def test_metrics_endpoint_is_for_admins(self):
+        self.client.get(self.path)
+        self.assertIn(self.client.get("/api/_metrics/").status_code, (401, 403))
+        self.assertEqual(self.student.get("/api/_metrics/").status_code, 403)
+
+        response = self.staff.get("/api/_metrics/")
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response["Content-Type"].startswith("text/plain; version=0.0.4"))
+        self.assertIn('kelaasor_http_db_queries_bucket{method="GET",route="api/courses/<int:id>/"', response.content.decode())
@@ -1,8 +1,10 @@
 from django.contrib import admin
 from django.urls import path, include
+from .views import MetricsView
 
 urlpatterns = [
     path("admin/", admin.site.urls),
+    path("api/_metrics/", MetricsView.as_view(), name="metrics"),
     path("api/", include("users.api_urls")), 
     path("api/", include("courses.api_urls")), 
 ]
@@ -1,9 +1,10 @@
 from django.contrib import admin
+from kelaasor_final.admin_mixins import LargeTableAdminMixin
 from .models import User
 from .models import OTPCode
 
 @admin.register(User)
-class UserAdmin(admin.ModelAdmin):
+class UserAdmin(LargeTableAdminMixin, admin.ModelAdmin):
     list_display = ("mobile", "first_name", "last_name", "role", "is_active", "is_staff", "created_at")
     search_fields = ("mobile", "first_name", "last_name", "email")
     list_filter = ("role", "is_active", "is_staff")
@@ -12,7 +13,7 @@ class UserAdmin(admin.ModelAdmin):
     readonly_fields = ("created_at", "updated_at")
     
 @admin.register(OTPCode)
-class OTPCodeAdmin(admin.ModelAdmin):
+class OTPCodeAdmin(LargeTableAdminMixin, admin.ModelAdmin):
     list_display = ("mobile", "code", "is_used", "expires_at", "created_at", "attempts")
     list_filter = ("is_used",)
     search_fields = ("mobile", "code")
@@ -1,6 +1,13 @@
 from django.urls import path
-from .views import MeView
+from kelaasor_final.async_api import select_view
+from .views import MeView, OTPRequestView, OTPVerifyView
+from .async_views import AsyncMeView
 
 urlpatterns = [
-    path("me/", MeView.as_view(), name="me"),
+    path("me/", select_view(MeView, AsyncMeView), name="me"),
+    path("otp/request/", OTPRequestView.as_view(), name="otp-request"),
+    path("otp/verify/", OTPVerifyView.as_view(), name="otp-verify"),
+
+    # async twin (see users/async_views.py)
+    path("async/me/", AsyncMeView.as_view(), name="async-me"),
 ]
@@ -0,0 +1,26 @@
+"""
+Async twin of MeView (see kelaasor_final/async_api.py).
+"""
+from asgiref.sync import sync_to_async
+from rest_framework.exceptions import NotAuthenticated
+from courses.fast_serializers import compile_serializer
+from kelaasor_final.async_api import AsyncJSONView, json_response
+from .models import User
+from .serializers import MeSerializer
+from .views import MeView
+
+
+class AsyncMeView(AsyncJSONView):
+    http_method_names = ["get", "head", "patch", "options"]
+    sync_view = staticmethod(MeView.as_view())
+
+    async def get(self, request):
+        if not request.user.is_authenticated:
+            raise NotAuthenticated()
+        compiled = compile_serializer(MeSerializer, required=True)
+        row = await User.objects.filter(pk=request.user.pk).values(*compiled.columns).aget()
+        return json_response(compiled.render([row])[0])
+
+    async def patch(self, request):
+        # Writes are rare here; the DRF view does validation and saving
+        return await sync_to_async(self.sync_view)(request)
@@ -0,0 +1,160 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.translation import gettext_lazy as _
+from rest_framework.authentication import TokenAuthentication, get_authorization_header
+from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import AuthenticationFailed
+from .models import User
+
+# What the views read from request.user; anything else is loaded lazily on access
+USER_FIELDS = ("id", "mobile", "is_active", "is_staff", "first_name", "last_name")
+# Model.from_db() takes values in concrete-field order, not USER_FIELDS order
+_FROM_DB_FIELDS = [f.attname for f in User._meta.concrete_fields if f.attname in USER_FIELDS]
+
+
+class LRUCache:
+    """
+    Small thread-safe LRU with a per-entry TTL.
+    """
+
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.data = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            item = self.data.get(key)
+            if item is None:
+                return None
+            value, expires = item
+            if expires < time.monotonic():
+                del self.data[key]
+                return None
+            self.data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self.lock:
+            self.data[key] = (value, time.monotonic() + self.ttl)
+            self.data.move_to_end(key)
+            while len(self.data) > self.maxsize:
+                self.data.popitem(last=False)
+
+    def delete(self, key):
+        with self.lock:
+            self.data.pop(key, None)
+
+
+_local = LRUCache(
+    maxsize=getattr(settings, "AUTH_TOKEN_CACHE_SIZE", 10000),
+    ttl=getattr(settings, "AUTH_TOKEN_LOCAL_TTL", 5),
+)
+
+
+def _cache_key(token_key):
+    # Never put raw tokens into a shared cache
+    return "auth:token:" + hashlib.sha256(token_key.encode()).hexdigest()
+
+
+def _load(token_key):
+    """
+    Token → minimal user fields: in-process LRU, then shared cache, then one DB join.
+    Returns None for unknown tokens.
+    """
+    ckey = _cache_key(token_key)
+    entry = _local.get(ckey)
+    if entry is not None:
+        return entry
+
+    entry = cache.get(ckey)
+    if entry is None:
+        entry = (
+            Token.objects.filter(key=token_key)
+            .values_list(*(f"user__{f}" for f in USER_FIELDS))
+            .first()
+        )
+        if entry is None:
+            return None
+        entry = tuple(entry)
+        cache.set(ckey, entry, getattr(settings, "AUTH_TOKEN_CACHE_TTL", 300))
+
+    _local.set(ckey, entry)
+    return entry
+
+
+async def _aload(token_key):
+    """
+    _load() on the async cache and ORM APIs.
+    """
+    ckey = _cache_key(token_key)
+    entry = _local.get(ckey)
+    if entry is not None:
+        return entry
+
+    entry = await cache.aget(ckey)
+    if entry is None:
+        entry = await (
+            Token.objects.filter(key=token_key)
+            .values_list(*(f"user__{f}" for f in USER_FIELDS))
+            .afirst()
+        )
+        if entry is None:
+            return None
+        entry = tuple(entry)
+        await cache.aset(ckey, entry, getattr(settings, "AUTH_TOKEN_CACHE_TTL", 300))
+
+    _local.set(ckey, entry)
+    return entry
+
+
+def invalidate(token_keys):
+    """
+    Drop tokens from the shared cache and this process's LRU.
+    Other processes' LRU entries expire within AUTH_TOKEN_LOCAL_TTL seconds.
+    """
+    ckeys = [_cache_key(k) for k in token_keys]
+    cache.delete_many(ckeys)
+    for ckey in ckeys:
+        _local.delete(ckey)
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    Drop-in for TokenAuthentication without the Token ⇢ User join per request.
+    request.user is a User with USER_FIELDS loaded; other fields load on first access.
+    """
+
+    def authenticate_credentials(self, key):
+        return self._user(_load(key), key)
+
+    async def aauthenticate(self, request):
+        """
+        authenticate() for plain async Django views (no DRF Request).
+        Returns None when no token was sent.
+        """
+        auth = get_authorization_header(request).split()
+        if not auth or auth[0].lower() != self.keyword.lower().encode():
+            return None
+        if len(auth) != 2:
+            raise AuthenticationFailed(_("Invalid token header."))
+        try:
+            key = auth[1].decode()
+        except UnicodeError:
+            raise AuthenticationFailed(_("Invalid token header. Token string should not contain invalid characters."))
+        return self._user(await _aload(key), key)
+
+    def _user(self, entry, key):
+        if entry is None:
+            raise AuthenticationFailed(_("Invalid token."))
+
+        values = dict(zip(USER_FIELDS, entry))
+        user = User.from_db("default", _FROM_DB_FIELDS, [values[f] for f in _FROM_DB_FIELDS])
+        if not user.is_active:
+            raise AuthenticationFailed(_("User inactive or deleted."))
+        return (user, key)
@@ -0,0 +1,44 @@
+import time
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+from users.authentication import CachedTokenAuthentication, invalidate
+from users.models import User
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = "Compare queries and time per request for TokenAuthentication vs CachedTokenAuthentication."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        n = options["requests"]
+        try:
+            with transaction.atomic():
+                user = User.objects.create_user(mobile="bench-auth", first_name="Bench", last_name="User")
+                token = Token.objects.create(user=user)
+                request = APIRequestFactory().get("/api/me/", HTTP_AUTHORIZATION=f"Token {token.key}")
+
+                for backend in (TokenAuthentication(), CachedTokenAuthentication()):
+                    with CaptureQueriesContext(connection) as ctx:
+                        start = time.perf_counter()
+                        for _ in range(n):
+                            backend.authenticate(Request(request))
+                        elapsed = time.perf_counter() - start
+                    self.stdout.write(
+                        f"{type(backend).__name__:<28} queries/request={len(ctx.captured_queries) / n:.3f} "
+                        f"us/request={elapsed / n * 1e6:.1f}"
+                    )
+                raise _Rollback
+        except _Rollback:
+            # The token was rolled back; don't leave it behind in the caches
+            invalidate([token.key])
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from users import otp
+
+
+class Command(BaseCommand):
+    help = "Delete expired OTP codes in chunks."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        deleted = otp.purge_expired(chunk_size=options["chunk_size"])
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} expired OTP codes."))
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.7 on 2026-10-18 10:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0002_otpcode'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='otpcode',
+            index=models.Index(fields=['mobile', 'is_used', 'expires_at'], name='otp_mobile_used_expires_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='otpcode',
+            index=models.Index(fields=['expires_at'], name='otp_expires_idx'),
+        ),
+    ]
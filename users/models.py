@@ -1,6 +1,6 @@
 from django.db import models
 from django.contrib.auth.models import AbstractBaseUser, PermissionsMixin, BaseUserManager
-import random
+import secrets
 from datetime import timedelta
 from django.db import models
 from django.utils import timezone
@@ -48,6 +48,11 @@ class User(AbstractBaseUser, PermissionsMixin):
 
     objects = UserManager()
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["-created_at"], name="user_created_idx"),  # UserAdmin ordering
+        ]
+
     USERNAME_FIELD = "mobile"    
     REQUIRED_FIELDS = []        
 
@@ -65,7 +70,7 @@ class User(AbstractBaseUser, PermissionsMixin):
     
 
 def generate_otp_code(length=6):
-    return "".join(str(random.randint(0, 9)) for _ in range(length))
+    return "".join(str(secrets.randbelow(10)) for _ in range(length))
 
 class OTPCode(models.Model):
     mobile = models.CharField(max_length=15, db_index=True)
@@ -75,6 +80,14 @@ class OTPCode(models.Model):
     attempts = models.PositiveSmallIntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # verify: latest unused, unexpired code of a mobile
+            models.Index(fields=["mobile", "is_used", "expires_at"], name="otp_mobile_used_expires_idx"),
+            # purge_otps
+            models.Index(fields=["expires_at"], name="otp_expires_idx"),
+        ]
+
     @classmethod
     def create_fresh(cls, mobile, ttl_seconds=120):
         now = timezone.now()
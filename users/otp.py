@@ -0,0 +1,152 @@
+import hashlib
+import hmac
+from datetime import timedelta
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from .models import OTPCode, generate_otp_code
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+class OTPError(Exception):
+    """
+    code: "throttled", "invalid", "expired" or "too_many_attempts".
+    """
+
+    def __init__(self, code, message):
+        self.code = code
+        super().__init__(message)
+
+
+def _throttled():
+    window = _setting("OTP_RESEND_SECONDS", 60)
+    return OTPError("throttled", f"Please wait {window} seconds before requesting a new code.")
+
+
+class CacheOTPStore:
+    """
+    Codes live only in the cache and expire with its native TTL.
+    Only a keyed hash of the code is stored.
+    """
+
+    def _key(self, mobile):
+        return f"otp:code:{mobile}"
+
+    def _attempts_key(self, mobile):
+        return f"otp:attempts:{mobile}"
+
+    def _digest(self, code):
+        return hmac.new(settings.SECRET_KEY.encode(), code.encode(), hashlib.sha256).hexdigest()
+
+    def issue(self, mobile):
+        # cache.add is atomic: only the first request inside the window wins
+        if not cache.add(f"otp:throttle:{mobile}", 1, _setting("OTP_RESEND_SECONDS", 60)):
+            raise _throttled()
+        ttl = _setting("OTP_TTL_SECONDS", 120)
+        code = generate_otp_code()
+        cache.set_many({self._key(mobile): self._digest(code), self._attempts_key(mobile): 0}, ttl)
+        return code
+
+    def verify(self, mobile, code):
+        key, attempts_key = self._key(mobile), self._attempts_key(mobile)
+        digest = cache.get(key)
+        if digest is None:
+            raise OTPError("expired", "Code expired or not requested.")
+
+        try:
+            attempts = cache.incr(attempts_key)
+        except ValueError:
+            # attempts key evicted before the code: start counting again
+            cache.add(attempts_key, 0, _setting("OTP_TTL_SECONDS", 120))
+            attempts = cache.incr(attempts_key)
+        if attempts > _setting("OTP_MAX_ATTEMPTS", 5):
+            cache.delete(key)
+            raise OTPError("too_many_attempts", "Too many attempts. Request a new code.")
+
+        if not hmac.compare_digest(digest, self._digest(str(code))):
+            raise OTPError("invalid", "Invalid code.")
+
+        # Single use: of two concurrent correct guesses only one deletes the key
+        if not cache.delete(key):
+            raise OTPError("expired", "Code expired or not requested.")
+        cache.delete(attempts_key)
+
+
+class DBOTPStore:
+    """
+    Codes stored as OTPCode rows; used when no shared cache is configured,
+    so the resend throttle reads the rows too (a per-process cache would not
+    hold across workers).
+    """
+
+    def issue(self, mobile):
+        now = timezone.now()
+        with transaction.atomic():
+            # Locking the newest row serializes concurrent requests for a mobile
+            last = (
+                OTPCode.objects.select_for_update().filter(mobile=mobile)
+                .order_by("-id").values_list("created_at", flat=True).first()
+            )
+            if last is not None and last > now - timedelta(seconds=_setting("OTP_RESEND_SECONDS", 60)):
+                raise _throttled()
+            # Only the newest code is valid
+            OTPCode.objects.filter(mobile=mobile, is_used=False, expires_at__gt=now).update(is_used=True)
+            return OTPCode.create_fresh(mobile, ttl_seconds=_setting("OTP_TTL_SECONDS", 120)).code
+
+    def verify(self, mobile, code):
+        otp = (
+            OTPCode.objects.filter(mobile=mobile, is_used=False, expires_at__gt=timezone.now())
+            .order_by("-expires_at")
+            .only("id", "code")
+            .first()
+        )
+        if otp is None:
+            raise OTPError("expired", "Code expired or not requested.")
+
+        # Count the attempt atomically before comparing
+        counted = OTPCode.objects.filter(pk=otp.pk, attempts__lt=_setting("OTP_MAX_ATTEMPTS", 5)).update(
+            attempts=F("attempts") + 1
+        )
+        if not counted:
+            OTPCode.objects.filter(pk=otp.pk).update(is_used=True)
+            raise OTPError("too_many_attempts", "Too many attempts. Request a new code.")
+
+        if not hmac.compare_digest(otp.code, str(code)):
+            raise OTPError("invalid", "Invalid code.")
+
+        if not OTPCode.objects.filter(pk=otp.pk, is_used=False).update(is_used=True):
+            raise OTPError("expired", "Code expired or not requested.")
+
+
+def get_store():
+    """
+    Cache store when the cache is shared between processes, else the DB model.
+    settings.OTP_STORE = "cache" / "db" forces one or the other.
+    """
+    choice = _setting("OTP_STORE", "auto")
+    if choice == "db":
+        return DBOTPStore()
+    if choice == "cache" or not isinstance(caches["default"], (LocMemCache, DummyCache)):
+        return CacheOTPStore()
+    return DBOTPStore()
+
+
+def purge_expired(chunk_size=1000, now=None):
+    """
+    Delete expired OTPCode rows in chunks. Returns the number deleted.
+    """
+    cutoff = now or timezone.now()
+    total = 0
+    while True:
+        ids = list(OTPCode.objects.filter(expires_at__lt=cutoff).order_by("expires_at").values_list("id", flat=True)[:chunk_size])
+        if not ids:
+            return total
+        deleted, _ = OTPCode.objects.filter(id__in=ids).delete()
+        total += deleted
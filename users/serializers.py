@@ -6,3 +6,12 @@ class MeSerializer(serializers.ModelSerializer):
         model = User
         fields = ["mobile", "first_name", "last_name", "email", "role", "is_active", "created_at"]
         read_only_fields = ["mobile", "role", "is_active", "created_at"]
+
+
+class OTPRequestSerializer(serializers.Serializer):
+    mobile = serializers.RegexField(r"^09\d{9}$", max_length=15)
+
+
+class OTPVerifySerializer(serializers.Serializer):
+    mobile = serializers.RegexField(r"^09\d{9}$", max_length=15)
+    code = serializers.CharField(max_length=10)
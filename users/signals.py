@@ -0,0 +1,18 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+from .models import User
+from . import authentication
+
+
+@receiver(post_delete, sender=Token)
+def token_deleted(sender, instance, **kwargs):
+    authentication.invalidate([instance.key])
+
+
+@receiver([post_save, post_delete], sender=User)
+def user_changed(sender, instance, created=False, **kwargs):
+    # Deactivation or a profile change must not be served from the token cache
+    if created:
+        return
+    authentication.invalidate(Token.objects.filter(user_id=instance.pk).values_list("key", flat=True))
@@ -0,0 +1,66 @@
+"""
+Outbound SMS.
+
+    from users import sms
+    sms.send_sms("09120001234", "hello")                 # blocking, one receptor
+    sms.send_bulk(receptors, "hello")                    # batched provider calls
+    await sms.asend_messages([(receptor, text), ...])    # asyncio
+    sms.queue_sms(receptors, "hello")                    # background job, after commit
+
+The backend is chosen by settings.SMS_BACKEND and reused for the process.
+"""
+import threading
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+DEFAULT_BACKEND = "users.sms.backends.KavenegarBackend"
+
+# Filled by LocMemBackend
+outbox = []
+
+_backends = {}
+_lock = threading.Lock()
+
+
+def get_backend(path=None):
+    path = path or getattr(settings, "SMS_BACKEND", DEFAULT_BACKEND)
+    backend = _backends.get(path)
+    if backend is None:
+        with _lock:
+            backend = _backends.get(path)
+            if backend is None:
+                backend = _backends[path] = import_string(path)()
+    return backend
+
+
+def send_messages(messages, backend=None):
+    return get_backend(backend).send_messages(messages)
+
+
+def send_sms(receptor, message, backend=None):
+    return send_messages([(receptor, message)], backend=backend)
+
+
+def send_bulk(receptors, message, backend=None):
+    return send_messages([(r, message) for r in receptors], backend=backend)
+
+
+async def asend_messages(messages, backend=None, concurrency=4):
+    return await get_backend(backend).asend_messages(messages, concurrency=concurrency)
+
+
+def queue_sms(receptors, message):
+    """
+    Send from the job worker once the current transaction commits.
+    One job per provider batch: a retried job resends only its own batch,
+    never the ones that already went out.
+    """
+    from jobs.queue import enqueue_on_commit
+    if isinstance(receptors, str):
+        receptors = [receptors]
+    receptors = list(receptors)
+    # The class attribute: building the backend here would move its setup
+    # errors from the worker into the request
+    batch_size = import_string(getattr(settings, "SMS_BACKEND", DEFAULT_BACKEND)).batch_size
+    for i in range(0, len(receptors), batch_size):
+        enqueue_on_commit("users.send_sms", receptors=receptors[i:i + batch_size], message=message)
@@ -0,0 +1,151 @@
+import asyncio
+import json
+import logging
+import random
+import threading
+import time
+from pathlib import Path
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.utils import timezone
+from .ratelimit import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+
+class BaseSMSBackend:
+    """
+    Batching, rate limiting and retries shared by every backend.
+    Subclasses implement send_batch(receptors, message) for one provider call.
+    """
+    batch_size = 1                 # receptors per provider call
+    retryable_exceptions = ()      # errors worth another attempt
+    retry_base_delay = 0.5         # seconds; doubled per attempt, full jitter
+
+    def __init__(self, rate=None, burst=None, max_retries=None, batch_size=None):
+        rate = rate if rate is not None else getattr(settings, "SMS_RATE_LIMIT", None)
+        self.rate_limiter = TokenBucket(rate, burst) if rate else None
+        self.max_retries = max_retries if max_retries is not None else getattr(settings, "SMS_MAX_RETRIES", 3)
+        if batch_size:
+            self.batch_size = batch_size
+
+    def send_batch(self, receptors, message):
+        raise NotImplementedError
+
+    def batches(self, messages):
+        """
+        Group (receptor, message) pairs by text and split into provider-sized batches.
+        """
+        grouped = {}
+        for receptor, message in messages:
+            grouped.setdefault(message, []).append(str(receptor).strip())
+        for message, receptors in grouped.items():
+            for i in range(0, len(receptors), self.batch_size):
+                yield receptors[i:i + self.batch_size], message
+
+    def send_with_retry(self, receptors, message):
+        for attempt in range(self.max_retries + 1):
+            if self.rate_limiter:
+                self.rate_limiter.acquire()
+            try:
+                return self.send_batch(receptors, message)
+            except self.retryable_exceptions as e:
+                if attempt == self.max_retries:
+                    logger.error("SMS to %d receptors failed after %d attempts: %s", len(receptors), attempt + 1, e)
+                    raise
+                delay = random.uniform(0, self.retry_base_delay * 2 ** attempt)
+                logger.warning("SMS send failed (%s), retrying in %.2fs", e, delay)
+                time.sleep(delay)
+
+    def send_messages(self, messages):
+        results = []
+        for receptors, message in self.batches(messages):
+            results.extend(self.send_with_retry(receptors, message) or [])
+        return results
+
+    async def asend_messages(self, messages, concurrency=4):
+        """
+        Send batches concurrently without blocking the event loop.
+        The rate limit still applies across all of them.
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def send(receptors, message):
+            async with semaphore:
+                return await asyncio.to_thread(self.send_with_retry, receptors, message)
+
+        chunks = await asyncio.gather(*(send(r, m) for r, m in self.batches(messages)))
+        return [result for chunk in chunks for result in (chunk or [])]
+
+
+class KavenegarBackend(BaseSMSBackend):
+    """
+    One long-lived Kavenegar client per process; up to 200 receptors per call.
+    """
+    batch_size = 200
+
+    def __init__(self, api_key=None, sender=None, **kwargs):
+        super().__init__(**kwargs)
+        from kavenegar import KavenegarAPI, HTTPException
+
+        self.api_key = api_key or settings.KAVENEGAR_API_KEY
+        if not self.api_key:
+            raise RuntimeError("KAVENEGAR_API_KEY not configured in settings.py")
+        self.sender = sender if sender is not None else getattr(settings, "KAVENEGAR_SENDER", "")
+        self.client = KavenegarAPI(self.api_key)
+        # Network failures are retried; APIException (bad key, bad number...) is not
+        self.retryable_exceptions = (HTTPException,)
+
+    def send_batch(self, receptors, message):
+        return self.client.sms_send({
+            "sender": self.sender,
+            "receptor": ",".join(receptors),
+            "message": message,
+        })
+
+
+class LocMemBackend(BaseSMSBackend):
+    """
+    Keeps sent messages in users.sms.outbox; for tests and local runs.
+    """
+    batch_size = 200
+
+    def __init__(self, **kwargs):
+        kwargs.setdefault("rate", 0)
+        super().__init__(**kwargs)
+
+    def send_batch(self, receptors, message):
+        from . import outbox
+        results = []
+        for receptor in receptors:
+            entry = {"receptor": receptor, "message": message, "status": "sent"}
+            outbox.append(entry)
+            results.append(entry)
+        return results
+
+
+class FileBackend(BaseSMSBackend):
+    """
+    Appends sent messages as JSON lines to settings.SMS_FILE_PATH (relative
+    to BASE_DIR). Messages include OTP codes, so it only runs with DEBUG on.
+    """
+    batch_size = 200
+
+    def __init__(self, path=None, **kwargs):
+        if not settings.DEBUG:
+            raise ImproperlyConfigured(
+                "FileBackend writes SMS (OTP codes included) to disk and only runs with DEBUG on; "
+                "set KAVENEGAR_API_KEY or SMS_BACKEND."
+            )
+        kwargs.setdefault("rate", 0)
+        super().__init__(**kwargs)
+        self.path = Path(settings.BASE_DIR) / (path or getattr(settings, "SMS_FILE_PATH", "sms_outbox.jsonl"))
+        self.lock = threading.Lock()
+
+    def send_batch(self, receptors, message):
+        sent_at = timezone.now().isoformat()
+        results = [{"receptor": r, "message": message, "status": "sent", "sent_at": sent_at} for r in receptors]
+        with self.lock, open(self.path, "a", encoding="utf-8") as f:
+            for entry in results:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        return results
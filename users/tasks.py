@@ -0,0 +1,8 @@
+from jobs.queue import task
+from . import sms
+
+
+@task("users.send_sms")
+def send_sms(receptors, message):
+    # queue_sms enqueues one provider batch per job, so a retry resends only this one
+    sms.send_bulk(receptors, message)
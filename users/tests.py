@@ -1,3 +1,246 @@
-from django.test import TestCase
+import json
+import os
+import tempfile
+from datetime import timedelta
+from unittest import mock
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+from jobs import queue
+from jobs.models import Job
+from . import authentication, sms
+from .models import OTPCode, User
+from .sms.backends import BaseSMSBackend, FileBackend, LocMemBackend
+from .sms.ratelimit import TokenBucket
 
-# Create your tests here.
+
+class CachedTokenAuthenticationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        authentication._local.data.clear()
+
+    def client_for(self, user):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Token {Token.objects.create(user=user).key}")
+        return client
+
+    def test_user_fields_round_trip_through_cache(self):
+        user = User.objects.create_user(mobile="09121000001", first_name="Sara", last_name="Ahmadi")
+        key = Token.objects.create(user=user).key
+        for _ in range(3):  # DB, then shared cache, then the in-process LRU
+            authed, _ = authentication.CachedTokenAuthentication().authenticate_credentials(key)
+            self.assertEqual(
+                (authed.pk, authed.mobile, authed.is_active, authed.is_staff, authed.first_name, authed.last_name),
+                (user.pk, "09121000001", True, False, "Sara", "Ahmadi"),
+            )
+
+    def test_student_with_last_name_is_not_staff(self):
+        student = User.objects.create_user(mobile="09121000002", first_name="Ali", last_name="Rezaei")
+        response = self.client_for(student).post("/api/courses/create/", {"title": "X"}, format="json")
+        self.assertEqual(response.status_code, 403)
+
+    def test_nameless_users_authenticate(self):
+        for user in (
+            User.objects.create_user(mobile="09121000003"),
+            User.objects.create_superuser(mobile="09121000004"),
+        ):
+            response = self.client_for(user).get("/api/me/")
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual((response.json()["first_name"], response.json()["last_name"]), ("", ""))
+
+    def test_inactive_user_is_rejected(self):
+        user = User.objects.create_user(mobile="09121000005", is_active=False)
+        self.assertEqual(self.client_for(user).get("/api/me/").status_code, 401)
+
+
+@override_settings(OTP_RESEND_SECONDS=60, OTP_TTL_SECONDS=120, OTP_MAX_ATTEMPTS=3)
+class OTPFlowTests(TestCase):
+    mobile = "09121000010"
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        patcher = mock.patch("users.views.sms.queue_sms")
+        self.queue_sms = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def request_code(self):
+        response = self.client.post("/api/otp/request/", {"mobile": self.mobile}, format="json")
+        if response.status_code == 202:
+            return response, self.queue_sms.call_args.args[1].rsplit(" ", 1)[1]
+        return response, None
+
+    def verify(self, code):
+        return self.client.post("/api/otp/verify/", {"mobile": self.mobile, "code": code}, format="json")
+
+    def wrong(self, code):
+        return "000000" if code != "000000" else "111111"
+
+    def for_each_store(self):
+        for store in ("cache", "db"):
+            with self.subTest(store=store), override_settings(OTP_STORE=store):
+                cache.clear()
+                OTPCode.objects.all().delete()
+                yield store
+
+    def test_resend_is_throttled(self):
+        for _ in self.for_each_store():
+            self.assertEqual(self.request_code()[0].status_code, 202)
+            self.assertEqual(self.request_code()[0].status_code, 429)
+
+    def test_db_throttle_does_not_depend_on_the_cache(self):
+        with override_settings(OTP_STORE="db"):
+            self.assertEqual(self.request_code()[0].status_code, 202)
+            cache.clear()  # as if the next request hit another worker
+            self.assertEqual(self.request_code()[0].status_code, 429)
+            OTPCode.objects.update(created_at=timezone.now() - timedelta(seconds=61))
+            self.assertEqual(self.request_code()[0].status_code, 202)
+
+    def test_code_is_single_use(self):
+        for _ in self.for_each_store():
+            _, code = self.request_code()
+            response = self.verify(code)
+            self.assertEqual(response.status_code, 200)
+            self.assertTrue(User.objects.filter(mobile=self.mobile).exists())
+            self.assertEqual(self.verify(code).status_code, 400)
+            User.objects.filter(mobile=self.mobile).delete()
+
+    def test_attempt_limit(self):
+        for _ in self.for_each_store():
+            _, code = self.request_code()
+            for _ in range(3):
+                self.assertEqual(self.verify(self.wrong(code)).status_code, 400)
+            # The limit also burns the code: the right one no longer works
+            self.assertEqual(self.verify(code).status_code, 429)
+            self.assertEqual(self.verify(code).status_code, 400)
+            self.assertFalse(User.objects.filter(mobile=self.mobile).exists())
+
+    def test_expired_code_is_rejected(self):
+        with override_settings(OTP_STORE="db"):
+            _, code = self.request_code()
+            OTPCode.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+            self.assertEqual(self.verify(code).status_code, 400)
+        with override_settings(OTP_STORE="cache"):
+            cache.clear()
+            _, code = self.request_code()
+            cache.delete(f"otp:code:{self.mobile}")  # what the TTL does
+            self.assertEqual(self.verify(code).status_code, 400)
+
+
+class RecordingBackend(BaseSMSBackend):
+    retryable_exceptions = (ConnectionError,)
+
+    def __init__(self, failures=(), **kwargs):
+        kwargs.setdefault("rate", 0)
+        super().__init__(**kwargs)
+        self.failures = list(failures)
+        self.calls = []
+
+    def send_batch(self, receptors, message):
+        self.calls.append((list(receptors), message))
+        if self.failures:
+            raise self.failures.pop(0)
+        return [{"receptor": r} for r in receptors]
+
+
+class SMSBackendTests(TestCase):
+    def test_messages_are_grouped_by_text_and_batched(self):
+        backend = RecordingBackend(batch_size=2)
+        messages = [(f"0912000000{i}", "hi") for i in range(5)] + [("09120000009", "bye")]
+        self.assertEqual(len(backend.send_messages(messages)), 6)
+        self.assertEqual(
+            [(len(receptors), message) for receptors, message in backend.calls],
+            [(2, "hi"), (2, "hi"), (1, "hi"), (1, "bye")],
+        )
+
+    @mock.patch("users.sms.backends.time.sleep")
+    @mock.patch("users.sms.backends.random.uniform", side_effect=lambda low, high: high)
+    def test_retries_back_off_exponentially(self, uniform, sleep):
+        backend = RecordingBackend(failures=[ConnectionError(), ConnectionError()], max_retries=3)
+        self.assertEqual(backend.send_messages([("09120000001", "hi")]), [{"receptor": "09120000001"}])
+        self.assertEqual(len(backend.calls), 3)
+        self.assertEqual([c.args[0] for c in sleep.call_args_list], [0.5, 1.0])
+
+    @mock.patch("users.sms.backends.time.sleep")
+    def test_gives_up_after_max_retries(self, sleep):
+        backend = RecordingBackend(failures=[ConnectionError()] * 5, max_retries=2)
+        with self.assertRaises(ConnectionError):
+            backend.send_messages([("09120000001", "hi")])
+        self.assertEqual(len(backend.calls), 3)
+
+    @mock.patch("users.sms.backends.time.sleep")
+    def test_other_errors_are_not_retried(self, sleep):
+        backend = RecordingBackend(failures=[ValueError("bad number")])
+        with self.assertRaises(ValueError):
+            backend.send_messages([("09120000001", "hi")])
+        self.assertEqual(len(backend.calls), 1)
+        sleep.assert_not_called()
+
+    @mock.patch("users.sms.ratelimit.time.monotonic")
+    def test_token_bucket(self, monotonic):
+        monotonic.return_value = 100.0
+        bucket = TokenBucket(rate=2, capacity=2)
+        self.assertEqual((bucket.try_acquire(), bucket.try_acquire()), (0, 0))
+        self.assertAlmostEqual(bucket.try_acquire(), 0.5)
+        monotonic.return_value = 100.25
+        self.assertAlmostEqual(bucket.try_acquire(), 0.25)
+        monotonic.return_value = 100.5
+        self.assertEqual(bucket.try_acquire(), 0)
+        monotonic.return_value = 200.0  # refills up to capacity, no further
+        self.assertEqual([bucket.try_acquire() for _ in range(2)], [0, 0])
+        self.assertGreater(bucket.try_acquire(), 0)
+
+    def test_file_backend_requires_debug(self):
+        with override_settings(DEBUG=False), self.assertRaises(ImproperlyConfigured):
+            FileBackend()
+        with tempfile.TemporaryDirectory() as tmp, override_settings(DEBUG=True, SMS_FILE_PATH="outbox.jsonl", BASE_DIR=tmp):
+            FileBackend().send_messages([("09120000001", "hi")])
+            with open(os.path.join(tmp, "outbox.jsonl"), encoding="utf-8") as f:
+                self.assertEqual(json.loads(f.read())["receptor"], "09120000001")
+
+
+@override_settings(SMS_BACKEND="users.sms.backends.LocMemBackend")
+class QueuedSMSTests(TestCase):
+    def setUp(self):
+        sms.outbox.clear()
+        self.addCleanup(sms.outbox.clear)
+
+    def queue(self, receptors, message="hi"):
+        with self.captureOnCommitCallbacks(execute=True):
+            sms.queue_sms(receptors, message)
+        return list(Job.objects.filter(name="users.send_sms").order_by("id"))
+
+    def run_due(self):
+        for job in queue.claim(10, "w"):
+            queue.run_job(job.id, job.claimed_by)
+
+    def test_one_job_per_provider_batch(self):
+        self.assertEqual([len(job.payload["receptors"]) for job in self.queue("09120000001")], [1])
+        Job.objects.all().delete()
+        receptors = [f"0912{i:07d}" for i in range(450)]
+        self.assertEqual([len(job.payload["receptors"]) for job in self.queue(receptors)], [200, 200, 50])
+
+    def test_retried_job_resends_only_its_own_batch(self):
+        receptors = [f"0912{i:07d}" for i in range(450)]
+        second_batch = self.queue(receptors)[1]
+        send_batch = LocMemBackend.send_batch
+        failed = []
+
+        def flaky(backend, batch, message):
+            if batch[0] == receptors[200] and not failed:
+                failed.append(batch)
+                raise RuntimeError("provider down")
+            return send_batch(backend, batch, message)
+
+        with mock.patch.object(LocMemBackend, "send_batch", flaky):
+            self.run_due()
+            second_batch.refresh_from_db()
+            self.assertEqual((second_batch.status, second_batch.attempts), ("queued", 1))
+
+            Job.objects.filter(id=second_batch.id).update(run_at=timezone.now())
+            self.run_due()
+        self.assertEqual(sorted(entry["receptor"] for entry in sms.outbox), receptors)
+        self.assertEqual(set(Job.objects.values_list("status", flat=True)), {"done"})
@@ -1,7 +1,10 @@
 from rest_framework.views import APIView  
-from rest_framework.permissions import IsAuthenticated  
+from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework.response import Response          
-from .serializers import MeSerializer
+from rest_framework.authtoken.models import Token
+from .serializers import MeSerializer, OTPRequestSerializer, OTPVerifySerializer
+from .models import User
+from . import otp, sms
 from rest_framework import status
 
 class MeView(APIView):
@@ -16,4 +19,55 @@ class MeView(APIView):
         if serializer.is_valid():
             serializer.save()
             return Response(serializer.data)
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)    
\ No newline at end of file
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)    
+
+class OTPRequestView(APIView):
+    """
+    Send a login code to a mobile number.
+    Body: { "mobile": "09120001234" }
+    """
+    permission_classes = [AllowAny]
+    authentication_classes = []
+
+    def post(self, request):
+        serializer = OTPRequestSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        mobile = serializer.validated_data["mobile"]
+
+        try:
+            code = otp.get_store().issue(mobile)
+        except otp.OTPError as e:
+            return Response({"detail": str(e)}, status=status.HTTP_429_TOO_MANY_REQUESTS)
+
+        sms.queue_sms(mobile, f"Kelaasor login code: {code}")
+        return Response({"detail": "Code sent."}, status=status.HTTP_202_ACCEPTED)
+
+
+class OTPVerifyView(APIView):
+    """
+    Exchange a login code for an auth token; creates the user on first login.
+    Body: { "mobile": "09120001234", "code": "123456" }
+    """
+    permission_classes = [AllowAny]
+    authentication_classes = []
+
+    def post(self, request):
+        serializer = OTPVerifySerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        mobile = serializer.validated_data["mobile"]
+
+        try:
+            otp.get_store().verify(mobile, serializer.validated_data["code"])
+        except otp.OTPError as e:
+            code = status.HTTP_429_TOO_MANY_REQUESTS if e.code == "too_many_attempts" else status.HTTP_400_BAD_REQUEST
+            return Response({"detail": str(e)}, status=code)
+
+        user = User.objects.filter(mobile=mobile).first()
+        created = user is None
+        if created:
+            user = User.objects.create_user(mobile=mobile)
+        if not user.is_active:
+            return Response({"detail": "This account is disabled."}, status=status.HTTP_403_FORBIDDEN)
+
+        token, _ = Token.objects.get_or_create(user=user)
+        return Response({"token": token.key, "created": created}, status=status.HTTP_200_OK)